@@ -1,3 +1,116 @@
 from django.contrib import admin
 
-# Register your models here.
+from core.audit import acting_as
+from core.paginators import EstimatedCountPaginator
+
+from .bulk import delete_entries
+from .models import Address, AddressDadata, AuditEntry, CollectionVersion, Person
+
+
+class CollectionVersionAdminMixin:
+    """
+    «Удалить выбранные» — QuerySet.delete() мимо Model.delete():
+    версию коллекции (кэш API) поднимаем явно.
+    """
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        CollectionVersion.bump()
+
+
+class AuditAdminMixin:
+    """
+    Изменения из админки — в журнал (AuditEntry) от имени request.user.
+    «Удалить выбранные» идёт мимо Model.delete(): записи delete — явно.
+    """
+
+    def save_model(self, request, obj, form, change):
+        with acting_as(request.user):
+            super().save_model(request, obj, form, change)
+
+    def delete_model(self, request, obj):
+        with acting_as(request.user):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        ids = list(queryset.values_list("pk", flat=True))
+        super().delete_queryset(request, queryset)
+        with acting_as(request.user):
+            AuditEntry.record(delete_entries(queryset.model.audit_type, ids))
+
+
+# =========================
+# ADDRESS
+# =========================
+
+class AddressDadataInline(admin.StackedInline):
+    """
+    Сырой ответ DaData — только на странице адреса, не в списке.
+    """
+
+    model = AddressDadata
+    can_delete = False
+    extra = 0
+    readonly_fields = ("payload",)
+
+
+@admin.register(Address)
+class AddressAdmin(AuditAdminMixin, CollectionVersionAdminMixin, admin.ModelAdmin):
+    """
+    Changelist рассчитан на миллионы строк:
+    - поиск (icontains) — по GIN pg_trgm на UPPER(col), миграция 0006
+    - без точного COUNT(*) (EstimatedCountPaginator, show_full_result_count)
+    - сортировка по индексу (created_at, id)
+    """
+
+    list_display = ("id", "country", "city", "address_line", "zipcode", "created_at")
+    search_fields = ("address_line", "city")
+    ordering = ("-created_at", "-id")
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    readonly_fields = ("fias_id", "kladr_id", "geo_lat", "geo_lon", "created_at", "updated_at")
+    inlines = [AddressDadataInline]
+
+
+# =========================
+# PERSON
+# =========================
+
+@admin.register(Person)
+class PersonAdmin(AuditAdminMixin, CollectionVersionAdminMixin, admin.ModelAdmin):
+    """
+    Changelist персон: оба адреса JOIN'ом (list_select_related),
+    адреса в форме — autocomplete, а не <select> на всю таблицу.
+    """
+
+    list_display = (
+        "id",
+        "full_name",
+        "email",
+        "sex",
+        "birthday",
+        "registration_city",
+        "actual_city",
+        "created_at",
+    )
+    list_select_related = ("registration_address", "actual_address")
+    list_filter = ("sex",)
+    search_fields = ("full_name", "email")
+    ordering = ("-created_at", "-id")
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    autocomplete_fields = ("registration_address", "actual_address")
+    readonly_fields = ("full_name", "created_at", "updated_at")
+
+    # без ordering: сортировка по столбцу JOIN'а не попадает в индекс
+    @admin.display(description="Registration city")
+    def registration_city(self, obj):
+        return obj.registration_address.city if obj.registration_address else None
+
+    @admin.display(description="Actual city")
+    def actual_city(self, obj):
+        return obj.actual_address.city if obj.actual_address else None
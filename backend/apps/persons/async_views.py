@@ -0,0 +1,287 @@
+"""
+Async-чтение персон и адресов под ASGI: list / retrieve / search.
+
+DRF не умеет async-handlers, поэтому синхронный view держит поток на
+всё время запроса, включая отдачу тела медленному клиенту. Здесь GET
+обслуживается корутиной:
+- пользователь — aauthenticate() authenticator'ов viewset'а
+- валидатор (версия коллекции / строки), кэш ответов, страница —
+  async ORM / async cache (aget, afirst, aiterator)
+- тело отдаётся потоком (StreamingHttpResponse с async-итератором):
+  строки рендерятся кусками, между кусками event loop свободен;
+  результаты поиска уходят клиенту по мере чтения из БД
+
+Всё остальное — методы того же DRF-viewset'а: initialize_request(),
+согласование формата, версия API, permissions, throttles,
+handle_exception() / finalize_response(), фильтры, курсор, ?fields= /
+?expand=, values()-план (readpath), валидаторы и кэш ответов
+(caching.check_validators), выбор реплики. Здесь — только async-вызовы
+БД, кэша и аутентификации (core.authentication.aauthenticate_request).
+Ответ побайтно тот же, что у синхронного view (кроме Content-Length:
+тело потоковое).
+
+Не-GET запросы, Browsable API и другие форматы (всё, кроме
+JSONRenderer), и всё, для чего нет плана (в том числе карточки с
+проверками объекта), уходят в синхронный DRF-view через sync_to_async.
+
+Включается PERSONS_ASYNC_READS=True (apps/persons/urls.py) — имеет
+смысл только под ASGI: под WSGI каждая корутина идёт через
+async_to_sync, это медленнее синхронного view.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from rest_framework.response import Response
+
+from core.authentication import aauthenticate_request
+from core.db.replicas import replica_aliases
+from core.metrics import measure
+from core.renderers import JSONRenderer
+
+from .caching import CACHE_ALIAS, cached_response, check_validators, row_validator, with_validators
+from .models import CollectionVersion
+
+CONTENT_TYPE = JSONRenderer.media_type
+
+# строк на кусок: столько читается из БД и рендерится за один шаг
+CHUNK_SIZE = 100
+
+_renderer = JSONRenderer()
+
+
+def render(data) -> bytes:
+    # JSONRenderer.render(None) — пустое тело, а не null
+    return _renderer.render([data])[1:-1] if data is None else _renderer.render(data)
+
+
+# =========================
+# READER
+# =========================
+
+class AsyncReader:
+    """
+    Один запрос: APIView.dispatch() viewset'а, где initial() и экшен —
+    корутины. Методы list / retrieve / search возвращают ответ или None
+    (плана нет — запрос уходит в синхронный view).
+    """
+
+    def __init__(self, callback, request, kwargs: dict):
+        self.view = view = callback.cls(**callback.initkwargs)
+
+        # как ViewSetMixin.as_view() + APIView.dispatch()
+        view.action_map = callback.actions
+        view.action = callback.actions["get"]
+        for method, action in callback.actions.items():
+            setattr(view, method, getattr(view, action))
+        view.args = ()
+        view.kwargs = kwargs
+        view.request = view.initialize_request(request, **kwargs)
+        view.headers = view.default_response_headers
+
+    async def handle(self, method: str):
+        view = self.view
+        request = view.request
+        try:
+            if not await self.initial():
+                return None
+            response = await getattr(self, method)()
+            if response is None:
+                view.release_read_db()
+                return None
+        except Exception as exc:
+            response = view.handle_exception(exc)
+
+        response = view.finalize_response(request, response)
+        if isinstance(response, Response):
+            response.render()
+        return response
+
+    async def initial(self) -> bool:
+        """
+        APIView.initial() + ReplicaReadMixin; False — формат не JSON,
+        отвечает синхронный view.
+        """
+        view, request = self.view, self.view.request
+
+        view.format_kwarg = view.get_format_suffix(**view.kwargs)
+        renderer, media_type = view.perform_content_negotiation(request)
+        if type(renderer) is not JSONRenderer or media_type != CONTENT_TYPE:
+            return False
+        request.accepted_renderer, request.accepted_media_type = renderer, media_type
+        request.version, request.versioning_scheme = view.determine_version(request, **view.kwargs)
+
+        await aauthenticate_request(request)
+        view.check_permissions(request)
+        view.check_throttles(request)
+
+        # choose_read_db() синхронный (замер лага на реплике) — в потоке;
+        # реплика сбрасывается в finalize_response()
+        alias = await sync_to_async(view.choose_read_db)(request) if replica_aliases() else None
+        view.use_read_db(alias)
+        return True
+
+    # =========================
+    # VERSIONED RESPONSES
+    # =========================
+
+    async def versioned(self, current: tuple, produce):
+        """
+        VersionedResponseMixin.versioned_response(): 304 или ответ из кэша,
+        иначе produce() — и тело в кэш, когда оно отдано целиком.
+        """
+        validators, response, key = check_validators(self.view.request, current)
+        if validators is None:
+            return await produce(None)
+        if response is not None:
+            return response
+
+        if key is not None:
+            cached = await caches[CACHE_ALIAS].aget(key)
+            if cached is not None:
+                return cached_response(cached, validators)
+
+        return with_validators(await produce(key), validators)
+
+    # =========================
+    # ACTIONS
+    # =========================
+
+    async def list(self):
+        plan = self.view.get_read_plan()
+        if plan is None:
+            return None
+
+        async def produce(key):
+            queryset = self.view.get_projected_queryset(plan)
+            paginator = self.view.paginator
+            page = paginator.page_queryset(queryset, self.view.request, self.view)
+
+            if page is None:
+                rows = [row async for row in queryset.aiterator(chunk_size=CHUNK_SIZE)]
+                return self.stream(b"[", plan, _chunks(rows), b"]", key)
+
+            paginator.set_page([row async for row in page.aiterator(chunk_size=CHUNK_SIZE)])
+            head = b"".join([
+                b'{"next":', render(paginator.get_next_link()),
+                b',"previous":', render(paginator.get_previous_link()),
+                b',"results":[',
+            ])
+            return self.stream(head, plan, _chunks(paginator.page), b"]}", key)
+
+        return await self.versioned(await CollectionVersion.acurrent(), produce)
+
+    async def retrieve(self):
+        plan = self.view.get_read_plan()
+        if plan is None:
+            return None
+
+        async def produce(key):
+            view = self.view
+            lookup = {view.lookup_field: view.kwargs[view.lookup_url_kwarg or view.lookup_field]}
+            queryset = view.get_projected_queryset(plan)
+            # как rest_framework.generics.get_object_or_404; проверок объекта
+            # нет — иначе get_read_plan() не дал бы плана
+            try:
+                row = await queryset.filter(**lookup).afirst()
+            except (TypeError, ValueError, DjangoValidationError):
+                raise Http404
+            if row is None:
+                raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+            with measure("serializer"):
+                content = render(plan.render_row(row))
+            if key is not None:
+                await caches[CACHE_ALIAS].aset(key, (content, CONTENT_TYPE), settings.PERSONS_RESPONSE_CACHE_TTL)
+            return HttpResponse(content, content_type=CONTENT_TYPE)
+
+        # как VersionedResponseMixin.row_version()
+        queryset = self.view.row_version_queryset()
+        row = await queryset.afirst() if queryset is not None else None
+        return await self.versioned(row_validator(row), produce)
+
+    async def search(self):
+        plan = self.view.get_read_plan()
+        if plan is None:
+            return None
+
+        queryset = self.view.get_search_queryset().values(*plan.columns)
+        rows = _achunks(queryset.aiterator(chunk_size=CHUNK_SIZE))
+        return self.stream(b'{"results":[', plan, rows, b"]}", None)
+
+    # =========================
+    # STREAMING
+    # =========================
+
+    def stream(self, head: bytes, plan, chunks, tail: bytes, key: str | None) -> StreamingHttpResponse:
+        """
+        head + строки кусками через запятую + tail — те же байты, что
+        render() всего ответа. key — положить тело в кэш ответов.
+        """
+
+        async def body():
+            parts = [head]
+            yield head
+            first = True
+            async for rows in chunks:
+                if not rows:
+                    continue
+                with measure("serializer"):
+                    data = plan.render(rows)
+                part = render(data)[1:-1]
+                if not first:
+                    part = b"," + part
+                first = False
+                parts.append(part)
+                yield part
+            parts.append(tail)
+            yield tail
+
+            if key is not None:
+                await caches[CACHE_ALIAS].aset(
+                    key, (b"".join(parts), CONTENT_TYPE), settings.PERSONS_RESPONSE_CACHE_TTL
+                )
+
+        return StreamingHttpResponse(body(), content_type=CONTENT_TYPE)
+
+
+async def _chunks(rows: list):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        yield rows[start:start + CHUNK_SIZE]
+
+
+async def _achunks(iterator):
+    chunk = []
+    async for row in iterator:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    yield chunk
+
+
+# =========================
+# VIEWS
+# =========================
+
+def async_read_view(callback, method: str):
+    """
+    View для URL DRF-viewset'а: GET в JSON — корутиной (method —
+    list / retrieve / search), остальное — callback (DRF) в потоке.
+    """
+    fallback = sync_to_async(callback)
+
+    async def view(request, *args, **kwargs):
+        if request.method == "GET":
+            response = await AsyncReader(callback, request, kwargs).handle(method)
+            if response is not None:
+                return response
+        return await fallback(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    view.cls = callback.cls
+    view.initkwargs = callback.initkwargs
+    view.actions = callback.actions
+    return view
@@ -0,0 +1,199 @@
+from django.db import transaction
+from django.utils import timezone
+
+from core.audit import current_actor
+
+from .models import Address, AddressDadata, AuditEntry, CollectionVersion, Person
+
+BATCH_SIZE = 1000
+
+ADDRESS_FIELDS = ("registration_address", "actual_address")
+
+# столбцы addresses, которые пересчитывает Address.apply_dadata
+DADATA_FIELDS = {"fias_id", "kladr_id", "geo_lat", "geo_lon"}
+
+
+def bulk_save_persons(items: list[tuple[Person | None, dict]]) -> list[Person]:
+    """
+    Пакетная запись персон вместе с вложенными адресами.
+
+    items: [(instance | None, validated_data)] — validated_data от PersonSerializer;
+    instance=None → создание, иначе обновление (как partial update).
+
+    Инварианты:
+    - Вся запись — одна транзакция
+    - Запросов O(число батчей), а не O(число персон):
+      bulk_create / bulk_update адресов, затем персон
+    - full_name считается здесь же (bulk_* не вызывают Person.save())
+    - updated_at выставляется явно (bulk_update не применяет auto_now)
+    - dadata → производные столбцы адреса + один upsert в address_dadata
+    - версия коллекции (CollectionVersion) поднимается один раз на вызов
+    - журнал изменений (AuditEntry) — одна запись на изменённый объект
+
+    Возвращает персоны в порядке items.
+    """
+    now = timezone.now()
+
+    new_addresses: list[Address] = []
+    changed_addresses: list[Address] = []
+    address_fields: set[str] = set()
+    dadata: list[tuple[Address, dict | None]] = []
+
+    new_persons: list[Person] = []
+    changed_persons: list[Person] = []
+    person_fields: set[str] = set()
+
+    persons = []
+
+    for instance, validated_data in items:
+        data = dict(validated_data)
+        nested = {name: data.pop(name, None) for name in ADDRESS_FIELDS}
+
+        person = instance or Person()
+        for key, value in data.items():
+            setattr(person, key, value)
+        person_fields |= data.keys()
+
+        for name, addr_data in nested.items():
+            if addr_data is None:
+                continue
+
+            person_fields.add(name)
+
+            # registration_address_id / actual_address_id → готовый Address
+            if isinstance(addr_data, Address):
+                setattr(person, name, addr_data)
+                continue
+
+            addr_data = dict(addr_data)
+            has_dadata = "dadata" in addr_data
+            payload = addr_data.pop("dadata", None)
+
+            address = getattr(person, name) if instance is not None else None
+            if address is None:
+                # FK подхватит pk после bulk_create адресов
+                address = Address(**addr_data)
+                new_addresses.append(address)
+                setattr(person, name, address)
+            else:
+                for key, value in addr_data.items():
+                    setattr(address, key, value)
+                address.updated_at = now
+                address_fields |= addr_data.keys()
+                changed_addresses.append(address)
+
+            if has_dadata:
+                address.apply_dadata(payload)
+                address_fields |= DADATA_FIELDS
+                dadata.append((address, payload))
+
+        person.full_name = person.compose_full_name()
+
+        if instance is None:
+            new_persons.append(person)
+        else:
+            person.updated_at = now
+            changed_persons.append(person)
+
+        persons.append(person)
+
+    with transaction.atomic():
+        Address.objects.bulk_create(new_addresses, batch_size=BATCH_SIZE)
+
+        if changed_addresses:
+            Address.objects.bulk_update(
+                changed_addresses,
+                sorted(address_fields | {"updated_at"}),
+                batch_size=BATCH_SIZE,
+            )
+
+        if dadata:
+            AddressDadata.store({address.pk: payload for address, payload in dadata})
+
+        Person.objects.bulk_create(new_persons, batch_size=BATCH_SIZE)
+
+        if changed_persons:
+            Person.objects.bulk_update(
+                changed_persons,
+                sorted(person_fields | {"full_name", "updated_at"}),
+                batch_size=BATCH_SIZE,
+            )
+
+        if persons:
+            CollectionVersion.bump()
+
+        AuditEntry.record(
+            _audit_entries(new_addresses, created=True)
+            + _audit_entries(changed_addresses, created=False)
+            + _audit_entries(new_persons, created=True)
+            + _audit_entries(changed_persons, created=False)
+        )
+
+    return persons
+
+
+def _audit_entries(instances: list, created: bool) -> list[AuditEntry]:
+    """
+    Записи журнала после bulk_create / bulk_update (pk уже есть).
+    """
+    entries = []
+    for instance in dict.fromkeys(instances):
+        changes = instance.audit_changes(created)
+        if created or changes:
+            entries.append(instance.audit_entry(AuditEntry.CREATE if created else AuditEntry.UPDATE, changes))
+        instance.audit_snapshot()
+    return entries
+
+
+def bulk_delete_persons(queryset) -> tuple[int, int]:
+    """
+    Удаление набора персон вместе с их адресами — та же семантика,
+    что PersonViewSet.perform_destroy, но set-based.
+
+    - Персона владеет адресами: её registration / actual адреса удаляются
+    - Если удаляемый адрес указан у другой персоны, её FK → NULL
+      (on_delete=SET_NULL), как при поштучном удалении
+    - Всё — одна транзакция, запросов O(число батчей):
+      DELETE persons, затем UPDATE ... SET NULL / DELETE address_dadata /
+      DELETE addresses по списку id
+
+    Возвращает (удалено персон, удалено адресов).
+    """
+    with transaction.atomic():
+        rows = list(
+            queryset.order_by().values_list("id", "registration_address_id", "actual_address_id")
+        )
+        person_ids = [row[0] for row in rows]
+        address_ids = sorted({pk for row in rows for pk in row[1:] if pk is not None})
+
+        persons = addresses = 0
+
+        for start in range(0, len(person_ids), BATCH_SIZE):
+            _, deleted = Person.objects.filter(pk__in=person_ids[start:start + BATCH_SIZE]).delete()
+            persons += deleted.get(Person._meta.label, 0)
+
+        # персоны уже удалены: SET_NULL затронет только чужие ссылки
+        for start in range(0, len(address_ids), BATCH_SIZE):
+            _, deleted = Address.objects.filter(pk__in=address_ids[start:start + BATCH_SIZE]).delete()
+            addresses += deleted.get(Address._meta.label, 0)
+
+        if persons or addresses:
+            CollectionVersion.bump()
+
+        AuditEntry.record(
+            delete_entries(AuditEntry.PERSON, person_ids) + delete_entries(AuditEntry.ADDRESS, address_ids)
+        )
+
+    return persons, addresses
+
+
+def delete_entries(object_type: str, ids) -> list[AuditEntry]:
+    """
+    Записи журнала для удаления мимо Model.delete() (QuerySet.delete()).
+    """
+    actor = current_actor()
+    actor_id = actor.pk if actor is not None else None
+    return [
+        AuditEntry(object_type=object_type, object_id=pk, action=AuditEntry.DELETE, actor_id=actor_id)
+        for pk in ids
+    ]
@@ -0,0 +1,167 @@
+"""
+Условные GET и кэш ответов для /api/persons/ и /api/addresses/.
+
+Валидатор списка — версия коллекции (CollectionVersion): она растёт
+после каждой транзакции, изменившей персоны или адреса. Валидатор
+карточки — pk и updated_at самой строки (и её адресов, см.
+version_fields): запись в другие строки его не меняет. Из валидатора и
+запроса строится ETag, а время служит Last-Modified. Поэтому повторное
+чтение стоит один SELECT по первичному ключу:
+- If-None-Match / If-Modified-Since совпали → 304 без тела
+- иначе — готовые байты из кэша (CACHES["responses"]),
+  если такой ответ уже отдавался при этом валидаторе
+
+Валидаторы и кэш — только у JSON-ответов: они не зависят от
+пользователя (только IsAuthenticated), поэтому кэш общий. Если в JSON
+появятся поля, зависящие от пользователя, пользователя нужно добавить
+в ключ. HTML Browsable API содержит пользователя и CSRF-токен — он
+всегда рендерится заново. Vary: Cookie, Authorization — браузер и
+прокси не отдают закэшированный ответ другому пользователю.
+"""
+
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+
+from .models import CollectionVersion
+
+CACHE_ALIAS = "responses"
+
+
+class VersionedResponseMixin:
+    """
+    list / retrieve с ETag, Last-Modified, 304 и кэшем ответов.
+
+    version_fields — столбцы строки (values_list), из которых строится
+    валидатор карточки; первый — pk, среди остальных — updated_at строки
+    и всего, что входит в её представление.
+
+    Кэшируются только 200. Cache-Control: private, no-cache — браузер
+    хранит ответ, но каждый раз перепроверяет его по ETag.
+    """
+
+    version_fields = ("pk", "updated_at")
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned_response(request, CollectionVersion.current(), super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned_response(request, self.row_version(), super().retrieve, *args, **kwargs)
+
+    def row_version_queryset(self):
+        """
+        Запрос валидатора карточки или None, если lookup из URL заведомо
+        не найдёт строку (тогда handler ответит 404).
+        """
+        lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        try:
+            return self.get_queryset().filter(**lookup).values_list(*self.version_fields)
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def row_version(self) -> tuple:
+        queryset = self.row_version_queryset()
+        return row_validator(queryset.first() if queryset is not None else None)
+
+    def versioned_response(self, request, current: tuple, handler, *args, **kwargs):
+        validators, response, key = check_validators(request, current)
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        if response is not None:
+            return response
+
+        if key is not None:
+            cached = caches[CACHE_ALIAS].get(key)
+            if cached is not None:
+                return cached_response(cached, validators)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            with_validators(response, validators)
+            response.versioned_cache_key = key
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        patch_vary_headers(response, ("Cookie", "Authorization"))
+
+        key = getattr(response, "versioned_cache_key", None)
+        if key is not None:
+            response.render()
+            caches[CACHE_ALIAS].set(
+                key,
+                (response.content, response["Content-Type"]),
+                settings.PERSONS_RESPONSE_CACHE_TTL,
+            )
+        return response
+
+
+# =========================
+# HELPERS
+# =========================
+# общие с async-чтением (apps/persons/async_views.py): ETag и ключ кэша
+# у одного URL одинаковые, кэш ответов — общий
+
+def check_validators(request, current: tuple) -> tuple:
+    """
+    (validators, response, key) для current = (version, modified):
+    - нет валидатора или ответ не JSON — (None, None, None): ответ без
+      ETag и кэша
+    - If-None-Match / If-Modified-Since совпали — response: готовый 304
+    - иначе key — ключ кэша ответов (None, если кэш выключен)
+    """
+    version, modified = current
+    if modified is None or not isinstance(request.accepted_renderer, JSONRenderer):
+        return None, None, None
+
+    etag = version_etag(request.get_full_path(), request.accepted_media_type, version, modified)
+    validators = response_validators(etag, modified)
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(modified.timestamp()))
+    if response is not None:
+        return validators, with_validators(response, validators), None
+
+    return validators, None, cache_key(etag) if settings.PERSONS_RESPONSE_CACHE_TTL else None
+
+
+def cached_response(cached: tuple, validators: dict) -> HttpResponse:
+    content, content_type = cached
+    return with_validators(HttpResponse(content, content_type=content_type), validators)
+
+
+def row_validator(row: tuple | None) -> tuple:
+    """
+    Строка version_fields → (version, modified): modified — самое
+    позднее из времён строки. Нет строки — (None, None), без валидаторов.
+    """
+    if row is None:
+        return None, None
+    return row, max(value for value in row[1:] if isinstance(value, datetime.datetime))
+
+
+def version_etag(full_path: str, media_type: str | None, version, modified) -> str:
+    # время в ключе: версия одна и та же после отката (тесты, восстановление БД)
+    raw = "|".join([str(version), modified.isoformat(), full_path, media_type or ""])
+    return f'"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def response_validators(etag: str, modified) -> dict:
+    return {"ETag": etag, "Last-Modified": http_date(modified.timestamp())}
+
+
+def cache_key(etag: str) -> str:
+    return f"persons:response:{etag.strip(chr(34))}"
+
+
+def with_validators(response, validators: dict):
+    for header, value in validators.items():
+        response[header] = value
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,81 @@
+import csv
+import json
+from collections.abc import Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from .tabular import COLUMNS, VALUE_PATHS
+
+# строк на один SQL fetch (server-side cursor на PostgreSQL)
+CHUNK_SIZE = 2000
+
+# строк на один отданный кусок ответа
+ROWS_PER_WRITE = 500
+
+
+def export_rows(queryset: QuerySet) -> Iterator[tuple]:
+    """
+    Плоские строки персон в порядке id.
+
+    iterator() не кэширует результат: на PostgreSQL это server-side cursor,
+    в памяти одновременно не больше CHUNK_SIZE строк.
+    """
+    return (
+        queryset.order_by("id")
+        .values_list(*VALUE_PATHS)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+class _Echo:
+    """
+    Псевдо-файл для csv.writer: write() возвращает строку вместо записи.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(queryset: QuerySet) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+
+    buffer = []
+    for row in export_rows(queryset):
+        buffer.append(writer.writerow([_csv_value(value) for value in row]))
+        if len(buffer) >= ROWS_PER_WRITE:
+            yield "".join(buffer)
+            buffer.clear()
+
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_ndjson(queryset: QuerySet) -> Iterator[str]:
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    buffer = []
+    for row in export_rows(queryset):
+        buffer.append(encoder.encode(dict(zip(COLUMNS, row))) + "\n")
+        if len(buffer) >= ROWS_PER_WRITE:
+            yield "".join(buffer)
+            buffer.clear()
+
+    if buffer:
+        yield "".join(buffer)
+
+
+# формат → (генератор, content type, расширение файла)
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv; charset=utf-8", "csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson; charset=utf-8", "ndjson"),
+}
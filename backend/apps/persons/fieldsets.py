@@ -0,0 +1,153 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_field_list(raw: str | None) -> list[str]:
+    """
+    "id, full_name,,email" → ["id", "full_name", "email"]
+    """
+    if not raw:
+        return []
+    return [name.strip() for name in raw.split(",") if name.strip()]
+
+
+# =========================
+# SERIALIZER
+# =========================
+
+class SparseFieldsetSerializerMixin:
+    """
+    Sparse fieldsets для ModelSerializer.
+
+    kwargs:
+    - fields=[...]  → только перечисленные поля (неизвестные игнорируются)
+    - expand=[...]  → добавить поля к представлению по умолчанию
+    - compact=True  → представление по умолчанию = Meta.list_fields
+
+    Meta.deferred_fields — write-only по умолчанию, отдаются только если
+    названы в fields / expand. Вложенным сериализаторам — через точку:
+    ?expand=registration_address.dadata.
+
+    Write-only поля не трогаем: обрезается только выдача.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, compact=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.apply_fieldset(fields=fields, expand=expand, compact=compact)
+
+    def apply_fieldset(self, fields=None, expand=None, compact=False) -> None:
+        requested = list(fields or ()) + list(expand or ())
+        own = {name.split(".")[0] for name in requested}
+
+        for name in set(getattr(self.Meta, "deferred_fields", ())) & own:
+            self.fields[name].write_only = False
+
+        if fields:
+            allowed = {name.split(".")[0] for name in fields}
+        elif compact and hasattr(self.Meta, "list_fields"):
+            allowed = set(self.Meta.list_fields) | own
+        else:
+            allowed = None
+
+        for name in list(self.fields):
+            field = self.fields[name]
+            if field.write_only:
+                continue
+
+            if allowed is not None and name not in allowed:
+                self.fields.pop(name)
+            elif isinstance(field, SparseFieldsetSerializerMixin):
+                prefix = f"{name}."
+                nested = [item[len(prefix):] for item in requested if item.startswith(prefix)]
+                if nested:
+                    field.apply_fieldset(expand=nested)
+
+
+def projection(serializer, prefix: str = "") -> tuple[set[str], set[str]]:
+    """
+    Столбцы и JOIN'ы, которые реально нужны сериализатору.
+
+    Возвращает (only_fields, select_related) для QuerySet.only() /
+    select_related(): вложенный сериализатор = JOIN + его столбцы,
+    обычное поле = столбец модели с тем же source, поле со source на
+    обратный one-to-one (AddressDadata) = LEFT JOIN + столбцы связи.
+    """
+    model = serializer.Meta.model
+    concrete = {f.name for f in model._meta.concrete_fields}
+    reverse_one_to_one = {
+        f.name: f.related_model
+        for f in model._meta.get_fields()
+        if f.one_to_one and not f.concrete
+    }
+
+    only = {f"{prefix}{model._meta.pk.name}"}
+    related = set()
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        source = field.source.split(".")[0]
+
+        if isinstance(field, serializers.BaseSerializer):
+            nested_only, nested_related = projection(field, f"{prefix}{source}__")
+            only |= {f"{prefix}{source}"} | nested_only
+            related |= {f"{prefix}{source}"} | nested_related
+        elif source in concrete:
+            only.add(f"{prefix}{source}")
+        elif source in reverse_one_to_one:
+            related.add(f"{prefix}{source}")
+            only |= {
+                f"{prefix}{source}__{f.name}"
+                for f in reverse_one_to_one[source]._meta.concrete_fields
+            }
+
+    return only, related
+
+
+# =========================
+# VIEW
+# =========================
+
+class SparseFieldsetMixin:
+    """
+    Прокидывает ?fields= / ?expand= в сериализатор и выбирает из БД
+    только те столбцы, которые попадут в ответ.
+
+    - list_actions — экшены с компактным представлением по умолчанию
+    - ordering_fields всегда выбираются: они нужны keyset-курсору
+    - ответы на запись всегда полные
+    """
+
+    list_actions = ("list",)
+
+    def get_fieldset_kwargs(self) -> dict:
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return {}
+
+        return {
+            "fields": parse_field_list(request.query_params.get("fields")),
+            "expand": parse_field_list(request.query_params.get("expand")),
+            "compact": self.action in self.list_actions,
+        }
+
+    def get_serializer(self, *args, **kwargs):
+        for key, value in self.get_fieldset_kwargs().items():
+            kwargs.setdefault(key, value)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.get_fieldset_kwargs():
+            return queryset
+
+        only, related = projection(self.get_serializer())
+        only |= set(getattr(self, "ordering_fields", ()))
+
+        # select_related() без аргументов = «все FK», поэтому только явно
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+
+        return queryset.only(*only)
@@ -0,0 +1,94 @@
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Address
+
+
+# =========================
+# QUERY PARAMS
+# =========================
+
+class PersonFilterSerializer(serializers.Serializer):
+    """
+    Разбор и валидация query-параметров фильтрации персон.
+
+    Каждому фильтру соответствует индекс из Person.Meta.indexes /
+    Address.Meta.indexes — новые фильтры добавлять только вместе с индексом.
+    """
+
+    sex = serializers.IntegerField(required=False)
+
+    birthday = serializers.DateField(required=False)
+    birthday_after = serializers.DateField(required=False)
+    birthday_before = serializers.DateField(required=False)
+
+    email = serializers.CharField(required=False)
+
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    updated_after = serializers.DateTimeField(required=False)
+    updated_before = serializers.DateTimeField(required=False)
+
+    # город регистрации ИЛИ фактического адреса
+    city = serializers.CharField(required=False)
+
+
+# =========================
+# FILTERING
+# =========================
+
+LOOKUPS = {
+    "sex": "sex",
+    "birthday": "birthday",
+    "birthday_after": "birthday__gte",
+    "birthday_before": "birthday__lte",
+    "email": "email",
+    "created_after": "created_at__gte",
+    "created_before": "created_at__lte",
+    "updated_after": "updated_at__gte",
+    "updated_before": "updated_at__lte",
+}
+
+
+def filter_persons(queryset, params):
+    """
+    Применяет фильтры из params (query-параметры или обычный dict).
+
+    Неизвестные ключи игнорируются, некорректные значения → ValidationError.
+    Границы диапазонов (*_after / *_before) включительные.
+    """
+    serializer = PersonFilterSerializer(
+        data={
+            key: value
+            for key, value in params.items()
+            if key in PersonFilterSerializer._declared_fields
+        }
+    )
+    serializer.is_valid(raise_exception=True)
+    filters = serializer.validated_data
+
+    queryset = queryset.filter(
+        **{LOOKUPS[key]: value for key, value in filters.items() if key in LOOKUPS}
+    )
+
+    city = filters.get("city")
+    if city is not None:
+        # два IN-подзапроса по индексу addresses.city вместо OR по JOIN:
+        # каждый FK-столбец persons проиндексирован, план — BitmapOr
+        address_ids = Address.objects.filter(city=city).values("id")
+        queryset = queryset.filter(
+            registration_address_id__in=address_ids
+        ) | queryset.filter(
+            actual_address_id__in=address_ids
+        )
+
+    return queryset
+
+
+class PersonFilterBackend(BaseFilterBackend):
+    """
+    Серверная фильтрация списка персон по query-параметрам (см. filter_persons).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_persons(queryset, request.query_params)
@@ -0,0 +1,450 @@
+import csv
+import io
+import json
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+
+from core.audit import current_actor
+
+from .bulk import bulk_save_persons
+from .models import Address, AuditEntry, CollectionVersion, Person
+from .tabular import ADDRESS_COLUMNS, ADDRESS_PREFIXES
+
+# поля персоны, которые берутся из файла
+# (full_name / created_at / updated_at всегда вычисляются при записи)
+PERSON_FIELDS = [
+    "last_name",
+    "first_name",
+    "middle_name",
+    "photo",
+    "email",
+    "sex",
+    "birthday",
+    "description",
+]
+
+# NOT NULL в addresses: пустое значение → ""
+REQUIRED_ADDRESS_FIELDS = {"country", "city"}
+
+
+class RowError(Exception):
+    """
+    Строка файла не прошла валидацию: errors = {столбец: сообщение}.
+    """
+
+    def __init__(self, errors: dict):
+        super().__init__(errors)
+        self.errors = errors
+
+
+@dataclass
+class ImportRow:
+    number: int
+    id: int | None
+    person: dict
+    addresses: dict  # relation → dict полей адреса (только непустые адреса)
+
+
+# =========================
+# PARSING
+# =========================
+
+def read_records(stream, file_format: str) -> Iterator[tuple[int, dict]]:
+    """
+    Потоковое чтение файла: (номер записи с 1, dict столбец → строка).
+    """
+    if file_format == "csv":
+        for number, record in enumerate(csv.DictReader(stream), start=1):
+            yield number, record
+        return
+
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record
+
+
+def _text(value) -> str | None:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def parse_record(number: int, record: dict) -> ImportRow:
+    """
+    Валидация и приведение типов одной записи (без обращения к БД).
+
+    Правила как у PersonSerializer: first_name обязателен, у непустого
+    адреса обязателен address_line. Длины строк — по max_length модели.
+    """
+    if not isinstance(record, dict):
+        raise RowError({"__all__": "Expected a JSON object."})
+
+    errors = {}
+
+    def clean(model, field_name: str, column: str):
+        field = model._meta.get_field(field_name)
+        value = _text(record.get(column))
+        if value is None:
+            return None
+        try:
+            value = field.to_python(value)
+        except ValidationError as exc:
+            errors[column] = exc.messages[0]
+            return None
+        if field.max_length and len(value) > field.max_length:
+            errors[column] = f"Ensure this value has at most {field.max_length} characters."
+        return value
+
+    person = {name: clean(Person, name, name) for name in PERSON_FIELDS}
+
+    if not person["first_name"]:
+        errors["first_name"] = "This field is required."
+
+    if person["email"]:
+        try:
+            validate_email(person["email"])
+        except ValidationError as exc:
+            errors["email"] = exc.messages[0]
+
+    addresses = {}
+    for relation, prefix in ADDRESS_PREFIXES.items():
+        address = {name: clean(Address, name, f"{prefix}{name}") for name in ADDRESS_COLUMNS}
+        if not any(address.values()):
+            continue
+        if not address["address_line"]:
+            errors[f"{prefix}address_line"] = "This field is required."
+        for name in REQUIRED_ADDRESS_FIELDS:
+            address[name] = address[name] or ""
+        addresses[relation] = address
+
+    row_id = None
+    if _text(record.get("id")) is not None:
+        try:
+            row_id = int(_text(record["id"]))
+        except ValueError:
+            errors["id"] = "A valid integer is required."
+
+    if errors:
+        raise RowError(errors)
+
+    return ImportRow(number=number, id=row_id, person=person, addresses=addresses)
+
+
+def last_per_id(rows: list[ImportRow]) -> list[ImportRow]:
+    """
+    --upsert: одна строка на id в батче — последняя по файлу.
+
+    Два UPDATE одной персоны из батча: в UPDATE ... FROM (COPY) и
+    bulk_update (ORM) побеждает произвольная строка, INSERT ... ON
+    CONFLICT DO UPDATE падает с "cannot affect row a second time".
+    Строки без id не сворачиваются.
+    """
+    last = {row.id: index for index, row in enumerate(rows) if row.id is not None}
+    return [row for index, row in enumerate(rows) if row.id is None or last[row.id] == index]
+
+
+# =========================
+# LOADERS
+# =========================
+
+class OrmLoader:
+    """
+    Переносимая загрузка: bulk_save_persons (bulk_create / bulk_update).
+    """
+
+    def __init__(self, upsert: bool = False):
+        self.upsert = upsert
+
+    def load(self, rows: list[ImportRow]) -> None:
+        existing = {}
+        if self.upsert:
+            rows = last_per_id(rows)
+            existing = Person.objects.select_related(
+                "registration_address", "actual_address"
+            ).in_bulk([row.id for row in rows if row.id is not None])
+
+        bulk_save_persons(
+            [
+                (existing.get(row.id), {**row.person, **row.addresses})
+                for row in rows
+            ]
+        )
+
+
+class CopyLoader:
+    """
+    PostgreSQL: COPY батча во временную staging-таблицу, затем
+    set-based слияние в addresses / persons несколькими INSERT ... SELECT
+    и UPDATE ... FROM. id новых строк заранее берутся из sequence,
+    поэтому FK персоны → адрес проставляются без RETURNING.
+
+    Журнал: каждый INSERT / UPDATE тем же запросом (data-modifying CTE)
+    пишет в audit_entries запись на строку — create / update с теми же
+    {поле: [было, стало]}, что у AuditedModel. Записи идут в транзакции
+    батча, мимо очереди audit_log: откат батча их тоже откатывает.
+
+    Батч — одна транзакция; staging очищается на COMMIT.
+    """
+
+    staging = "persons_import_staging"
+
+    def __init__(self, upsert: bool = False):
+        self.upsert = upsert
+        self.address_columns = [
+            f"{prefix}{column}"
+            for prefix in ADDRESS_PREFIXES.values()
+            for column in ADDRESS_COLUMNS
+        ]
+        self.copy_columns = ["row_no", "id"] + PERSON_FIELDS + self.address_columns
+
+    def load(self, rows: list[ImportRow]) -> None:
+        if self.upsert:
+            rows = last_per_id(rows)
+
+        actor = current_actor()
+        self.actor_id = actor.pk if actor is not None else None
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._create_staging(cursor)
+            self._copy(cursor, rows)
+            self._merge(cursor)
+            CollectionVersion.bump()
+
+    def _create_staging(self, cursor) -> None:
+        address_ddl = ", ".join(f"{column} text" for column in self.address_columns)
+        cursor.execute(
+            f"""
+            CREATE TEMP TABLE IF NOT EXISTS {self.staging} (
+                row_no bigint,
+                id bigint,
+                last_name text,
+                first_name text,
+                middle_name text,
+                photo text,
+                email text,
+                sex integer,
+                birthday date,
+                description text,
+                {address_ddl},
+                person_id bigint,
+                is_new boolean NOT NULL DEFAULT false,
+                reg_address_id bigint,
+                reg_is_new boolean NOT NULL DEFAULT false,
+                act_address_id bigint,
+                act_is_new boolean NOT NULL DEFAULT false
+            ) ON COMMIT DELETE ROWS
+            """
+        )
+
+    def _copy(self, cursor, rows: list[ImportRow]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        for row in rows:
+            values = [row.number, row.id] + [row.person[name] for name in PERSON_FIELDS]
+            for relation in ADDRESS_PREFIXES:
+                address = row.addresses.get(relation, {})
+                values += [address.get(column) for column in ADDRESS_COLUMNS]
+            # None → пустое поле без кавычек = NULL в COPY csv
+            writer.writerow(["" if value is None else value for value in values])
+
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {self.staging} ({', '.join(self.copy_columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+    def _merge(self, cursor) -> None:
+        person_seq = "pg_get_serial_sequence('persons', 'id')"
+        address_seq = "pg_get_serial_sequence('addresses', 'id')"
+        s = self.staging
+
+        # 1. сопоставление с существующими персонами (--upsert)
+        if self.upsert:
+            cursor.execute(
+                f"""
+                UPDATE {s} AS s
+                SET person_id = p.id,
+                    reg_address_id = p.registration_address_id,
+                    act_address_id = p.actual_address_id
+                FROM persons AS p
+                WHERE p.id = s.id
+                """
+            )
+
+        # 2. id для новых персон и новых адресов
+        cursor.execute(
+            f"UPDATE {s} SET person_id = nextval({person_seq}), is_new = true "
+            f"WHERE person_id IS NULL"
+        )
+
+        for prefix in ADDRESS_PREFIXES.values():
+            cursor.execute(
+                f"UPDATE {s} SET {prefix}address_id = nextval({address_seq}), {prefix}is_new = true "
+                f"WHERE {prefix}address_id IS NULL AND {prefix}address_line IS NOT NULL"
+            )
+
+        # 3. адреса: INSERT новых, UPDATE существующих
+        address_list = ", ".join(ADDRESS_COLUMNS)
+        for prefix in ADDRESS_PREFIXES.values():
+            values = ", ".join(
+                f"COALESCE({prefix}{column}, '')" if column in REQUIRED_ADDRESS_FIELDS else f"{prefix}{column}"
+                for column in ADDRESS_COLUMNS
+            )
+            self._write_audited(
+                cursor,
+                Address,
+                AuditEntry.CREATE,
+                f"""
+                INSERT INTO addresses (id, {address_list}, created_at, updated_at)
+                SELECT {prefix}address_id, {values}, now(), now()
+                FROM {s}
+                WHERE {prefix}is_new
+                RETURNING *
+                """,
+            )
+
+            assignments = ", ".join(
+                f"{column} = COALESCE(s.{prefix}{column}, '')"
+                if column in REQUIRED_ADDRESS_FIELDS
+                else f"{column} = s.{prefix}{column}"
+                for column in ADDRESS_COLUMNS
+            )
+            self._write_audited(
+                cursor,
+                Address,
+                AuditEntry.UPDATE,
+                f"""
+                UPDATE addresses AS a
+                SET {assignments}, updated_at = now()
+                FROM {s} AS s
+                WHERE a.id = s.{prefix}address_id
+                  AND NOT s.{prefix}is_new
+                  AND s.{prefix}address_line IS NOT NULL
+                RETURNING a.*
+                """,
+                before=f"""
+                SELECT * FROM addresses
+                WHERE id IN (
+                    SELECT {prefix}address_id FROM {s}
+                    WHERE NOT {prefix}is_new AND {prefix}address_line IS NOT NULL
+                )
+                """,
+            )
+
+        # 4. персоны: full_name = то же, что Person.compose_full_name()
+        full_name = (
+            "concat_ws(' ', NULLIF(s.last_name, ''), NULLIF(s.first_name, ''), "
+            "NULLIF(s.middle_name, ''))"
+        )
+        person_list = ", ".join(PERSON_FIELDS)
+        person_values = ", ".join(f"s.{name}" for name in PERSON_FIELDS)
+
+        self._write_audited(
+            cursor,
+            Person,
+            AuditEntry.CREATE,
+            f"""
+            INSERT INTO persons (
+                id, {person_list}, full_name,
+                registration_address_id, actual_address_id, created_at, updated_at
+            )
+            SELECT s.person_id, {person_values}, {full_name},
+                   s.reg_address_id, s.act_address_id, now(), now()
+            FROM {s} AS s
+            WHERE s.is_new
+            RETURNING *
+            """,
+        )
+
+        if self.upsert:
+            assignments = ", ".join(f"{name} = s.{name}" for name in PERSON_FIELDS)
+            self._write_audited(
+                cursor,
+                Person,
+                AuditEntry.UPDATE,
+                f"""
+                UPDATE persons AS p
+                SET {assignments},
+                    full_name = {full_name},
+                    registration_address_id = s.reg_address_id,
+                    actual_address_id = s.act_address_id,
+                    updated_at = now()
+                FROM {s} AS s
+                WHERE p.id = s.person_id AND NOT s.is_new
+                RETURNING p.*
+                """,
+                before=f"SELECT * FROM persons WHERE id IN (SELECT person_id FROM {s} WHERE NOT is_new)",
+            )
+
+    def _write_audited(self, cursor, model, action: str, write: str, before: str | None = None) -> None:
+        """
+        write — INSERT / UPDATE ... RETURNING строк model; тем же запросом —
+        запись журнала на каждую строку. before — SELECT тех же строк до
+        изменения: все части запроса видят один снимок, поэтому в нём
+        старые значения. update без изменений в журнал не идёт.
+        """
+        ctes = [f"new_row AS ({write})"]
+        source = "new_row"
+        changes = _changes_sql(model, None)
+        where = ""
+        if before is not None:
+            ctes.insert(0, f"old_row AS ({before})")
+            source = "new_row JOIN old_row ON old_row.id = new_row.id"
+            changes = _changes_sql(model, "old_row")
+            where = "WHERE e.changes <> '{}'::jsonb"
+
+        cursor.execute(
+            f"""
+            WITH {", ".join(ctes)}
+            INSERT INTO audit_entries (object_type, object_id, action, changes, actor_id, created_at)
+            SELECT %s, new_row.id, %s, e.changes, %s, now()
+            FROM {source}
+            CROSS JOIN LATERAL (SELECT {changes} AS changes) AS e
+            {where}
+            """,
+            [model.audit_type, action, self.actor_id],
+        )
+
+
+def _changes_sql(model, old: str | None) -> str:
+    """
+    jsonb {поле: [было, стало]} строки new_row — как
+    AuditedModel.audit_changes(): только различающиеся поля;
+    old=None — создание («было» = null).
+    """
+    values = ", ".join(
+        f"('{field.name}', {'NULL::jsonb' if old is None else f'to_jsonb({old}.{field.column})'}, "
+        f"to_jsonb(new_row.{field.column}))"
+        for field in model._meta.concrete_fields
+        if not field.primary_key and field.name not in model.audit_exclude
+    )
+    return (
+        "(SELECT COALESCE(jsonb_object_agg(c.field, jsonb_build_array(c.was, c.became)), '{}'::jsonb) "
+        f"FROM (VALUES {values}) AS c(field, was, became) WHERE c.was IS DISTINCT FROM c.became)"
+    )
+
+
+def get_loader(name: str, upsert: bool = False):
+    """
+    name: "auto" | "copy" | "orm"; auto = COPY на PostgreSQL, иначе ORM.
+    """
+    if name == "auto":
+        name = "copy" if connection.vendor == "postgresql" else "orm"
+
+    if name == "copy":
+        if connection.vendor != "postgresql":
+            raise ValueError("COPY loader requires PostgreSQL")
+        return CopyLoader(upsert=upsert)
+
+    return OrmLoader(upsert=upsert)
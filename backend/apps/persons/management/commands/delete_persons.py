@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from apps.persons.bulk import BATCH_SIZE, bulk_delete_persons
+from apps.persons.filters import PersonFilterSerializer, filter_persons
+from apps.persons.models import Person
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete persons together with their addresses (same semantics as "
+        "DELETE /api/persons/{id}/) using set-based queries in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ids",
+            help="Comma-separated person ids.",
+        )
+        parser.add_argument(
+            "--ids-file",
+            help="File with one person id per line.",
+        )
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            metavar="KEY=VALUE",
+            help="Same filters as GET /api/persons/ (e.g. --filter sex=1 --filter city=Moscow).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count matching persons.",
+        )
+
+    def handle(self, *args, **options):
+        ids = self._read_ids(options)
+        params = {}
+        for item in options["filter"]:
+            key, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"Invalid --filter {item!r}, expected KEY=VALUE")
+            if key not in PersonFilterSerializer._declared_fields:
+                raise CommandError(f"Unknown filter {key!r}")
+            params[key] = value
+
+        if (ids is None) == (not params):
+            raise CommandError("Provide either --ids/--ids-file or --filter")
+
+        if params:
+            try:
+                querysets = [filter_persons(Person.objects.all(), params)]
+            except ValidationError as exc:
+                raise CommandError(f"Invalid filters: {exc.detail}")
+        else:
+            # id-список режем на батчи: лимит параметров в одном запросе
+            querysets = [
+                Person.objects.filter(pk__in=ids[start:start + BATCH_SIZE])
+                for start in range(0, len(ids), BATCH_SIZE)
+            ]
+
+        if options["dry_run"]:
+            total = sum(queryset.count() for queryset in querysets)
+            self.stdout.write(f"Would delete {total} persons")
+            return
+
+        persons = addresses = 0
+        with transaction.atomic():
+            for queryset in querysets:
+                deleted_persons, deleted_addresses = bulk_delete_persons(queryset)
+                persons += deleted_persons
+                addresses += deleted_addresses
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {persons} persons and {addresses} addresses"))
+
+    def _read_ids(self, options) -> list[int] | None:
+        raw = []
+        if options["ids"]:
+            raw += options["ids"].split(",")
+        if options["ids_file"]:
+            with open(options["ids_file"], encoding="utf-8") as stream:
+                raw += stream.read().split()
+
+        raw = [item.strip() for item in raw if item.strip()]
+        if not raw:
+            return None
+
+        try:
+            return sorted({int(item) for item in raw})
+        except ValueError as exc:
+            raise CommandError(f"Invalid id: {exc}")
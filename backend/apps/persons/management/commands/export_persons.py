@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from apps.persons.export import EXPORT_FORMATS
+from apps.persons.filters import filter_persons
+from apps.persons.models import Person
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream persons with both addresses flattened to CSV or NDJSON. "
+        "Memory use does not depend on table size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument(
+            "--output",
+            "-o",
+            help="Output file (default: stdout).",
+        )
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            metavar="KEY=VALUE",
+            help="Same filters as GET /api/persons/ (e.g. --filter sex=1 --filter city=Moscow).",
+        )
+
+    def handle(self, *args, **options):
+        params = {}
+        for item in options["filter"]:
+            key, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"Invalid --filter {item!r}, expected KEY=VALUE")
+            params[key] = value
+
+        try:
+            queryset = filter_persons(Person.objects.all(), params)
+        except ValidationError as exc:
+            raise CommandError(f"Invalid filters: {exc.detail}")
+
+        chunks = EXPORT_FORMATS[options["format"]][0](queryset)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as stream:
+                for chunk in chunks:
+                    stream.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
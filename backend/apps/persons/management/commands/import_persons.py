@@ -0,0 +1,147 @@
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.persons.importing import RowError, get_loader, parse_record, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Load persons with addresses from CSV/NDJSON in the export_persons layout. "
+        "PostgreSQL: COPY into a staging table + set-based merge; otherwise batched ORM inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="File format (default: by extension, .ndjson/.jsonl → ndjson, otherwise csv).",
+        )
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument(
+            "--loader",
+            choices=["auto", "copy", "orm"],
+            default="auto",
+            help="auto = copy on PostgreSQL, orm elsewhere.",
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Rows whose id matches an existing person update it; by default ids are ignored.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate every row and report errors without writing.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file (default: <path>.checkpoint).",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip rows already committed according to the checkpoint file.",
+        )
+        parser.add_argument(
+            "--max-reported-errors",
+            type=int,
+            default=50,
+            help="Print at most this many invalid rows (all are counted).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+
+        file_format = options["format"] or (
+            "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+        )
+        checkpoint_path = options["checkpoint"] or f"{path}.checkpoint"
+        dry_run = options["dry_run"]
+        self.max_reported_errors = options["max_reported_errors"]
+
+        start_after = 0
+        if options["resume"]:
+            start_after = self._read_checkpoint(checkpoint_path, path)
+            self.stdout.write(f"Resuming after record {start_after}")
+
+        try:
+            loader = None if dry_run else get_loader(options["loader"], upsert=options["upsert"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.errors = 0
+        loaded = 0
+        started = time.perf_counter()
+
+        with open(path, encoding="utf-8", newline="") as stream:
+            records = read_records(stream, file_format)
+            records = (item for item in records if item[0] > start_after)
+
+            while True:
+                batch = list(islice(records, options["batch_size"]))
+                if not batch:
+                    break
+
+                rows = self._parse(batch)
+
+                if not dry_run and rows:
+                    loader.load(rows)
+                    # чекпоинт только после COMMIT батча
+                    self._write_checkpoint(checkpoint_path, path, batch[-1][0])
+
+                loaded += len(rows)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{'validated' if dry_run else 'loaded'} {loaded} rows "
+                    f"(up to record {batch[-1][0]}), {loaded / elapsed:.0f} rows/s"
+                )
+
+        elapsed = time.perf_counter() - started
+        if not dry_run and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        summary = (
+            f"{'Validated' if dry_run else 'Imported'} {loaded} rows, "
+            f"{self.errors} invalid, in {elapsed:.2f}s ({loaded / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        self.stdout.write(self.style.SUCCESS(summary) if not self.errors else self.style.WARNING(summary))
+
+    # =========================
+    # INTERNAL
+    # =========================
+
+    def _parse(self, batch):
+        rows = []
+        for number, record in batch:
+            try:
+                rows.append(parse_record(number, record))
+            except RowError as exc:
+                self.errors += 1
+                if self.errors <= self.max_reported_errors:
+                    self.stderr.write(f"record {number}: {json.dumps(exc.errors, ensure_ascii=False)}")
+        return rows
+
+    def _read_checkpoint(self, checkpoint_path: str, path: str) -> int:
+        if not os.path.exists(checkpoint_path):
+            return 0
+
+        with open(checkpoint_path, encoding="utf-8") as stream:
+            checkpoint = json.load(stream)
+
+        if checkpoint.get("source") != os.path.abspath(path):
+            raise CommandError(f"Checkpoint {checkpoint_path} belongs to {checkpoint.get('source')}")
+
+        return checkpoint["position"]
+
+    def _write_checkpoint(self, checkpoint_path: str, path: str, position: int) -> None:
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as stream:
+            json.dump({"source": os.path.abspath(path), "position": position}, stream)
+        os.replace(tmp_path, checkpoint_path)
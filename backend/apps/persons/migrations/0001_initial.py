@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Address',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=255)),
+                ('city', models.CharField(max_length=255)),
+                ('address_line', models.CharField(blank=True, max_length=255, null=True)),
+                ('address_line_extra', models.CharField(blank=True, max_length=255, null=True)),
+                ('state', models.CharField(blank=True, max_length=255, null=True)),
+                ('zipcode', models.CharField(blank=True, max_length=32, null=True)),
+                ('area', models.CharField(blank=True, max_length=255, null=True)),
+                ('dadata', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'addresses',
+            },
+        ),
+        migrations.CreateModel(
+            name='Person',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('first_name', models.CharField(max_length=255)),
+                ('middle_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('full_name', models.CharField(max_length=512)),
+                ('photo', models.CharField(blank=True, max_length=512, null=True)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('sex', models.IntegerField(blank=True, null=True)),
+                ('birthday', models.DateField(blank=True, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('actual_address', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='actual_persons', to='persons.address')),
+                ('registration_address', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='registered_persons', to='persons.address')),
+            ],
+            options={
+                'db_table': 'persons',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['created_at', 'id'], name='addresses_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['created_at', 'id'], name='persons_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='person',
+            index=models.Index(fields=['full_name', 'id'], name='persons_full_name_id_idx'),
+        ),
+    ]
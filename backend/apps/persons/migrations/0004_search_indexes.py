@@ -0,0 +1,43 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# GIN-индексы pg_trgm для поиска (apps/persons/search.py).
+# В Meta.indexes их не объявить: SQLite (тесты) не понимает USING gin.
+TRIGRAM_INDEXES = [
+    ("persons_full_name_trgm_idx", "persons", "full_name"),
+    ("persons_email_trgm_idx", "persons", "email"),
+    ("addresses_line_trgm_idx", "addresses", "address_line"),
+    ("addresses_city_trgm_idx", "addresses", "city"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" '
+            f'ON "{table}" USING gin ("{column}" gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("persons", "0003_filter_indexes"),
+    ]
+
+    operations = [
+        # CREATE EXTENSION выполняется только на PostgreSQL
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 2000
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _batches(iterable):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def move_dadata(apps, schema_editor):
+    """
+    addresses.dadata → address_dadata.payload + производные столбцы
+    (та же логика, что Address.apply_dadata).
+    """
+    Address = apps.get_model("persons", "Address")
+    AddressDadata = apps.get_model("persons", "AddressDadata")
+
+    rows = (
+        Address.objects.exclude(dadata={})
+        .order_by("id")
+        .values_list("id", "dadata")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+
+    for batch in _batches(rows):
+        payloads = []
+        addresses = []
+
+        for pk, payload in batch:
+            if not payload:
+                continue
+
+            # старые строки: строка, список, "data": null — payload
+            # переносится как есть, производные столбцы пустые
+            data = payload if isinstance(payload, dict) else {}
+            if isinstance(data.get("data"), dict):
+                data = data["data"]
+
+            payloads.append(AddressDadata(address_id=pk, payload=payload))
+            addresses.append(
+                Address(
+                    id=pk,
+                    fias_id=data.get("fias_id") or None,
+                    kladr_id=data.get("kladr_id") or None,
+                    geo_lat=_to_float(data.get("geo_lat")),
+                    geo_lon=_to_float(data.get("geo_lon")),
+                )
+            )
+
+        AddressDadata.objects.bulk_create(payloads)
+        Address.objects.bulk_update(addresses, ["fias_id", "kladr_id", "geo_lat", "geo_lon"])
+
+
+def restore_dadata(apps, schema_editor):
+    Address = apps.get_model("persons", "Address")
+    AddressDadata = apps.get_model("persons", "AddressDadata")
+
+    rows = AddressDadata.objects.order_by("address_id").values_list(
+        "address_id", "payload"
+    ).iterator(chunk_size=BATCH_SIZE)
+
+    for batch in _batches(rows):
+        Address.objects.bulk_update(
+            [Address(id=pk, dadata=payload) for pk, payload in batch],
+            ["dadata"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0004_search_indexes'),
+    ]
+
+    operations = [
+        # related_name='+' до удаления addresses.dadata: иначе обратный
+        # accessor перекрывает одноимённое поле на исторической модели
+        migrations.CreateModel(
+            name='AddressDadata',
+            fields=[
+                ('address', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='persons.address')),
+                ('payload', models.JSONField(default=dict)),
+            ],
+            options={
+                'db_table': 'address_dadata',
+            },
+        ),
+        migrations.AddField(
+            model_name='address',
+            name='fias_id',
+            field=models.CharField(blank=True, max_length=36, null=True),
+        ),
+        migrations.AddField(
+            model_name='address',
+            name='geo_lat',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='address',
+            name='geo_lon',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='address',
+            name='kladr_id',
+            field=models.CharField(blank=True, max_length=19, null=True),
+        ),
+        migrations.RunPython(move_dadata, restore_dadata),
+        migrations.RemoveField(
+            model_name='address',
+            name='dadata',
+        ),
+        migrations.AlterField(
+            model_name='addressdadata',
+            name='address',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dadata', serialize=False, to='persons.address'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Поиск в админке — icontains, на PostgreSQL это
+# UPPER("col"::text) LIKE UPPER('%q%'): индекс должен быть на том же выражении.
+# Как и 0004, только для PostgreSQL.
+ADMIN_SEARCH_INDEXES = [
+    ("persons_full_name_upper_trgm_idx", "persons", "full_name"),
+    ("persons_email_upper_trgm_idx", "persons", "email"),
+    ("addresses_line_upper_trgm_idx", "addresses", "address_line"),
+    ("addresses_city_upper_trgm_idx", "addresses", "city"),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, table, column in ADMIN_SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" '
+            f'ON "{table}" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, _, _ in ADMIN_SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("persons", "0005_dadata_side_table"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
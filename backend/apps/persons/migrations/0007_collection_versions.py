@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def seed_persons_version(apps, schema_editor):
+    # строка есть сразу: кэш ответов работает и до первого изменения
+    CollectionVersion = apps.get_model("persons", "CollectionVersion")
+    CollectionVersion.objects.using(schema_editor.connection.alias).get_or_create(name="persons")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persons', '0006_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionVersion',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'collection_versions',
+            },
+        ),
+        migrations.RunPython(seed_persons_version, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,255 @@
-from django.db import models
+from functools import partial
 
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import timezone
 
-class Address(models.Model):
+from core.audit import WriteBehindBuffer, current_actor
+
+
+class CollectionVersion(models.Model):
+    """
+    Версия набора данных: растёт при каждом изменении персон / адресов.
+
+    Из неё строятся ETag и ключ кэша ответов (apps/persons/caching.py):
+    проверка свежести — один SELECT по первичному ключу.
+
+    bump() поднимает версию после COMMIT текущей транзакции, один раз
+    на транзакцию (вне транзакции — сразу). Строка версии блокируется
+    только на этот короткий UPDATE в autocommit, а не до COMMIT каждой
+    пишущей транзакции: параллельные записи не выстраиваются в очередь.
+    Читатель, успевший между COMMIT и bump(), кэширует новые данные под
+    старой версией — ключ сменится вместе с версией. Если процесс упадёт
+    в этом окне, версия отстанет до следующей записи (кэш — до TTL).
+    Поштучные save() / delete() моделей вызывают bump() сами,
+    set-based операции (bulk_save_persons, bulk_delete_persons,
+    импорт) — явно.
+
+    Карточки (retrieve) версией коллекции не валидируются: их ETag —
+    из pk и updated_at самой строки (VersionedResponseMixin.row_version).
+    """
+
+    PERSONS = "persons"
+
+    name = models.CharField(max_length=64, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "collection_versions"
+
+    @classmethod
+    def bump(cls, name: str = PERSONS) -> None:
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            cls._increment(name)
+            return
+
+        # name → (run_on_commit, callback) последней регистрации.
+        # run_on_commit только дополняется; новый список появляется после
+        # COMMIT, ROLLBACK или отката savepoint'а (тот мог унести и наш
+        # callback) — тогда, и только тогда, ищем callback заново
+        pending = connection.__dict__.setdefault("_collection_version_bumps", {})
+        hooks, callback = pending.get(name, (None, None))
+        if hooks is connection.run_on_commit:
+            return
+        if callback is None or not any(entry[1] is callback for entry in connection.run_on_commit):
+            callback = partial(cls._run_pending, pending, name)
+            # robust: данные уже закоммичены, ошибка bump() — в лог, не в ответ
+            transaction.on_commit(callback, robust=True)
+        pending[name] = (connection.run_on_commit, callback)
+
+    @classmethod
+    def _run_pending(cls, pending: dict, name: str) -> None:
+        pending.pop(name, None)
+        cls._increment(name)
+
+    @classmethod
+    def _increment(cls, name: str) -> None:
+        now = timezone.now()
+        updated = cls.objects.filter(name=name).update(version=models.F("version") + 1, updated_at=now)
+        if not updated:
+            cls.objects.bulk_create([cls(name=name, version=1, updated_at=now)], ignore_conflicts=True)
+
+    @classmethod
+    def current(cls, name: str = PERSONS) -> tuple[int, object]:
+        """
+        (version, updated_at); до первого изменения — (0, None).
+        """
+        return cls.objects.filter(name=name).values_list("version", "updated_at").first() or (0, None)
+
+    @classmethod
+    async def acurrent(cls, name: str = PERSONS) -> tuple[int, object]:
+        return await cls.objects.filter(name=name).values_list("version", "updated_at").afirst() or (0, None)
+
+
+# =========================
+# AUDIT
+# =========================
+
+class AuditEntry(models.Model):
+    """
+    Запись журнала изменений персоны или адреса.
+
+    changes — {поле: [было, стало]}; у create «было» — null, у delete
+    changes пустой. created_at — время изменения, а не записи в журнал.
+
+    Записи создаются при изменении (AuditedModel, bulk-функции), а в БД
+    попадают после COMMIT через audit_log (core.audit.WriteBehindBuffer):
+    откаченная транзакция записей не оставляет.
+    """
+
+    PERSON = "person"
+    ADDRESS = "address"
+
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    ACTIONS = [(CREATE, "create"), (UPDATE, "update"), (DELETE, "delete")]
+
+    object_type = models.CharField(max_length=16)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=16, choices=ACTIONS)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    # без FK-ограничения: запись журнала переживает удаление пользователя
+    # и не ломает пачку, если он удалён, пока запись ждёт в очереди
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        db_constraint=False,
+        blank=True,
+        null=True,
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "audit_entries"
+        indexes = [
+            # история объекта, новые первыми (keyset по id)
+            models.Index(fields=["object_type", "object_id", "id"], name="audit_object_id_idx"),
+        ]
+
+    @classmethod
+    def record(cls, entries: list["AuditEntry"]) -> None:
+        """
+        В очередь журнала после COMMIT текущей транзакции (сразу — вне её).
+        """
+        if entries:
+            transaction.on_commit(partial(audit_log.put_many, entries))
+
+    @classmethod
+    def for_person(cls, person: "Person"):
+        """
+        История персоны и её текущих адресов.
+        """
+        address_ids = [pk for pk in (person.registration_address_id, person.actual_address_id) if pk is not None]
+        return cls.objects.filter(
+            models.Q(object_type=cls.PERSON, object_id=person.pk)
+            | models.Q(object_type=cls.ADDRESS, object_id__in=address_ids)
+        )
+
+
+audit_log = WriteBehindBuffer(
+    "audit",
+    write=lambda entries: AuditEntry.objects.bulk_create(entries),
+    max_size=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    put_timeout=settings.AUDIT_ENQUEUE_TIMEOUT,
+)
+
+
+class AuditedModel(models.Model):
+    """
+    Изменения через save() / delete() — в журнал (AuditEntry).
+
+    Значения полей на момент чтения из БД запоминаются в from_db();
+    save() пишет в журнал только поля, которые отличаются от них.
+    Отложенные (defer / only) и не загруженные поля не сравниваются.
+    bulk_create / bulk_update / QuerySet.delete() мимо save() —
+    вызывающий пишет журнал сам (audit_entry() + AuditEntry.record()).
+    """
+
+    audit_type: str = ""
+    audit_exclude = frozenset({"created_at", "updated_at"})
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._audit_loaded = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+
+        changes = self.audit_changes(adding, kwargs.get("update_fields"))
+        if adding or changes:
+            AuditEntry.record([self.audit_entry(AuditEntry.CREATE if adding else AuditEntry.UPDATE, changes)])
+        self.audit_snapshot()
+
+    def delete(self, *args, **kwargs):
+        entry = self.audit_entry(AuditEntry.DELETE)
+        result = super().delete(*args, **kwargs)
+        AuditEntry.record([entry])
+        return result
+
+    def audit_changes(self, created: bool, update_fields=None) -> dict:
+        """
+        {поле: [было, стало]}; для нового объекта «было» — None.
+        """
+        loaded = getattr(self, "_audit_loaded", {})
+        changes = {}
+
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.name in self.audit_exclude:
+                continue
+            if update_fields is not None and field.name not in update_fields and field.attname not in update_fields:
+                continue
+            if field.attname not in self.__dict__:
+                continue  # отложенное поле
+
+            new = getattr(self, field.attname)
+            if created:
+                old = None
+            elif field.attname in loaded:
+                old = loaded[field.attname]
+            else:
+                continue
+
+            if old != new:
+                changes[field.name] = [old, new]
+
+        return changes
+
+    def audit_entry(self, action: str, changes: dict | None = None) -> AuditEntry:
+        actor = current_actor()
+        return AuditEntry(
+            object_type=self.audit_type,
+            object_id=self.pk,
+            action=action,
+            changes=changes or {},
+            actor_id=actor.pk if actor is not None else None,
+        )
+
+    def audit_snapshot(self) -> None:
+        """
+        Текущие значения — база для следующего сравнения.
+        """
+        self._audit_loaded = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+
+class Address(AuditedModel):
     country = models.CharField(max_length=255)
     city = models.CharField(max_length=255)
 
@@ -12,19 +260,125 @@ class Address(models.Model):
     zipcode = models.CharField(max_length=32, blank=True, null=True)
     area = models.CharField(max_length=255, blank=True, null=True)
 
-    dadata = models.JSONField(default=dict, blank=True)
+    # производные поля DaData; сырой ответ — в AddressDadata
+    fias_id = models.CharField(max_length=36, blank=True, null=True)
+    kladr_id = models.CharField(max_length=19, blank=True, null=True)
+    geo_lat = models.FloatField(blank=True, null=True)
+    geo_lon = models.FloatField(blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    audit_type = AuditEntry.ADDRESS
+
     class Meta:
         db_table = "addresses"
+        indexes = [
+            # keyset-пагинация (created_at, id)
+            models.Index(fields=["created_at", "id"], name="addresses_created_id_idx"),
+            # фильтр ?city= (по любому из адресов персоны)
+            models.Index(fields=["city"], name="addresses_city_idx"),
+        ]
+
+    def apply_dadata(self, payload: dict | None) -> None:
+        """
+        Заполняет производные поля из ответа DaData
+        (suggestion целиком или только его "data").
+
+        Старые строки бывают строкой, списком или с "data": null —
+        тогда производные поля пустые, а payload хранится как есть.
+        """
+        data = payload if isinstance(payload, dict) else {}
+        if isinstance(data.get("data"), dict):
+            data = data["data"]
+
+        self.fias_id = data.get("fias_id") or None
+        self.kladr_id = data.get("kladr_id") or None
+        self.geo_lat = _to_float(data.get("geo_lat"))
+        self.geo_lon = _to_float(data.get("geo_lon"))
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        CollectionVersion.bump()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        CollectionVersion.bump()
+        return result
 
     def __str__(self):
         return f"{self.country}, {self.city}"
 
 
-class Person(models.Model):
+class AddressDadata(models.Model):
+    """
+    Сырой ответ DaData по адресу.
+
+    Вынесен из addresses: payload весит килобайты и нужен редко,
+    строки addresses остаются узкими. Читается только по явному
+    ?fields= / ?expand= (LEFT JOIN), пишется через store().
+    """
+
+    address = models.OneToOneField(
+        Address,
+        related_name="dadata",
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    payload = models.JSONField(default=dict)
+
+    class Meta:
+        db_table = "address_dadata"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.touch_address()
+        CollectionVersion.bump()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.touch_address()
+        CollectionVersion.bump()
+        return result
+
+    def touch_address(self) -> None:
+        # ETag карточек адреса и персоны — из updated_at адреса
+        Address.objects.filter(pk=self.address_id).update(updated_at=timezone.now())
+
+    @classmethod
+    def store(cls, payloads: dict[int, dict | None]) -> None:
+        """
+        address_id → payload; пустой payload удаляет строку.
+        Не больше трёх запросов на любое число адресов.
+
+        updated_at адресов не трогает: store() вызывается вместе с
+        сохранением самих адресов (save_address, bulk_save_persons).
+        """
+        empty = [pk for pk, payload in payloads.items() if not payload]
+        if empty:
+            cls.objects.filter(address_id__in=empty).delete()
+
+        rows = [cls(address_id=pk, payload=payload) for pk, payload in payloads.items() if payload]
+        if rows:
+            cls.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["address"],
+                update_fields=["payload"],
+            )
+
+        if payloads:
+            CollectionVersion.bump()
+
+
+def _to_float(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Person(AuditedModel):
     last_name = models.CharField(max_length=255, blank=True, null=True)
     first_name = models.CharField(max_length=255)
     middle_name = models.CharField(max_length=255, blank=True, null=True)
@@ -58,14 +412,38 @@ class Person(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    audit_type = AuditEntry.PERSON
+    # full_name выводится из ФИО
+    audit_exclude = AuditedModel.audit_exclude | {"full_name"}
+
     class Meta:
         db_table = "persons"
+        indexes = [
+            # keyset-пагинация: (created_at, id) и (full_name, id)
+            models.Index(fields=["created_at", "id"], name="persons_created_id_idx"),
+            models.Index(fields=["full_name", "id"], name="persons_full_name_id_idx"),
+            models.Index(fields=["updated_at", "id"], name="persons_updated_id_idx"),
+            # фильтры (см. filters.PersonFilterBackend)
+            models.Index(fields=["sex", "birthday"], name="persons_sex_birthday_idx"),
+            models.Index(fields=["sex", "created_at", "id"], name="persons_sex_created_id_idx"),
+            models.Index(fields=["birthday"], name="persons_birthday_idx"),
+            models.Index(fields=["email"], name="persons_email_idx"),
+        ]
 
-    def save(self, *args, **kwargs):
-        self.full_name = " ".join(
+    def compose_full_name(self) -> str:
+        return " ".join(
             filter(None, [self.last_name, self.first_name, self.middle_name])
         )
+
+    def save(self, *args, **kwargs):
+        self.full_name = self.compose_full_name()
         super().save(*args, **kwargs)
+        CollectionVersion.bump()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        CollectionVersion.bump()
+        return result
 
     def __str__(self):
         return self.full_name
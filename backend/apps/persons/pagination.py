@@ -0,0 +1,187 @@
+import json
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset (cursor) пагинация по паре (<поле>, id).
+
+    Инварианты:
+    - Позиция курсора = значение поля сортировки + id последней строки,
+      поэтому страницы стабильны при конкурентных INSERT
+    - Никакого COUNT(*) и OFFSET: только WHERE по ключу + LIMIT
+    - Сортировка только по белому списку view.ordering_fields,
+      под каждую сортировку есть индекс (<поле>, id) в Meta.indexes
+    - Поля сортировки должны быть NOT NULL
+
+    Страница — экземпляры моделей или строки values() с полем
+    сортировки и id.
+
+    Используется:
+    - PersonViewSet
+    - AddressViewSet
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    ordering = "-created_at"
+    ordering_param = "ordering"
+    ordering_fields = ("created_at",)
+
+    # =========================
+    # ORDERING
+    # =========================
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Возвращает (поле, по убыванию) из ?ordering=.
+
+        Как и OrderingFilter в DRF: значение вне белого списка
+        молча заменяется сортировкой по умолчанию.
+        """
+        allowed = getattr(view, "ordering_fields", self.ordering_fields)
+        default = getattr(view, "ordering", self.ordering)
+
+        raw = request.query_params.get(self.ordering_param, "")
+        if raw.lstrip("-") not in allowed:
+            raw = default
+
+        return raw.lstrip("-"), raw.startswith("-")
+
+    # =========================
+    # PAGINATION
+    # =========================
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    def page_queryset(self, queryset, request, view=None):
+        """
+        Срез страницы (+1 строка) без выполнения; None — без пагинации.
+        Async-чтение выполняет его само и отдаёт строки в set_page().
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.field, self.descending = self.get_ordering(request, queryset, view)
+        self.model_field = self._get_model_field(queryset.model, self.field)
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor.reverse if self.cursor else False
+
+        # при движении назад сортировка переворачивается,
+        # страница потом разворачивается обратно
+        descending = self.descending != reverse
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(f"{prefix}{self.field}", f"{prefix}pk")
+
+        if self.cursor and self.cursor.position is not None:
+            value, pk = self._decode_position(self.cursor.position)
+            queryset = queryset.filter(self._keyset_filter(value, pk, descending))
+
+        # +1 строка, чтобы узнать, есть ли следующая страница, без COUNT(*)
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results: list) -> list:
+        reverse = self.cursor.reverse if self.cursor else False
+        has_following = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def _keyset_filter(self, value, pk, descending: bool) -> Q:
+        """
+        (field, id) < (value, pk) для DESC и (field, id) > (value, pk) для ASC.
+
+        Ведущее условие field <= value (>=) — диапазон по индексу (field, id),
+        второе отсекает строки с тем же значением и уже отданным id.
+        """
+        if descending:
+            return Q(**{f"{self.field}__lte": value}) & (
+                Q(**{f"{self.field}__lt": value}) | Q(pk__lt=pk)
+            )
+
+        return Q(**{f"{self.field}__gte": value}) & (
+            Q(**{f"{self.field}__gt": value}) | Q(pk__gt=pk)
+        )
+
+    # =========================
+    # LINKS
+    # =========================
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        position = self._encode_position(self.page[-1])
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+
+        position = self._encode_position(self.page[0])
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    # =========================
+    # INTERNAL
+    # =========================
+
+    def _get_model_field(self, model, name):
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _encode_position(self, instance) -> str:
+        if isinstance(instance, dict):
+            # строка values() (ProjectedReadMixin)
+            instance = SimpleNamespace(
+                **{self.model_field.attname: instance[self.field]},
+                pk=instance[self.model_field.model._meta.pk.attname],
+            )
+        return json.dumps(
+            [self.model_field.value_to_string(instance), instance.pk],
+            separators=(",", ":"),
+        )
+
+    def _decode_position(self, position: str):
+        try:
+            raw_value, pk = json.loads(position)
+            return self.model_field.to_python(raw_value), int(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class HistoryPagination(KeysetPagination):
+    """
+    История изменений (GET /api/persons/{id}/history/): новые первыми,
+    по id — порядок, в котором записи попали в журнал. ?ordering= нет.
+    """
+
+    page_size = 50
+    ordering = "-id"
+
+    def get_ordering(self, request, queryset, view):
+        return "id", True
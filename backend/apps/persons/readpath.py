@@ -0,0 +1,240 @@
+"""
+Быстрый путь чтения: list / retrieve без ModelSerializer.
+
+Сериализатор запроса (уже обрезанный ?fields= / ?expand=) один раз
+компилируется в план: для каждого отдаваемого поля — ключ ответа,
+столбец values() и преобразование значения. Строки читаются одним
+values()-запросом с JOIN'ами на оба адреса (и address_dadata, если он
+нужен), словари ответа собираются напрямую из строк — без экземпляров
+моделей и без to_representation() на каждое поле.
+
+Ответ совпадает с сериализатором байт в байт: строки и числа из БД
+отдаются как есть (их to_representation — тождество), даты и время —
+через to_representation() того же поля. Поле с projectable = True
+(например, RankField) — столбец или аннотация, через его
+to_representation(). Если в сериализаторе есть поле, для которого это
+не доказано (SerializerMethodField, source с точкой, другой тип поля),
+план не строится и запрос идёт обычным путём.
+"""
+
+from operator import itemgetter
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from core.metrics import measure
+
+from .serializers import DadataField
+
+# to_representation() этих полей для значения из БД — тождество
+# (str(str), int(int), bool у BooleanField); подклассы не считаются
+PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.EmailField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+)
+
+# DRF 3.17+: id (BigAutoField); строкой при COERCE_BIGINT_TO_STRING
+BIG_INTEGER_FIELD = getattr(serializers, "BigIntegerField", None)
+
+CONVERTED_FIELDS = (
+    serializers.FloatField,
+    serializers.DateField,
+)
+
+
+class ReadPlan:
+    """
+    columns — аргументы values(); render_row(row) / render(rows) — ответ.
+    """
+
+    def __init__(self, columns: list[str], steps: list[tuple]):
+        self.columns = columns
+        self.steps = steps
+
+    def render_row(self, row: dict) -> dict:
+        return {key: get(row) for key, get in self.steps}
+
+    def render(self, rows) -> list[dict]:
+        steps = self.steps
+        return [{key: get(row) for key, get in steps} for row in rows]
+
+
+def compile_read_plan(serializer, prefix: str = "") -> ReadPlan | None:
+    """
+    План для сериализатора (ModelSerializer со SparseFieldset) или None.
+    """
+    model = serializer.Meta.model
+    concrete = {f.name: f for f in model._meta.concrete_fields}
+
+    columns = [f"{prefix}{model._meta.pk.name}"]
+    steps = []
+
+    for field in serializer._readable_fields:
+        source = field.source
+        if len(field.source_attrs) != 1:
+            return None
+
+        column = f"{prefix}{source}"
+
+        if isinstance(field, serializers.BaseSerializer):
+            if getattr(field, "many", False) or source not in concrete or not concrete[source].many_to_one:
+                return None
+            nested = compile_read_plan(field, f"{column}__")
+            if nested is None:
+                return None
+            columns += [column, *nested.columns]
+            steps.append((field.field_name, _nested(column, nested)))
+
+        elif type(field) is DadataField:
+            # нет строки в address_dadata → {} (см. DadataField.get_attribute)
+            marker, payload = f"{column}__pk", f"{column}__payload"
+            columns += [marker, payload]
+            steps.append((field.field_name, _dadata(marker, payload)))
+
+        elif source in concrete and _passthrough(field):
+            columns.append(column)
+            steps.append((field.field_name, itemgetter(column)))
+
+        elif source in concrete and type(field) is serializers.DateTimeField:
+            columns.append(column)
+            steps.append((field.field_name, _datetime(column, field)))
+
+        elif (source in concrete and type(field) in CONVERTED_FIELDS) or getattr(field, "projectable", False):
+            columns.append(column)
+            steps.append((field.field_name, _converted(column, field.to_representation)))
+
+        else:
+            return None
+
+    return ReadPlan(list(dict.fromkeys(columns)), steps)
+
+
+def _passthrough(field) -> bool:
+    if type(field) in PASSTHROUGH_FIELDS:
+        return True
+    return (
+        BIG_INTEGER_FIELD is not None
+        and type(field) is BIG_INTEGER_FIELD
+        and not getattr(field, "coerce_to_string", api_settings.COERCE_BIGINT_TO_STRING)
+    )
+
+
+def _converted(column: str, convert):
+    def get(row):
+        value = row[column]
+        return None if value is None else convert(value)
+
+    return get
+
+
+def _datetime(column: str, field):
+    """
+    DateTimeField.to_representation() с часовым поясом, найденным один
+    раз на план: get_current_timezone() на каждое значение — половина
+    времени сериализатора на created_at / updated_at.
+    """
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return _converted(column, field.to_representation)
+
+    def get(row):
+        value = row[column]
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        try:
+            text = value.astimezone(field_timezone).isoformat()
+        except OverflowError:
+            return field.to_representation(value)
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+    return get
+
+
+def _nested(column: str, plan: ReadPlan):
+    def get(row):
+        return None if row[column] is None else plan.render_row(row)
+
+    return get
+
+
+def _dadata(marker: str, payload: str):
+    def get(row):
+        return row[payload] if row[marker] is not None else {}
+
+    return get
+
+
+# =========================
+# VIEW
+# =========================
+
+class ProjectedReadMixin:
+    """
+    list / retrieve по плану из compile_read_plan(); остальные экшены
+    (и запросы, для которых плана нет) — обычным путём.
+
+    Стоит после VersionedResponseMixin (кэш и ETag снаружи) и перед
+    SparseFieldsetMixin (план строится по обрезанному сериализатору).
+
+    Карточка с проверками объекта (has_object_permission у
+    permission_classes) идёт обычным путём: проверке нужен экземпляр
+    модели из get_object(), а не строка values().
+    """
+
+    projected_reads = True
+
+    def get_read_plan(self) -> ReadPlan | None:
+        if not self.projected_reads:
+            return None
+        if self.detail and self.checks_object_permissions():
+            return None
+        return compile_read_plan(self.get_serializer())
+
+    def checks_object_permissions(self) -> bool:
+        return any(
+            type(permission).has_object_permission is not BasePermission.has_object_permission
+            for permission in self.get_permissions()
+        )
+
+    def get_projected_queryset(self, plan: ReadPlan):
+        # ordering_fields — для курсора KeysetPagination
+        columns = plan.columns + [name for name in getattr(self, "ordering_fields", ()) if name not in plan.columns]
+        return self.filter_queryset(self.get_queryset()).values(*columns)
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_read_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_projected_queryset(plan)
+        page = self.paginate_queryset(queryset)
+
+        with measure("serializer"):
+            data = plan.render(queryset if page is None else page)
+
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        plan = self.get_read_plan()
+        if plan is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_projected_queryset(plan),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
+
+        with measure("serializer"):
+            data = plan.render_row(row)
+        return Response(data)
@@ -0,0 +1,110 @@
+from django.db import connection
+from django.db.models import Case, FloatField, Q, QuerySet, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from rest_framework import serializers
+
+from .models import Address
+
+# Вес совпадения по каждому полю: ФИО важнее email, email важнее адреса
+WEIGHTS = {
+    "full_name": 1.0,
+    "email": 0.8,
+    "address": 0.6,
+}
+
+
+class PersonSearchQuerySerializer(serializers.Serializer):
+    """
+    Query-параметры GET /api/persons/search/.
+    """
+
+    q = serializers.CharField(min_length=2, trim_whitespace=True)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+def search_persons(queryset: QuerySet, q: str) -> QuerySet:
+    """
+    Нечёткий поиск персон по ФИО, email и адресам (address_line / city).
+
+    Возвращает queryset с аннотацией rank (0..1), отсортированный
+    по убыванию rank. Срез (LIMIT) — на стороне вызывающего.
+
+    PostgreSQL: pg_trgm, операторы word similarity по GIN-индексам
+    (миграция 0004_search_indexes).
+    Остальные СУБД (SQLite в тестах): icontains + грубый ранг.
+    """
+    if connection.vendor == "postgresql":
+        queryset = _trigram_search(queryset, q)
+    else:
+        queryset = _fallback_search(queryset, q)
+
+    return queryset.order_by("-rank", "-id")
+
+
+# =========================
+# POSTGRESQL
+# =========================
+
+def _trigram_search(queryset: QuerySet, q: str) -> QuerySet:
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    # адреса ищутся отдельно: два IN-подзапроса по FK-индексам
+    # вместо OR по JOIN, который GIN-индекс использовать не может
+    address_ids = Address.objects.filter(
+        Q(address_line__trigram_word_similar=q) | Q(city__trigram_word_similar=q)
+    ).values("id")
+
+    candidates = queryset.filter(
+        Q(full_name__trigram_word_similar=q)
+        | Q(email__trigram_word_similar=q)
+        | Q(registration_address_id__in=address_ids)
+        | Q(actual_address_id__in=address_ids)
+    )
+
+    def similarity(field: str, weight: float):
+        return Coalesce(
+            TrigramWordSimilarity(q, field),
+            Value(0.0),
+            output_field=FloatField(),
+        ) * Value(weight)
+
+    return candidates.annotate(
+        rank=Greatest(
+            similarity("full_name", WEIGHTS["full_name"]),
+            similarity("email", WEIGHTS["email"]),
+            similarity("registration_address__address_line", WEIGHTS["address"]),
+            similarity("registration_address__city", WEIGHTS["address"]),
+            similarity("actual_address__address_line", WEIGHTS["address"]),
+            similarity("actual_address__city", WEIGHTS["address"]),
+        )
+    )
+
+
+# =========================
+# FALLBACK
+# =========================
+
+def _fallback_search(queryset: QuerySet, q: str) -> QuerySet:
+    """
+    Деградированный поиск без индексов: подстрока без учёта регистра.
+
+    Ранг ступенчатый: начало ФИО > вхождение в ФИО > email > адрес.
+    """
+    address = (
+        Q(registration_address__address_line__icontains=q)
+        | Q(registration_address__city__icontains=q)
+        | Q(actual_address__address_line__icontains=q)
+        | Q(actual_address__city__icontains=q)
+    )
+
+    return queryset.filter(
+        Q(full_name__icontains=q) | Q(email__icontains=q) | address
+    ).annotate(
+        rank=Case(
+            When(full_name__istartswith=q, then=Value(WEIGHTS["full_name"])),
+            When(full_name__icontains=q, then=Value(WEIGHTS["full_name"] * 0.9)),
+            When(email__icontains=q, then=Value(WEIGHTS["email"])),
+            default=Value(WEIGHTS["address"]),
+            output_field=FloatField(),
+        )
+    )
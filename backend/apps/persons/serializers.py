@@ -1,12 +1,55 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Person, Address
+
+from core.metrics import TimedSerializerMixin
+
+from .fieldsets import SparseFieldsetSerializerMixin
+from .filters import PersonFilterSerializer
+from .models import Person, Address, AddressDadata, AuditEntry
 
 
 # =========================
 # ADDRESS
 # =========================
 
-class AddressSerializer(serializers.ModelSerializer):
+class DadataField(serializers.JSONField):
+    """
+    Сырой ответ DaData: читается из AddressDadata (related_name="dadata"),
+    при записи отдаётся в validated_data как есть (см. save_address).
+    """
+
+    def get_attribute(self, instance):
+        side = getattr(instance, "dadata", None)  # нет строки → {}
+        return side.payload if side is not None else {}
+
+
+def save_address(instance: Address | None, addr_data: dict) -> Address:
+    """
+    create / update адреса. dadata: производные столбцы пишутся в addresses,
+    сырой payload — в address_dadata. Без dadata запросов столько же,
+    сколько у обычного save().
+    """
+    data = dict(addr_data)
+    has_dadata = "dadata" in data
+    payload = data.pop("dadata", None)
+
+    instance = instance or Address()
+    for key, value in data.items():
+        setattr(instance, key, value)
+
+    if has_dadata:
+        instance.apply_dadata(payload)
+
+    instance.save()
+
+    if has_dadata:
+        AddressDadata.store({instance.pk: payload})
+        instance._state.fields_cache.pop("dadata", None)
+
+    return instance
+
+
+class AddressSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     # 🔴 ЕДИНСТВЕННАЯ ВАЛИДАЦИЯ ВО ВСЕЙ СИСТЕМЕ
     address_line = serializers.CharField(
         required=True,
@@ -21,7 +64,8 @@ class AddressSerializer(serializers.ModelSerializer):
     state = serializers.CharField(required=False, allow_blank=True, allow_null=True)
     zipcode = serializers.CharField(required=False, allow_blank=True, allow_null=True)
     area = serializers.CharField(required=False, allow_blank=True, allow_null=True)
-    dadata = serializers.JSONField(required=False, allow_null=True)
+    # тяжёлый payload — только по ?fields= / ?expand=dadata
+    dadata = DadataField(required=False, allow_null=True, write_only=True)
 
     class Meta:
         model = Address
@@ -34,18 +78,40 @@ class AddressSerializer(serializers.ModelSerializer):
             "state",
             "zipcode",
             "area",
+            "fias_id",
+            "kladr_id",
+            "geo_lat",
+            "geo_lon",
             "dadata",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["id", "created_at", "updated_at"]
+        read_only_fields = [
+            "id",
+            "fias_id",
+            "kladr_id",
+            "geo_lat",
+            "geo_lon",
+            "created_at",
+            "updated_at",
+        ]
+
+        deferred_fields = ["dadata"]
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            return save_address(None, validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            return save_address(instance, validated_data)
 
 
 # =========================
 # PERSON
 # =========================
 
-class PersonSerializer(serializers.ModelSerializer):
+class PersonSerializer(TimedSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     # вложенные адреса
     registration_address = AddressSerializer(required=False, allow_null=True)
     actual_address = AddressSerializer(required=False, allow_null=True)
@@ -90,6 +156,10 @@ class PersonSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "full_name", "created_at", "updated_at"]
 
+        # список по умолчанию — только то, что рисует таблица;
+        # адреса и прочее — через ?expand= / ?fields=
+        list_fields = ["id", "full_name", "email", "birthday", "sex"]
+
     # =========================
     # INTERNAL
     # =========================
@@ -98,22 +168,19 @@ class PersonSerializer(serializers.ModelSerializer):
         """
         addr_data:
         - None → ничего не делаем
+        - Address → привязка существующего адреса (*_address_id)
         - dict → create / update
         """
         if addr_data is None:
             return None
 
+        if isinstance(addr_data, Address):
+            return addr_data
+
         if not isinstance(addr_data, dict):
             raise serializers.ValidationError("Address must be an object")
 
-        if instance is None:
-            return Address.objects.create(**addr_data)
-
-        for key, value in addr_data.items():
-            setattr(instance, key, value)
-
-        instance.save()
-        return instance
+        return save_address(instance, addr_data)
 
     # =========================
     # CREATE
@@ -123,16 +190,15 @@ class PersonSerializer(serializers.ModelSerializer):
         reg_addr_data = validated_data.pop("registration_address", None)
         act_addr_data = validated_data.pop("actual_address", None)
 
-        person = Person.objects.create(**validated_data)
-
-        if reg_addr_data is not None:
-            person.registration_address = self._upsert_address(reg_addr_data, None)
+        with transaction.atomic():
+            # адреса первыми: персона вставляется сразу с FK, без второго UPDATE
+            if reg_addr_data is not None:
+                validated_data["registration_address"] = self._upsert_address(reg_addr_data, None)
 
-        if act_addr_data is not None:
-            person.actual_address = self._upsert_address(act_addr_data, None)
+            if act_addr_data is not None:
+                validated_data["actual_address"] = self._upsert_address(act_addr_data, None)
 
-        person.save()
-        return person
+            return Person.objects.create(**validated_data)
 
     # =========================
     # UPDATE
@@ -146,18 +212,101 @@ class PersonSerializer(serializers.ModelSerializer):
         for key, value in validated_data.items():
             setattr(instance, key, value)
 
-        # адреса
-        if reg_addr_data is not None:
-            instance.registration_address = self._upsert_address(
-                reg_addr_data,
-                instance.registration_address,
-            )
+        with transaction.atomic():
+            # адреса
+            if reg_addr_data is not None:
+                instance.registration_address = self._upsert_address(
+                    reg_addr_data,
+                    instance.registration_address,
+                )
 
-        if act_addr_data is not None:
-            instance.actual_address = self._upsert_address(
-                act_addr_data,
-                instance.actual_address,
-            )
+            if act_addr_data is not None:
+                instance.actual_address = self._upsert_address(
+                    act_addr_data,
+                    instance.actual_address,
+                )
+
+            instance.save()
 
-        instance.save()
         return instance
+
+
+# =========================
+# SEARCH
+# =========================
+
+class RankField(serializers.FloatField):
+    """
+    Аннотация rank из search_persons(), 4 знака.
+    Представление зависит только от значения — поле годится для
+    values()-плана (см. apps/persons/readpath.py).
+    """
+
+    projectable = True
+
+    def to_representation(self, value):
+        return round(value, 4)
+
+
+class PersonSearchSerializer(PersonSerializer):
+    """
+    Результат поиска: персона + rank (0..1, чем больше — тем ближе).
+    """
+
+    rank = RankField(read_only=True)
+
+    class Meta(PersonSerializer.Meta):
+        fields = PersonSerializer.Meta.fields + ["rank"]
+        list_fields = PersonSerializer.Meta.list_fields + ["rank"]
+
+
+# =========================
+# BULK DELETE
+# =========================
+
+class PersonBulkDeleteSerializer(serializers.Serializer):
+    """
+    Тело POST /api/persons/bulk-delete/: ровно одно из
+    - ids: [1, 2, ...]
+    - filter: {"sex": 1, "city": "Omsk"} — фильтры списка (filter_persons)
+    """
+
+    # как у /bulk/; больше — через manage.py delete_persons
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=10_000,
+    )
+    filter = serializers.DictField(required=False, allow_empty=False)
+
+    def validate_filter(self, value):
+        known = set(value) & set(PersonFilterSerializer._declared_fields)
+        if not known:
+            # неизвестные ключи filter_persons игнорирует → удалилось бы всё
+            raise serializers.ValidationError(
+                f"Expected at least one of: {', '.join(PersonFilterSerializer._declared_fields)}."
+            )
+        return value
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Provide either ids or filter.")
+        return attrs
+
+
+# =========================
+# HISTORY
+# =========================
+
+class AuditEntrySerializer(serializers.ModelSerializer):
+    """
+    Запись журнала для GET /api/persons/{id}/history/.
+    """
+
+    actor_email = serializers.EmailField(source="actor.email", read_only=True, default=None)
+
+    class Meta:
+        model = AuditEntry
+        fields = ["id", "object_type", "object_id", "action", "changes", "actor", "actor_email", "created_at"]
+        read_only_fields = fields
@@ -0,0 +1,50 @@
+"""
+Плоское (табличное) представление персоны с двумя адресами.
+
+Одна строка = одна персона, адреса развёрнуты в столбцы с префиксом:
+reg_* — адрес регистрации, act_* — фактический адрес.
+Общий формат для export_persons / import_persons и /api/persons/export/.
+"""
+
+PERSON_COLUMNS = [
+    "id",
+    "last_name",
+    "first_name",
+    "middle_name",
+    "full_name",
+    "photo",
+    "email",
+    "sex",
+    "birthday",
+    "description",
+    "created_at",
+    "updated_at",
+]
+
+ADDRESS_COLUMNS = [
+    "country",
+    "city",
+    "address_line",
+    "address_line_extra",
+    "state",
+    "zipcode",
+    "area",
+]
+
+ADDRESS_PREFIXES = {
+    "registration_address": "reg_",
+    "actual_address": "act_",
+}
+
+COLUMNS = PERSON_COLUMNS + [
+    f"{prefix}{column}"
+    for prefix in ADDRESS_PREFIXES.values()
+    for column in ADDRESS_COLUMNS
+]
+
+# столбец → путь для QuerySet.values_list()
+VALUE_PATHS = PERSON_COLUMNS + [
+    f"{relation}__{column}"
+    for relation in ADDRESS_PREFIXES
+    for column in ADDRESS_COLUMNS
+]
@@ -1,3 +1,1498 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+import zoneinfo
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.http import StreamingHttpResponse
+from django.test import TransactionTestCase, override_settings
+from django.urls import include, path
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.audit import WriteBehindBuffer
+
+from .export import export_rows
+from .filters import filter_persons
+from .importing import ImportRow, last_per_id
+from .models import Address, AddressDadata, AuditEntry, CollectionVersion, Person
+from .readpath import ProjectedReadMixin, compile_read_plan
+from .serializers import AddressSerializer, PersonSearchSerializer, PersonSerializer
+from .urls import async_urlpatterns
+from .views import PersonViewSet
+
+User = get_user_model()
+
+# ROOT_URLCONF для AsyncReadTests: /api/persons/, /api/addresses/ — async-views
+urlpatterns = [
+    path("api/", include(async_urlpatterns)),
+]
+
+
+def make_address(**extra) -> Address:
+    data = {"country": "RU", "city": "Moscow", "address_line": "Tverskaya 1"}
+    data.update(extra)
+    return Address.objects.create(**data)
+
+
+def make_person(with_addresses: bool = True, **extra) -> Person:
+    data = {"first_name": "Ivan", "last_name": "Ivanov"}
+    data.update(extra)
+
+    if with_addresses:
+        data.setdefault("registration_address", make_address())
+        data.setdefault("actual_address", make_address(city="Kazan"))
+
+    return Person.objects.create(**data)
+
+
+def mute_audit_log(test) -> None:
+    """
+    Журнал на время теста — без фонового потока и без записи в БД
+    (AuditTrailTests подменяет его своим и пишет сам).
+    """
+    patcher = mock.patch("apps.persons.models.audit_log", WriteBehindBuffer("audit-muted", write=list, background=False))
+    patcher.start()
+    test.addCleanup(patcher.stop)
+
+
+class PersonsAPITestCase(APITestCase):
+    def setUp(self):
+        mute_audit_log(self)
+        # версия коллекции поднимается после COMMIT, а TestCase не коммитит:
+        # ответы, закэшированные в других тестах, совпали бы по ETag
+        caches["responses"].clear()
+        self.user = User.objects.create_user(email="operator@example.com", password="x")
+        self.client.force_authenticate(self.user)
+
+
+# =========================
+# QUERY COUNT (N+1)
+# =========================
+
+class PersonQueryCountTests(PersonsAPITestCase):
+    """
+    Число SQL-запросов не должно зависеть от числа строк.
+
+    Если тест упал — во view/serializer появился запрос на строку
+    (не хватает select_related / prefetch_related).
+    """
+
+    def count_list_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_list_is_constant_in_page_size(self):
+        # версия коллекции поднимается после COMMIT: без него второй
+        # список пришёл бы из кэша
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(2):
+                make_person()
+        small = self.count_list_queries("/api/persons/?page_size=50")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(20):
+                make_person()
+        large = self.count_list_queries("/api/persons/?page_size=50")
+
+        self.assertEqual(small, large)
+
+    def test_list_uses_single_select(self):
+        for _ in range(5):
+            make_person()
+
+        # версия коллекции (caching.py) + один SELECT данных
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/persons/?expand=registration_address,actual_address")
+
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertEqual(response.data["results"][0]["actual_address"]["city"], "Kazan")
+
+    def test_filtered_list_uses_single_select(self):
+        for _ in range(5):
+            make_person()
+
+        with self.assertNumQueries(2):
+            self.client.get("/api/persons/?city=Kazan&sex=1")
+
+    def test_retrieve_uses_single_select(self):
+        person = make_person()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/persons/{person.pk}/")
+
+        self.assertEqual(response.data["registration_address"]["city"], "Moscow")
+
+    def test_create_with_addresses(self):
+        payload = {
+            "first_name": "Petr",
+            "last_name": "Petrov",
+            "registration_address": {"address_line": "Lenina 1", "city": "Omsk"},
+            "actual_address": {"address_line": "Mira 2", "city": "Tomsk"},
+        }
+
+        # SAVEPOINT, INSERT ×2 address, INSERT person, RELEASE;
+        # после COMMIT — один UPDATE версии на всю транзакцию
+        with self.assertNumQueries(6), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/persons/", payload, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["actual_address"]["city"], "Tomsk")
+
+    def test_update_with_addresses(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            person = make_person()
+        payload = {
+            "first_name": "Petr",
+            "registration_address": {"address_line": "Lenina 1"},
+            "actual_address": {"address_line": "Mira 2"},
+        }
+
+        # SELECT person+адреса, SAVEPOINT, UPDATE ×2 address, UPDATE person,
+        # RELEASE; после COMMIT — один UPDATE версии
+        with self.assertNumQueries(7), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/persons/{person.pk}/", payload, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["actual_address"]["address_line"], "Mira 2")
+
+
+# =========================
+# PAGINATION
+# =========================
+
+class PersonPaginationTests(PersonsAPITestCase):
+    def collect_ids(self, url: str) -> list[int]:
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.data["results"]]
+            url = response.data["next"]
+        return ids
+
+    def test_walks_all_pages_without_duplicates(self):
+        persons = [make_person(with_addresses=False, first_name=f"P{i % 3}") for i in range(7)]
+
+        ids = self.collect_ids("/api/persons/?page_size=3")
+        self.assertEqual(ids, [p.pk for p in reversed(persons)])
+
+        ids = self.collect_ids("/api/persons/?page_size=3&ordering=full_name")
+        expected = sorted(persons, key=lambda p: (p.full_name, p.pk))
+        self.assertEqual(ids, [p.pk for p in expected])
+
+    def test_stable_under_concurrent_inserts(self):
+        for _ in range(4):
+            make_person(with_addresses=False)
+
+        first = self.client.get("/api/persons/?page_size=2&ordering=created_at")
+        make_person(with_addresses=False)
+        second = self.client.get(first.data["next"])
+
+        seen = [row["id"] for row in first.data["results"] + second.data["results"]]
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_previous_link_returns_previous_page(self):
+        for _ in range(5):
+            make_person(with_addresses=False)
+
+        first = self.client.get("/api/persons/?page_size=2")
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    def test_descending_ordering_with_ties(self):
+        persons = [make_person(with_addresses=False, first_name=f"P{i % 2}") for i in range(5)]
+
+        ids = self.collect_ids("/api/persons/?page_size=2&ordering=-full_name")
+        expected = sorted(persons, key=lambda p: (p.full_name, p.pk), reverse=True)
+        self.assertEqual(ids, [p.pk for p in expected])
+
+    def test_no_count_and_no_offset(self):
+        for _ in range(5):
+            make_person(with_addresses=False)
+        first = self.client.get("/api/persons/?page_size=2")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(first.data["next"])
+
+        self.assertEqual(len(response.data["results"]), 2)
+        sql = " ".join(query["sql"] for query in ctx.captured_queries).upper()
+        self.assertNotIn("COUNT(", sql)
+        self.assertNotIn("OFFSET", sql)
+        self.assertIn("LIMIT 3", sql)
+
+    def test_page_size_is_capped(self):
+        for _ in range(3):
+            make_person(with_addresses=False)
+
+        with mock.patch("apps.persons.pagination.KeysetPagination.max_page_size", 2):
+            response = self.client.get("/api/persons/?page_size=100")
+
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_addresses_are_paged(self):
+        addresses = [make_address(city=f"City {i}") for i in range(5)]
+
+        ids = self.collect_ids("/api/addresses/?page_size=2")
+        self.assertEqual(ids, [a.pk for a in reversed(addresses)])
+
+    def test_unknown_ordering_falls_back_to_default(self):
+        response = self.client.get("/api/persons/?ordering=description")
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/persons/?cursor=garbage")
+        self.assertEqual(response.status_code, 404)
+
+
+# =========================
+# FILTERS
+# =========================
+
+class PersonFilterTests(PersonsAPITestCase):
+    def filter_ids(self, query: str) -> set[int]:
+        response = self.client.get(f"/api/persons/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return {row["id"] for row in response.data["results"]}
+
+    def test_filters(self):
+        omsk = make_address(city="Omsk")
+        a = make_person(sex=1, birthday="1990-01-01", registration_address=omsk, actual_address=None)
+        b = make_person(sex=2, birthday="1995-06-01", email="b@example.com", actual_address=omsk)
+        c = make_person(sex=1, birthday="2000-12-31")
+
+        self.assertEqual(self.filter_ids("sex=1"), {a.pk, c.pk})
+        self.assertEqual(self.filter_ids("birthday=1990-01-01"), {a.pk})
+        self.assertEqual(self.filter_ids("birthday_after=1995-06-01"), {b.pk, c.pk})
+        self.assertEqual(self.filter_ids("birthday_before=1995-06-01&sex=1"), {a.pk})
+        self.assertEqual(self.filter_ids("email=b@example.com"), {b.pk})
+        self.assertEqual(self.filter_ids("city=Omsk"), {a.pk, b.pk})
+
+    def test_created_and_updated_ranges(self):
+        old = make_person(with_addresses=False)
+        new = make_person(with_addresses=False)
+        day = datetime.timedelta(days=1)
+        Person.objects.filter(pk=old.pk).update(created_at=timezone.now() - 10 * day, updated_at=timezone.now() - 5 * day)
+
+        since = (timezone.now() - 2 * day).date().isoformat()
+        self.assertEqual(self.filter_ids(f"created_after={since}"), {new.pk})
+        self.assertEqual(self.filter_ids(f"created_before={since}"), {old.pk})
+        self.assertEqual(self.filter_ids(f"updated_before={since}"), {old.pk})
+        self.assertEqual(self.filter_ids(f"updated_after={since}&ordering=updated_at"), {new.pk})
+
+    def test_city_matches_either_address_once(self):
+        omsk = make_address(city="Omsk")
+        both = make_person(registration_address=omsk, actual_address=omsk)
+        make_person()
+
+        response = self.client.get("/api/persons/?city=Omsk")
+        self.assertEqual([row["id"] for row in response.data["results"]], [both.pk])
+
+        # два IN-подзапроса, без JOIN адресов
+        sql = str(filter_persons(Person.objects.all(), {"city": "Omsk"}).query).upper()
+        self.assertEqual(sql.count(" IN (SELECT"), 2)
+        self.assertNotIn("JOIN", sql)
+
+    def test_unknown_params_are_ignored(self):
+        person = make_person(sex=1)
+        self.assertEqual(self.filter_ids("sex=1&colour=red"), {person.pk})
+
+    def test_invalid_value(self):
+        response = self.client.get("/api/persons/?birthday=yesterday")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("birthday", response.data)
+
+
+# =========================
+# SEARCH
+# =========================
+
+class PersonSearchTests(PersonsAPITestCase):
+    def search(self, query: str):
+        return self.client.get(f"/api/persons/search/?{query}")
+
+    def test_ranks_name_above_email_and_address(self):
+        by_address = make_person(first_name="Anna", last_name="Smirnova",
+                                 actual_address=make_address(address_line="Petrovka 38"))
+        by_email = make_person(first_name="Oleg", last_name="Sidorov", email="petrov@example.com")
+        by_name = make_person(first_name="Ivan", last_name="Petrov")
+        make_person(first_name="Maria", last_name="Kuznetsova")
+
+        response = self.search("q=petrov")
+
+        self.assertEqual(response.status_code, 200)
+        ids = [row["id"] for row in response.data["results"]]
+        self.assertEqual(ids, [by_name.pk, by_email.pk, by_address.pk])
+
+        ranks = [row["rank"] for row in response.data["results"]]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_limit_and_list_filters(self):
+        for sex in (1, 1, 2):
+            make_person(last_name="Petrov", sex=sex)
+
+        self.assertEqual(len(self.search("q=petrov&limit=2").data["results"]), 2)
+        self.assertEqual(len(self.search("q=petrov&sex=2").data["results"]), 1)
+
+    def test_query_validation(self):
+        self.assertEqual(self.search("q=p").status_code, 400)
+        self.assertEqual(self.search("q=petrov&limit=1000").status_code, 400)
+
+
+# =========================
+# SPARSE FIELDSETS
+# =========================
+
+class PersonFieldsetTests(PersonsAPITestCase):
+    def capture_sql(self, url: str):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, " ".join(q["sql"] for q in ctx.captured_queries)
+
+    def test_list_is_compact_by_default(self):
+        make_person(description="long text")
+
+        response, sql = self.capture_sql("/api/persons/")
+
+        row = response.data["results"][0]
+        self.assertEqual(set(row), {"id", "full_name", "email", "birthday", "sex"})
+        self.assertNotIn("description", sql)
+        self.assertNotIn("dadata", sql)
+        self.assertNotIn("JOIN", sql)
+
+    def test_expand_adds_addresses(self):
+        make_person()
+
+        response, sql = self.capture_sql("/api/persons/?expand=actual_address")
+
+        row = response.data["results"][0]
+        self.assertEqual(row["actual_address"]["city"], "Kazan")
+        self.assertNotIn("registration_address", row)
+        self.assertEqual(sql.count("JOIN"), 1)
+
+    def test_fields_selects_exact_set(self):
+        person = make_person()
+
+        response, sql = self.capture_sql(f"/api/persons/{person.pk}/?fields=id,last_name,unknown")
+
+        self.assertEqual(response.data, {"id": person.pk, "last_name": "Ivanov"})
+        self.assertNotIn("description", sql)
+
+    def test_retrieve_is_full_by_default(self):
+        person = make_person()
+
+        response, sql = self.capture_sql(f"/api/persons/{person.pk}/")
+
+        self.assertIn("description", response.data)
+        self.assertIn("fias_id", response.data["registration_address"])
+        self.assertNotIn("dadata", response.data["registration_address"])
+        self.assertNotIn("address_dadata", sql)
+
+    def test_write_response_ignores_fields(self):
+        person = make_person()
+
+        response = self.client.patch(
+            f"/api/persons/{person.pk}/?fields=id", {"first_name": "Petr"}, format="json"
+        )
+
+        self.assertEqual(response.data["first_name"], "Petr")
+        self.assertIn("actual_address", response.data)
+
+    def test_address_list_expands_dadata(self):
+        AddressDadata.objects.create(address=make_address(), payload={"fias_id": "x"})
+        make_address()
+
+        _, sql = self.capture_sql("/api/addresses/")
+        self.assertNotIn("address_dadata", sql)
+
+        with self.assertNumQueries(2):
+            response, _ = self.capture_sql("/api/addresses/?expand=dadata")
+        payloads = sorted(row["dadata"] != {} for row in response.data["results"])
+        self.assertEqual(payloads, [False, True])
+
+    def test_nested_expand_joins_dadata(self):
+        person = make_person()
+        AddressDadata.objects.create(address=person.actual_address, payload={"fias_id": "x"})
+
+        with self.assertNumQueries(2):
+            response, _ = self.capture_sql(
+                f"/api/persons/{person.pk}/?expand=actual_address.dadata"
+            )
+
+        self.assertEqual(response.data["actual_address"]["dadata"], {"fias_id": "x"})
+        self.assertNotIn("dadata", response.data["registration_address"])
+
+
+# =========================
+# PROJECTED READS (values() вместо сериализатора)
+# =========================
+
+@override_settings(PERSONS_RESPONSE_CACHE_TTL=0)
+class ProjectedReadContractTests(PersonsAPITestCase):
+    """
+    Быстрый путь list / retrieve отдаёт те же байты, что сериализаторы.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.person = make_person(
+            middle_name="Петрович",
+            email="ivan@example.com",
+            sex=1,
+            birthday=datetime.date(1990, 5, 17),
+            photo="photos/1.jpg",
+            description="строка\u2028с \"кавычками\"",
+        )
+        address = self.person.registration_address
+        address.apply_dadata({"data": {"fias_id": "f1", "kladr_id": "77", "geo_lat": "55.75", "geo_lon": "37.61"}})
+        address.save()
+        AddressDadata.store({address.pk: {"value": "г Москва", "data": {"geo_lat": "55.75", "geo_lon": "37.61"}}})
+
+        make_person(with_addresses=False, first_name="Анна", last_name=None)
+        make_person(actual_address=None, first_name="Олег")
+
+    def fetch(self, url: str, projected: bool) -> bytes:
+        with mock.patch.object(ProjectedReadMixin, "projected_reads", projected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.content
+
+    def test_same_json_as_serializers(self):
+        person, address = self.person.pk, self.person.registration_address_id
+        urls = [
+            "/api/persons/",
+            "/api/persons/?expand=registration_address,actual_address,description",
+            "/api/persons/?expand=registration_address.dadata,actual_address.dadata",
+            "/api/persons/?fields=id,actual_address,updated_at&ordering=full_name",
+            "/api/persons/?page_size=1&ordering=-full_name",
+            f"/api/persons/{person}/",
+            f"/api/persons/{person}/?expand=registration_address.dadata",
+            "/api/addresses/",
+            "/api/addresses/?expand=dadata",
+            f"/api/addresses/{address}/?fields=id,geo_lat,dadata",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.fetch(url, True), self.fetch(url, False))
+
+    def test_active_timezone(self):
+        url = "/api/persons/?expand=registration_address"
+        with timezone.override(zoneinfo.ZoneInfo("Europe/Moscow")):
+            content = self.fetch(url, True)
+            self.assertEqual(content, self.fetch(url, False))
+        self.assertIn(b"+03:00", content)
+
+    def test_next_page_cursor(self):
+        first = json.loads(self.fetch("/api/persons/?page_size=2", True))
+
+        self.assertEqual(self.fetch(first["next"], True), self.fetch(first["next"], False))
+
+    def test_serializer_is_not_used(self):
+        with mock.patch.object(PersonSerializer, "to_representation", side_effect=AssertionError):
+            self.assertEqual(self.client.get("/api/persons/?expand=registration_address").status_code, 200)
+            self.assertEqual(self.client.get(f"/api/persons/{self.person.pk}/").status_code, 200)
+
+    def test_missing_person_is_404(self):
+        self.assertEqual(self.client.get("/api/persons/999999/").status_code, 404)
+        self.assertEqual(self.client.get("/api/persons/abc/").status_code, 404)
+
+    def test_plan_only_for_known_fields(self):
+        class WithMethodField(PersonSerializer):
+            age = serializers.SerializerMethodField()
+
+            class Meta(PersonSerializer.Meta):
+                fields = PersonSerializer.Meta.fields + ["age"]
+
+            def get_age(self, obj):
+                return None
+
+        self.assertIsNotNone(compile_read_plan(PersonSerializer()))
+        self.assertIsNotNone(compile_read_plan(AddressSerializer(expand=["dadata"])))
+        self.assertIsNotNone(compile_read_plan(PersonSearchSerializer()))
+        self.assertIsNone(compile_read_plan(WithMethodField()))
+
+
+# =========================
+# ASYNC READS
+# =========================
+
+class AsyncReadTests(PersonsAPITestCase):
+    """
+    Async list / retrieve / search отдают то же, что DRF-viewset.
+    """
+
+    def setUp(self):
+        super().setUp()
+        caches["responses"].clear()
+        self.person = make_person(email="petrov@example.com", last_name="Petrov", birthday=datetime.date(1990, 5, 17))
+        address = self.person.registration_address
+        AddressDadata.store({address.pk: {"value": "г Москва", "data": {"geo_lat": "55.75"}}})
+        for number in range(3):
+            make_person(first_name=f"Anna{number}", actual_address=None)
+
+        self.async_client.cookies[settings.JWT_ACCESS_COOKIE] = str(AccessToken.for_user(self.user))
+
+    async def fetch(self, url: str, **headers) -> tuple:
+        with override_settings(ROOT_URLCONF=__name__):
+            response = await self.async_client.get(url, headers=headers)
+        if response.streaming:
+            return response, b"".join([part async for part in response.streaming_content])
+        return response, response.content
+
+    async def assert_same(self, url: str, **headers):
+        expected = await sync_to_async(self.client.get)(url, headers=headers)
+        caches["responses"].clear()
+        response, content = await self.fetch(url, **headers)
+
+        self.assertEqual(response.status_code, expected.status_code, url)
+        self.assertEqual(content, expected.content, url)
+        for header in ("Content-Type", "Allow", "Vary", "ETag", "Last-Modified", "Cache-Control", "WWW-Authenticate"):
+            self.assertEqual(response.get(header), expected.get(header), f"{url}: {header}")
+        return response, content
+
+    async def test_same_responses(self):
+        person, address = self.person.pk, self.person.registration_address_id
+        urls = [
+            "/api/persons/",
+            "/api/persons/?expand=registration_address.dadata,actual_address&ordering=full_name",
+            "/api/persons/?page_size=2&fields=id,full_name,birthday",
+            "/api/persons/?cursor=garbage",
+            f"/api/persons/{person}/",
+            "/api/persons/999999/",
+            "/api/persons/abc/",
+            "/api/persons/search/?q=petrov",
+            "/api/persons/search/?q=p",
+            "/api/addresses/?expand=dadata",
+            f"/api/addresses/{address}/",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                await self.assert_same(url)
+
+    async def test_next_page_and_streamed_body(self):
+        response, content = await self.assert_same("/api/persons/?page_size=2")
+        self.assertIsInstance(response, StreamingHttpResponse)
+
+        await self.assert_same(json.loads(content)["next"])
+
+    async def test_not_modified_and_cache(self):
+        first, content = await self.fetch("/api/persons/")
+        not_modified, _ = await self.fetch("/api/persons/", if_none_match=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+        with mock.patch.object(ProjectedReadMixin, "get_projected_queryset", side_effect=AssertionError):
+            cached, cached_content = await self.fetch("/api/persons/")
+        self.assertEqual(cached_content, content)
+
+    async def test_unauthenticated(self):
+        await sync_to_async(self.client.force_authenticate)(None)
+        self.async_client.cookies.clear()
+
+        await self.assert_same("/api/persons/")
+
+        self.client.cookies[settings.JWT_ACCESS_COOKIE] = "garbage"
+        self.async_client.cookies[settings.JWT_ACCESS_COOKIE] = "garbage"
+        await self.assert_same(f"/api/persons/{self.person.pk}/")
+
+    async def test_negotiation_matches_drf(self):
+        for accept in ["application/json; indent=4", "text/csv", "application/*"]:
+            with self.subTest(accept=accept):
+                await self.assert_same(f"/api/persons/{self.person.pk}/", accept=accept)
+
+    async def test_object_permissions_use_instance(self):
+        class OwnAddressesOnly(IsAuthenticated):
+            def has_object_permission(self, request, view, obj):
+                assert isinstance(obj, Person), obj
+                return obj.actual_address_id is not None
+
+        other = await Person.objects.filter(actual_address=None).afirst()
+        with mock.patch.object(PersonViewSet, "permission_classes", [OwnAddressesOnly]):
+            for url in [f"/api/persons/{self.person.pk}/", f"/api/persons/{other.pk}/"]:
+                with self.subTest(url=url):
+                    await self.assert_same(url)
+            response, _ = await self.fetch(f"/api/persons/{other.pk}/")
+            self.assertEqual(response.status_code, 403)
+
+            # список проверок объекта не делает — остаётся async (потоковым)
+            response, _ = await self.fetch("/api/persons/")
+            self.assertIsInstance(response, StreamingHttpResponse)
+
+    async def test_other_requests_go_to_viewset(self):
+        with override_settings(ROOT_URLCONF=__name__):
+            response = await self.async_client.patch(
+                f"/api/persons/{self.person.pk}/", {"first_name": "Petr"}, content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+
+        browsable, _ = await self.fetch("/api/persons/", accept="text/html")
+        self.assertEqual(browsable["Content-Type"], "text/html; charset=utf-8")
+
+
+# =========================
+# CONDITIONAL GET / RESPONSE CACHE
+# =========================
+
+class PersonResponseCacheTests(PersonsAPITestCase):
+    url = "/api/persons/?expand=registration_address"
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.person = make_person()
+
+    def get(self, url=None, **headers):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url or self.url, **headers)
+        return response, len(ctx.captured_queries)
+
+    def test_repeated_read_costs_one_version_check(self):
+        first, _ = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("no-cache", first["Cache-Control"])
+        self.assertIn("Last-Modified", first)
+
+        second, queries = self.get()
+
+        self.assertEqual(queries, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_not_modified(self):
+        etag = self.get()[0]["ETag"]
+
+        response, queries = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(queries, 1)
+
+        detail = f"/api/persons/{self.person.pk}/"
+        modified = self.get(detail)[0]["Last-Modified"]
+        self.assertEqual(self.get(detail, HTTP_IF_MODIFIED_SINCE=modified)[0].status_code, 304)
+
+    def test_query_string_is_part_of_etag(self):
+        self.assertNotEqual(self.get()[0]["ETag"], self.get("/api/persons/")[0]["ETag"])
+
+    def test_writes_change_version(self):
+        def etag_after(write):
+            before = self.get()[0]["ETag"]
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            response, _ = self.get(HTTP_IF_NONE_MATCH=before)
+            self.assertEqual(response.status_code, 200)
+            return response
+
+        response = etag_after(lambda: self.client.patch(
+            f"/api/persons/{self.person.pk}/", {"first_name": "Petr"}, format="json"
+        ))
+        self.assertEqual(response.data["results"][0]["full_name"], "Ivanov Petr")
+
+        address = self.person.registration_address
+        response = etag_after(lambda: self.client.patch(
+            f"/api/addresses/{address.pk}/", {"city": "Omsk"}, format="json"
+        ))
+        self.assertEqual(response.data["results"][0]["registration_address"]["city"], "Omsk")
+
+        etag_after(lambda: self.client.post("/api/persons/bulk/", [{"first_name": "Anna"}], format="json"))
+
+        response = etag_after(lambda: self.client.post(
+            "/api/persons/bulk-delete/", {"ids": [self.person.pk]}, format="json"
+        ))
+        self.assertEqual([row["full_name"] for row in response.data["results"]], ["Anna"])
+
+    @override_settings(PERSONS_RESPONSE_CACHE_TTL=0)
+    def test_cache_disabled_still_validates(self):
+        first, _ = self.get()
+        _, queries = self.get()
+
+        self.assertEqual(queries, 2)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=first["ETag"])[0].status_code, 304)
+
+    def test_html_is_not_shared_between_users(self):
+        bob = User.objects.create_user(email="bob@example.com", password="x")
+
+        alice_page, _ = self.get("/api/persons/", HTTP_ACCEPT="text/html")
+        self.assertIn(b"operator@example.com", alice_page.content)
+
+        self.client.force_authenticate(bob)
+        bob_page, _ = self.get("/api/persons/", HTTP_ACCEPT="text/html")
+
+        self.assertIn(b"bob@example.com", bob_page.content)
+        self.assertNotIn(b"operator@example.com", bob_page.content)
+        for page in (alice_page, bob_page):
+            self.assertNotIn("ETag", page)
+            self.assertNotIn("Last-Modified", page)
+
+        # JSON от пользователя не зависит: общий кэш и ETag, но с Vary
+        bob_json, _ = self.get()
+        self.client.force_authenticate(self.user)
+        alice_json, queries = self.get()
+        self.assertEqual(queries, 1)
+        self.assertEqual(alice_json["ETag"], bob_json["ETag"])
+        for header in ("Cookie", "Authorization"):
+            self.assertIn(header, alice_json["Vary"])
+
+    def test_detail_etag_is_per_row(self):
+        detail = f"/api/persons/{self.person.pk}/"
+        etag = self.get(detail)[0]["ETag"]
+
+        # чужие записи поднимают версию коллекции, но не ETag карточки
+        with self.captureOnCommitCallbacks(execute=True):
+            make_person(first_name="Anna")
+        response, queries = self.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(queries, 1)
+
+        address = self.person.actual_address
+        self.client.patch(f"/api/addresses/{address.pk}/", {"city": "Omsk"}, format="json")
+        response, _ = self.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["actual_address"]["city"], "Omsk")
+
+        etag = response["ETag"]
+        self.client.delete(f"/api/addresses/{address.pk}/")
+        response, _ = self.get(detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data["actual_address"])
+
+        self.client.delete(detail)
+        self.assertEqual(self.get(detail, HTTP_IF_NONE_MATCH=etag)[0].status_code, 404)
+
+
+class CollectionVersionTests(TransactionTestCase):
+    """
+    bump() — один UPDATE версии после COMMIT, сколько бы записей ни было
+    в транзакции; откат версию не трогает.
+    """
+
+    def setUp(self):
+        mute_audit_log(self)
+
+    def version(self) -> int:
+        return CollectionVersion.current()[0]
+
+    def test_outside_transaction_bumps_at_once(self):
+        before = self.version()
+        make_address()
+        self.assertEqual(self.version(), before + 1)
+
+    def test_once_per_transaction_after_commit(self):
+        before = self.version()
+        with CaptureQueriesContext(connection) as ctx:
+            with transaction.atomic():
+                make_person()
+                CollectionVersion.bump()
+                self.assertEqual(self.version(), before)
+
+        self.assertEqual(self.version(), before + 1)
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "collection_versions"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_rollbacks(self):
+        before = self.version()
+        with transaction.atomic():
+            make_address()
+            try:
+                with transaction.atomic():
+                    make_address()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.version(), before + 1)
+
+        # bump() был только в откаченном savepoint'е — регистрируется заново
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    make_address()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            make_address()
+        self.assertEqual(self.version(), before + 2)
+
+        try:
+            with transaction.atomic():
+                make_address()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(self.version(), before + 2)
+
+
+# =========================
+# DADATA
+# =========================
+
+class AddressDadataTests(PersonsAPITestCase):
+    suggestion = {
+        "value": "г Москва, ул Тверская, д 1",
+        "data": {"fias_id": "abc", "kladr_id": "7700000000000", "geo_lat": "55.75", "geo_lon": "37.61"},
+    }
+
+    def test_write_splits_payload_and_derived_columns(self):
+        response = self.client.post(
+            "/api/addresses/",
+            {"country": "RU", "city": "Moscow", "address_line": "Tverskaya 1", "dadata": self.suggestion},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("dadata", response.data)
+        self.assertEqual(response.data["fias_id"], "abc")
+        self.assertEqual(response.data["geo_lat"], 55.75)
+        address = Address.objects.get(pk=response.data["id"])
+        self.assertEqual(address.dadata.payload, self.suggestion)
+
+        self.client.patch(f"/api/addresses/{address.pk}/", {"dadata": None}, format="json")
+        address.refresh_from_db()
+        self.assertIsNone(address.fias_id)
+        self.assertFalse(AddressDadata.objects.exists())
+
+    def test_nested_person_write(self):
+        person = make_person()
+
+        self.client.patch(
+            f"/api/persons/{person.pk}/",
+            {"actual_address": {"address_line": "Lenina 5", "dadata": self.suggestion["data"]}},
+            format="json",
+        )
+
+        address = Address.objects.get(pk=person.actual_address_id)
+        self.assertEqual(address.kladr_id, "7700000000000")
+        self.assertEqual(address.dadata.payload, self.suggestion["data"])
+
+    def test_bulk_write(self):
+        response = self.client.post(
+            "/api/persons/bulk/",
+            [{"first_name": "Anna", "registration_address": {"address_line": "x", "dadata": self.suggestion}}],
+            format="json",
+        )
+
+        self.assertEqual(response.data["created"], 1)
+        address = Person.objects.get().registration_address
+        self.assertEqual(address.geo_lon, 37.61)
+        self.assertEqual(address.dadata.payload, self.suggestion)
+
+    def test_malformed_legacy_payloads(self):
+        for payload in ("г Москва", ["a", "b"], {"value": "x", "data": None}, {"data": "x"}):
+            with self.subTest(payload=payload):
+                response = self.client.post(
+                    "/api/addresses/",
+                    {"country": "RU", "city": "Moscow", "address_line": "Tverskaya 1", "dadata": payload},
+                    format="json",
+                )
+
+                self.assertEqual(response.status_code, 201)
+                address = Address.objects.get(pk=response.data["id"])
+                self.assertIsNone(address.fias_id)
+                self.assertIsNone(address.geo_lat)
+                self.assertEqual(address.dadata.payload, payload)
+
+
+class DadataMigrationTests(TransactionTestCase):
+    """
+    0005: addresses.dadata → address_dadata на старых строках любого вида.
+    """
+
+    before = [("persons", "0004_search_indexes")]
+    after = [("persons", "0005_dadata_side_table")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        call_command("migrate", "persons", verbosity=0)
+
+    def test_backfill_survives_malformed_payloads(self):
+        Address = self.migrate(self.before).get_model("persons", "Address")
+        payloads = [
+            "г Москва",
+            ["a", "b"],
+            {"value": "x", "data": None},
+            {"data": {"fias_id": "abc", "geo_lat": "55.75"}},
+            {},
+        ]
+        ids = [Address.objects.create(country="RU", city="Moscow", dadata=payload).pk for payload in payloads]
+
+        apps = self.migrate(self.after)
+
+        Address = apps.get_model("persons", "Address")
+        AddressDadata = apps.get_model("persons", "AddressDadata")
+        stored = dict(AddressDadata.objects.values_list("address_id", "payload"))
+        self.assertEqual(stored, {pk: payload for pk, payload in zip(ids, payloads) if payload})
+        derived = dict(Address.objects.values_list("id", "fias_id"))
+        self.assertEqual([derived[pk] for pk in ids], [None, None, None, "abc", None])
+
+
+# =========================
+# BULK
+# =========================
+
+class PersonBulkTests(PersonsAPITestCase):
+    url = "/api/persons/bulk/"
+
+    def payload(self, count: int) -> list[dict]:
+        return [
+            {
+                "first_name": f"Name{i}",
+                "last_name": "Bulk",
+                "registration_address": {"address_line": f"Line {i}", "city": "Omsk"},
+                "actual_address": {"address_line": f"Line {i}", "city": "Tomsk"},
+            }
+            for i in range(count)
+        ]
+
+    def test_creates_persons_with_addresses(self):
+        response = self.client.post(self.url, self.payload(3), format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 3)
+
+        person = Person.objects.get(pk=response.data["results"][2]["id"])
+        self.assertEqual(person.full_name, "Bulk Name2")
+        self.assertEqual(person.registration_address.city, "Omsk")
+        self.assertEqual(person.actual_address.address_line, "Line 2")
+        self.assertIsNotNone(person.created_at)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, self.payload(2), format="json")
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(self.url, self.payload(30), format="json")
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_updates_and_reports_errors(self):
+        person = make_person(first_name="Old")
+        old_updated_at = person.updated_at
+        payload = [
+            {"id": person.pk, "first_name": "New", "actual_address": {"address_line": "Mira 2"}},
+            {"first_name": "Valid"},
+            {"last_name": "No first name"},
+            {"id": 999999, "first_name": "Ghost"},
+            {"id": person.pk, "first_name": "Twice"},
+            "not an object",
+        ]
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual((response.data["created"], response.data["updated"], response.data["failed"]), (1, 1, 4))
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, ["updated", "created", "error", "error", "error", "error"])
+        self.assertIn("first_name", response.data["results"][2]["errors"])
+
+        person.refresh_from_db()
+        self.assertEqual(person.full_name, "Ivanov New")
+        self.assertGreater(person.updated_at, old_updated_at)
+        self.assertEqual(person.actual_address.address_line, "Mira 2")
+        self.assertEqual(person.actual_address.city, "Kazan")
+
+    def test_boolean_id_is_not_a_pk(self):
+        person = make_person(pk=1, first_name="Old")
+
+        response = self.client.post(
+            self.url, [{"id": True, "first_name": "Hijacked"}, {"id": False, "first_name": "Zero"}], format="json"
+        )
+
+        self.assertEqual(response.data["failed"], 2)
+        self.assertEqual(response.data["results"][0]["errors"], {"id": ["A valid integer is required."]})
+        person.refresh_from_db()
+        self.assertEqual(person.first_name, "Old")
+
+    def test_rejects_non_list(self):
+        response = self.client.post(self.url, {"first_name": "x"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+# =========================
+# BULK DELETE
+# =========================
+
+class PersonBulkDeleteTests(PersonsAPITestCase):
+    url = "/api/persons/bulk-delete/"
+
+    def test_deletes_persons_and_owned_addresses(self):
+        doomed = [make_person(), make_person()]
+        keeper = make_person(registration_address=doomed[0].actual_address)
+
+        response = self.client.post(self.url, {"ids": [p.pk for p in doomed]}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"deleted": 2, "addresses_deleted": 4})
+        self.assertEqual(list(Person.objects.values_list("pk", flat=True)), [keeper.pk])
+        # общий адрес удалён, как при поштучном DELETE; ссылка обнулена
+        keeper.refresh_from_db()
+        self.assertIsNone(keeper.registration_address_id)
+        doomed_addresses = {p.registration_address_id for p in doomed} | {p.actual_address_id for p in doomed}
+        self.assertFalse(Address.objects.filter(pk__in=doomed_addresses).exists())
+        self.assertTrue(Address.objects.filter(pk=keeper.actual_address_id).exists())
+
+    def test_matches_single_delete_semantics(self):
+        person = make_person()
+        AddressDadata.objects.create(address=person.actual_address, payload={"x": 1})
+        other = make_person()
+
+        self.client.post(self.url, {"ids": [person.pk]}, format="json")
+        self.client.delete(f"/api/persons/{other.pk}/")
+
+        self.assertFalse(Person.objects.exists())
+        self.assertFalse(Address.objects.exists())
+        self.assertFalse(AddressDadata.objects.exists())
+
+    def test_filter(self):
+        make_person(sex=1)
+        female = make_person(sex=2)
+
+        response = self.client.post(self.url, {"filter": {"sex": 1}}, format="json")
+
+        self.assertEqual(response.data["deleted"], 1)
+        self.assertEqual(list(Person.objects.values_list("pk", flat=True)), [female.pk])
+
+    def test_query_count_does_not_grow(self):
+        small = [make_person().pk for _ in range(2)]
+        large = [make_person().pk for _ in range(20)]
+
+        with CaptureQueriesContext(connection) as small_ctx:
+            self.client.post(self.url, {"ids": small}, format="json")
+        with CaptureQueriesContext(connection) as large_ctx:
+            self.client.post(self.url, {"ids": large}, format="json")
+
+        self.assertEqual(len(small_ctx.captured_queries), len(large_ctx.captured_queries))
+
+    def test_rejects_ambiguous_or_unscoped_payloads(self):
+        make_person()
+        for payload in ({}, {"ids": []}, {"filter": {}}, {"filter": {"unknown": 1}}, {"ids": [1], "filter": {"sex": 1}}):
+            with self.subTest(payload=payload):
+                self.assertEqual(self.client.post(self.url, payload, format="json").status_code, 400)
+        self.assertEqual(Person.objects.count(), 1)
+
+    def test_management_command(self):
+        keep = make_person(sex=2)
+        drop = make_person(sex=1)
+
+        out = io.StringIO()
+        call_command("delete_persons", "--filter", "sex=1", "--dry-run", stdout=out)
+        self.assertIn("Would delete 1 persons", out.getvalue())
+        self.assertEqual(Person.objects.count(), 2)
+
+        call_command("delete_persons", f"--ids={drop.pk}", stdout=io.StringIO())
+        self.assertEqual(list(Person.objects.values_list("pk", flat=True)), [keep.pk])
+
+
+# =========================
+# EXPORT
+# =========================
+
+class PersonExportTests(PersonsAPITestCase):
+    def test_csv_streams_flat_rows(self):
+        person = make_person(email="ivan@example.com")
+        make_person(with_addresses=False, first_name="Solo")
+
+        response = self.client.get("/api/persons/export/")
+
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["id"], str(person.pk))
+        self.assertEqual(rows[0]["reg_city"], "Moscow")
+        self.assertEqual(rows[0]["act_city"], "Kazan")
+        self.assertEqual(rows[1]["reg_city"], "")
+
+    def test_ndjson_honours_list_filters(self):
+        make_person(sex=1)
+        female = make_person(sex=2)
+
+        response = self.client.get("/api/persons/export/?type=ndjson&sex=2")
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], [female.pk])
+
+    def test_uses_list_queryset(self):
+        make_person(sex=1)
+        female = make_person(sex=2)
+
+        # get_queryset() — с .using(<реплика>) и ограничениями viewset'а
+        restricted = Person.objects.using("default").filter(sex=2)
+        with mock.patch("apps.persons.views.PersonViewSet.get_queryset", return_value=restricted), \
+                mock.patch("apps.persons.export.export_rows", wraps=export_rows) as rows:
+            response = self.client.get("/api/persons/export/?type=ndjson")
+            lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual([json.loads(line)["id"] for line in lines], [female.pk])
+        self.assertEqual(rows.call_args.args[0]._db, "default")
+
+    def test_unknown_type(self):
+        self.assertEqual(self.client.get("/api/persons/export/?type=xml").status_code, 400)
+
+    def test_management_command(self):
+        make_person(sex=1)
+        make_person(sex=2, first_name="Anna")
+
+        out = io.StringIO()
+        call_command("export_persons", "--format=ndjson", "--filter", "sex=2", stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row["first_name"] for row in rows], ["Anna"])
+        self.assertEqual(rows[0]["act_city"], "Kazan")
+
+
+# =========================
+# IMPORT
+# =========================
+
+class PersonImportTests(PersonsAPITestCase):
+    def write_file(self, content: str, suffix: str = ".csv") -> str:
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w", encoding="utf-8") as stream:
+            stream.write(content)
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        self.addCleanup(lambda: os.path.exists(f"{path}.checkpoint") and os.remove(f"{path}.checkpoint"))
+        return path
+
+    def import_file(self, path: str, *args) -> tuple[str, str]:
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_persons", path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def export(self, file_format: str = "csv") -> str:
+        out = io.StringIO()
+        call_command("export_persons", f"--format={file_format}", stdout=out)
+        return out.getvalue()
+
+    def test_round_trip_from_export(self):
+        make_person(email="ivan@example.com", sex=1, birthday="1990-05-01")
+        make_person(with_addresses=False, first_name="Solo")
+        for file_format in ("csv", "ndjson"):
+            with self.subTest(file_format=file_format):
+                path = self.write_file(self.export(file_format), suffix=f".{file_format}")
+                Person.objects.all().delete()
+                Address.objects.all().delete()
+
+                self.import_file(path, "--batch-size=1")
+
+                ivan = Person.objects.select_related("registration_address", "actual_address").get(
+                    first_name="Ivan"
+                )
+                self.assertEqual(ivan.full_name, "Ivanov Ivan")
+                self.assertEqual(ivan.email, "ivan@example.com")
+                self.assertEqual(str(ivan.birthday), "1990-05-01")
+                self.assertEqual(ivan.registration_address.city, "Moscow")
+                self.assertEqual(ivan.actual_address.city, "Kazan")
+                solo = Person.objects.get(first_name="Solo")
+                self.assertIsNone(solo.registration_address_id)
+                self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+
+    def test_dry_run_writes_nothing_and_reports_errors(self):
+        path = self.write_file(
+            "first_name,email,sex,reg_city\n"
+            "Anna,anna@example.com,2,\n"
+            ",bad-email,x,Omsk\n"
+        )
+
+        out, err = self.import_file(path, "--dry-run")
+
+        self.assertEqual(Person.objects.count(), 0)
+        self.assertIn("Validated 1 rows, 1 invalid", out)
+        errors = json.loads(err.split(": ", 1)[1])
+        self.assertEqual(
+            set(errors), {"first_name", "email", "sex", "reg_address_line"}
+        )
+
+    def test_invalid_rows_are_skipped(self):
+        path = self.write_file('{"first_name": "Anna"}\nnot json\n{"first_name": ""}\n', suffix=".ndjson")
+
+        out, err = self.import_file(path)
+
+        self.assertEqual(list(Person.objects.values_list("first_name", flat=True)), ["Anna"])
+        self.assertIn("record 2:", err)
+        self.assertIn("record 3:", err)
+
+    def test_resume_skips_committed_records(self):
+        path = self.write_file("first_name\nAnna\nBoris\nVera\n")
+        with open(f"{path}.checkpoint", "w", encoding="utf-8") as stream:
+            json.dump({"source": os.path.abspath(path), "position": 2}, stream)
+
+        self.import_file(path, "--resume")
+
+        self.assertEqual(list(Person.objects.values_list("first_name", flat=True)), ["Vera"])
+        self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+
+    def test_upsert_updates_by_id(self):
+        person = make_person()
+        path = self.write_file(
+            f"id,first_name,last_name,reg_country,reg_city,reg_address_line\n"
+            f"{person.pk},Petr,Petrov,RU,Omsk,Lenina 5\n"
+            f"{person.pk + 100},New,,,,\n"
+        )
+
+        self.import_file(path, "--upsert")
+
+        person.refresh_from_db()
+        self.assertEqual(person.full_name, "Petrov Petr")
+        self.assertEqual(person.registration_address.city, "Omsk")
+        self.assertEqual(Person.objects.count(), 2)
+
+    def test_upsert_duplicate_ids_last_row_wins(self):
+        person = make_person()
+        path = self.write_file(
+            f"id,first_name,last_name\n"
+            f"{person.pk},Petr,Petrov\n"
+            f"{person.pk},Pavel,Pavlov\n"
+            f"{person.pk + 100},New,One\n"
+            f"{person.pk + 100},New,Two\n"
+        )
+
+        out, err = self.import_file(path, "--upsert")
+
+        self.assertEqual(err, "")
+        person.refresh_from_db()
+        self.assertEqual(person.full_name, "Pavlov Pavel")
+        self.assertEqual(list(Person.objects.exclude(pk=person.pk).values_list("last_name", flat=True)), ["Two"])
+
+    def test_imports_are_audited(self):
+        # COPY — только на PostgreSQL; журнал у обеих загрузок один и тот же
+        loaders = ["orm", "copy"] if connection.vendor == "postgresql" else ["orm"]
+
+        for loader in loaders:
+            with self.subTest(loader=loader):
+                person = make_person(first_name="Ivan", last_name="Ivanov")
+                path = self.write_file(
+                    f"id,first_name,last_name,reg_country,reg_city,reg_address_line\n"
+                    f"{person.pk},Petr,Ivanov,RU,Omsk,Lenina 5\n"
+                    f",Anna,,RU,Kazan,Mira 1\n"
+                )
+                audit_log = WriteBehindBuffer("audit-test", write=AuditEntry.objects.bulk_create, background=False)
+                AuditEntry.objects.all().delete()
+
+                with mock.patch("apps.persons.models.audit_log", audit_log):
+                    with self.captureOnCommitCallbacks(execute=True):
+                        self.import_file(path, "--upsert", f"--loader={loader}")
+                    audit_log.flush()
+
+                anna = Person.objects.get(first_name="Anna")
+                journal = {
+                    (entry.object_type, entry.action, entry.object_id): entry.changes
+                    for entry in AuditEntry.objects.all()
+                }
+                self.assertEqual(
+                    journal[(AuditEntry.PERSON, AuditEntry.UPDATE, person.pk)], {"first_name": ["Ivan", "Petr"]}
+                )
+                self.assertEqual(
+                    journal[(AuditEntry.ADDRESS, AuditEntry.UPDATE, person.registration_address_id)],
+                    {"city": ["Moscow", "Omsk"], "address_line": ["Tverskaya 1", "Lenina 5"]},
+                )
+                self.assertEqual(
+                    journal[(AuditEntry.PERSON, AuditEntry.CREATE, anna.pk)],
+                    {"first_name": [None, "Anna"], "registration_address": [None, anna.registration_address_id]},
+                )
+                self.assertIn((AuditEntry.ADDRESS, AuditEntry.CREATE, anna.registration_address_id), journal)
+                self.assertEqual(len(journal), 4)
+
+                anna.delete()
+
+    def test_last_per_id(self):
+        rows = [
+            ImportRow(number, row_id, {"first_name": name}, {})
+            for number, (row_id, name) in enumerate([(1, "a"), (None, "b"), (1, "c"), (None, "d"), (2, "e")], start=1)
+        ]
+        self.assertEqual([row.person["first_name"] for row in last_per_id(rows)], ["b", "c", "d", "e"])
+
+    def test_without_upsert_ids_are_ignored(self):
+        person = make_person()
+        path = self.write_file(f"id,first_name\n{person.pk},Petr\n")
+
+        self.import_file(path)
+
+        self.assertEqual(Person.objects.count(), 2)
+        person.refresh_from_db()
+        self.assertEqual(person.first_name, "Ivan")
+
+
+# =========================
+# AUDIT TRAIL
+# =========================
+
+class AuditTrailTests(PersonsAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.person = make_person(email="ivan@example.com")
+        # без фонового потока: записи пишутся только в flush()
+        self.audit_log = WriteBehindBuffer(
+            "audit-test", write=lambda entries: AuditEntry.objects.bulk_create(entries), background=False
+        )
+        patcher = mock.patch("apps.persons.models.audit_log", self.audit_log)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, method: str, url: str, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, format="json")
+        self.assertLess(response.status_code, 300, response.content)
+        return response
+
+    def entries(self, **filters) -> list[AuditEntry]:
+        return list(AuditEntry.objects.filter(**filters).order_by("id"))
+
+    def test_update_is_written_behind_with_diff_and_actor(self):
+        self.write("patch", f"/api/persons/{self.person.pk}/", {"first_name": "Petr", "email": "ivan@example.com"})
+
+        # запрос только поставил запись в очередь
+        self.assertEqual(AuditEntry.objects.count(), 0)
+        self.audit_log.flush()
+
+        [entry] = self.entries()
+        self.assertEqual((entry.object_type, entry.object_id, entry.action), ("person", self.person.pk, "update"))
+        self.assertEqual(entry.changes, {"first_name": ["Ivan", "Petr"]})
+        self.assertEqual(entry.actor_id, self.user.pk)
+
+    def test_create_and_nested_address_update(self):
+        response = self.write("post", "/api/persons/", {
+            "first_name": "Anna",
+            "birthday": "1990-05-17",
+            "registration_address": {"city": "Omsk", "address_line": "Lenina 1"},
+        })
+        self.write("patch", f"/api/persons/{response.data['id']}/", {
+            "registration_address": {"address_line": "Lenina 2"},
+        })
+        self.audit_log.flush()
+
+        address, person, address_update = self.entries()
+        self.assertEqual((address.object_type, address.action), ("address", "create"))
+        self.assertEqual(address.changes["city"], [None, "Omsk"])
+        self.assertEqual(person.changes["birthday"], [None, "1990-05-17"])
+        self.assertEqual(person.changes["registration_address"], [None, address.object_id])
+        self.assertEqual(address_update.changes, {"address_line": ["Lenina 1", "Lenina 2"]})
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.person.first_name = "Petr"
+                self.person.save()
+                raise RuntimeError
+
+        self.assertEqual(callbacks, [])
+
+    def test_bulk_paths(self):
+        self.write("post", "/api/persons/bulk/", [
+            {"first_name": "Anna"},
+            {"id": self.person.pk, "sex": 2, "actual_address": {"city": "Tver", "address_line": "Mira 3"}},
+        ])
+        self.write("post", "/api/persons/bulk-delete/", {"ids": [self.person.pk]})
+        self.audit_log.flush()
+
+        rows = [(entry.object_type, entry.action, entry.changes) for entry in self.entries()]
+        self.assertIn(("address", "update", {"city": ["Kazan", "Tver"], "address_line": ["Tverskaya 1", "Mira 3"]}), rows)
+        self.assertIn(("person", "update", {"sex": [None, 2]}), rows)
+        self.assertEqual(
+            sorted(row[:2] for row in rows if row[1] == "delete"),
+            [("address", "delete"), ("address", "delete"), ("person", "delete")],
+        )
+        self.assertEqual({entry.actor_id for entry in self.entries()}, {self.user.pk})
+
+    def test_history_endpoint(self):
+        for name in ("Petr", "Oleg", "Pavel"):
+            self.write("patch", f"/api/persons/{self.person.pk}/", {"first_name": name})
+        self.write("patch", f"/api/addresses/{self.person.actual_address_id}/", {"zipcode": "420000"})
+        self.write("patch", f"/api/persons/{make_person().pk}/", {"first_name": "Other"})
+        self.audit_log.flush()
+
+        url = f"/api/persons/{self.person.pk}/history/?page_size=3"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(
+            [(row["object_type"], row["changes"]) for row in first.data["results"]],
+            [
+                ("address", {"zipcode": [None, "420000"]}),
+                ("person", {"first_name": ["Oleg", "Pavel"]}),
+                ("person", {"first_name": ["Petr", "Oleg"]}),
+            ],
+        )
+        self.assertEqual(first.data["results"][0]["actor_email"], "operator@example.com")
+
+        second = self.client.get(first.data["next"])
+        self.assertEqual([row["changes"] for row in second.data["results"]], [{"first_name": ["Ivan", "Petr"]}])
+        self.assertIsNone(second.data["next"])
+
+        self.assertEqual(self.client.get("/api/persons/999999/history/").status_code, 404)
+
+    def test_admin_changes(self):
+        admin = User.objects.create_superuser(email="admin@example.com", password="x")
+        self.client.force_login(admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/admin/persons/person/", {
+                "action": "delete_selected", "post": "yes", "_selected_action": [self.person.pk],
+            })
+        self.assertEqual(response.status_code, 302)
+        self.audit_log.flush()
+
+        [entry] = self.entries()
+        self.assertEqual((entry.object_type, entry.object_id, entry.action), ("person", self.person.pk, "delete"))
+        self.assertEqual(entry.actor_id, admin.pk)
+
+
+# =========================
+# ADMIN
+# =========================
+
+class PersonAdminTests(PersonsAPITestCase):
+    def setUp(self):
+        super().setUp()
+        admin = User.objects.create_superuser(email="admin@example.com", password="x")
+        self.client.force_login(admin)
+
+    def changelist_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_changelist_query_count_does_not_grow(self):
+        make_person()
+        small = self.changelist_queries("/admin/persons/person/")
+
+        for _ in range(10):
+            make_person()
+        self.assertEqual(self.changelist_queries("/admin/persons/person/"), small)
+
+    def test_search_and_forms(self):
+        person = make_person(email="ivan@example.com")
+        make_person(first_name="Petr", last_name="Petrov")
+
+        response = self.client.get("/admin/persons/person/?q=ivanov")
+        self.assertContains(response, "ivan@example.com")
+        self.assertNotContains(response, "Petrov Petr")
+
+        response = self.client.get(f"/admin/persons/person/{person.pk}/change/")
+        self.assertContains(response, "admin-autocomplete")
+
+        response = self.client.get(f"/admin/persons/address/{person.actual_address_id}/change/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_changelist(self):
+        response = self.client.get("/admin/users/user/?q=operator")
+        self.assertContains(response, "operator@example.com")
@@ -1,12 +1,37 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import async_read_view
 from .views import PersonViewSet, AddressViewSet
 
 router = DefaultRouter()
 router.register(r"persons", PersonViewSet, basename="persons")
 router.register(r"addresses", AddressViewSet, basename="addresses")
 
+
+def _async_reads() -> list:
+    """
+    Те же URL и имена, что у router: GET с JSON — async-view,
+    остальное — viewset (см. apps/persons/async_views.py).
+    """
+    callbacks = {pattern.name: pattern.callback for pattern in router.urls if pattern.name}
+    return [
+        re_path(r"^persons/$", async_read_view(callbacks["persons-list"], "list"), name="persons-list"),
+        re_path(r"^persons/search/$", async_read_view(callbacks["persons-search"], "search"), name="persons-search"),
+        re_path(r"^persons/(?P<pk>[0-9]+)/$", async_read_view(callbacks["persons-detail"], "retrieve"), name="persons-detail"),
+        re_path(r"^addresses/$", async_read_view(callbacks["addresses-list"], "list"), name="addresses-list"),
+        re_path(r"^addresses/(?P<pk>[0-9]+)/$", async_read_view(callbacks["addresses-detail"], "retrieve"), name="addresses-detail"),
+    ]
+
+
+async_urlpatterns = _async_reads() + [
+    path("", include(router.urls)),
+]
+
 urlpatterns = [
     path("", include(router.urls)),
 ]
+
+if settings.PERSONS_ASYNC_READS:
+    urlpatterns = async_urlpatterns
@@ -1,11 +1,33 @@
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
 
-from .models import Person, Address
-from .serializers import PersonSerializer, AddressSerializer
+from core.audit import AuditActorMixin
+from core.db.replicas import ReplicaReadMixin
 
+from .bulk import bulk_delete_persons, bulk_save_persons
+from .caching import VersionedResponseMixin
+from .export import EXPORT_FORMATS
+from .fieldsets import SparseFieldsetMixin
+from .filters import PersonFilterBackend, filter_persons
+from .models import AuditEntry, Person, Address
+from .pagination import HistoryPagination, KeysetPagination
+from .readpath import ProjectedReadMixin
+from .search import PersonSearchQuerySerializer, search_persons
+from .serializers import (
+    AddressSerializer,
+    AuditEntrySerializer,
+    PersonBulkDeleteSerializer,
+    PersonSearchSerializer,
+    PersonSerializer,
+)
 
-class PersonViewSet(ModelViewSet):
+
+class PersonViewSet(AuditActorMixin, ReplicaReadMixin, VersionedResponseMixin, ProjectedReadMixin, SparseFieldsetMixin, ModelViewSet):
     """
     CRUD для модели Person.
 
@@ -14,11 +36,205 @@ class PersonViewSet(ModelViewSet):
     - Никаких cookies / JWT / request.user
     - Явная фиксация IsAuthenticated
     - Person является владельцем адресов
+    - Список отдаётся keyset-страницами (см. KeysetPagination)
+    - Фильтры списка — query-параметры (см. PersonFilterBackend)
+    - Оба адреса грузятся JOIN'ом: число запросов не зависит от размера страницы
+    - Список по умолчанию компактный, ?fields= / ?expand= (см. SparseFieldsetMixin)
+    - GET читается с реплики, если она есть (см. ReplicaReadMixin)
+    - Список и карточка — с ETag / 304 и кэшем ответов (см. VersionedResponseMixin)
+    - Список и карточка собираются из values() без сериализатора (см. ProjectedReadMixin)
+    - Изменения пишутся в журнал от имени пользователя запроса (см. AuditActorMixin)
     """
 
-    queryset = Person.objects.all()
+    queryset = Person.objects.select_related(
+        "registration_address",
+        "actual_address",
+    )
     serializer_class = PersonSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    filter_backends = [PersonFilterBackend]
+
+    # сортировки списка: под каждую есть индекс (<поле>, id)
+    ordering = "-created_at"
+    ordering_fields = ("created_at", "updated_at", "full_name")
+
+    # карточка включает оба адреса: их смена, правка или удаление меняют ETag
+    version_fields = (
+        "pk",
+        "updated_at",
+        "registration_address_id",
+        "registration_address__updated_at",
+        "actual_address_id",
+        "actual_address__updated_at",
+    )
+
+    list_actions = ("list", "search")
+
+    @action(detail=False, methods=["get"], serializer_class=PersonSearchSerializer)
+    def search(self, request):
+        """
+        GET /api/persons/search/?q=<строка>&limit=<n>
+
+        Нечёткий поиск по ФИО, email и адресам, результаты по убыванию rank.
+        Фильтры списка (?sex=, ?city=, ...) тоже применяются.
+        """
+        serializer = self.get_serializer(self.get_search_queryset(), many=True)
+        return Response({"results": serializer.data})
+
+    def get_search_queryset(self):
+        """
+        Результаты search (общий с async-чтением): ?q= / ?limit= проверены.
+        """
+        params = PersonSearchQuerySerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        q, limit = params.validated_data["q"], params.validated_data["limit"]
+
+        return search_persons(self.filter_queryset(self.get_queryset()), q)[:limit]
+
+    @action(detail=True, methods=["get"])
+    def history(self, request, pk=None):
+        """
+        GET /api/persons/{id}/history/
+
+        Журнал изменений персоны и её текущих адресов, новые первыми,
+        keyset-страницами (см. HistoryPagination). Журнал пишется
+        после COMMIT фоновым потоком: последнее изменение может
+        появиться в истории с задержкой до AUDIT_FLUSH_INTERVAL.
+        """
+        person = self.get_object()
+        queryset = AuditEntry.for_person(person).select_related("actor")
+
+        paginator = HistoryPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(AuditEntrySerializer(page, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        GET /api/persons/export/?type=csv|ndjson
+
+        Потоковая выгрузка всех персон с развёрнутыми адресами
+        (формат — apps/persons/tabular.py). Фильтры списка применяются.
+        Память не зависит от размера таблицы: строки читаются
+        курсором и отдаются кусками по мере чтения.
+        """
+        export_type = request.query_params.get("type", "csv")
+        if export_type not in EXPORT_FORMATS:
+            raise serializers.ValidationError(
+                {"type": [f"Expected one of: {', '.join(EXPORT_FORMATS)}."]}
+            )
+
+        generate, content_type, extension = EXPORT_FORMATS[export_type]
+
+        # тот же queryset, что у списка (реплика, ограничения viewset'а);
+        # values_list() сбрасывает select_related / only и строит JOIN'ы сам
+        queryset = self.filter_queryset(self.get_queryset())
+
+        response = StreamingHttpResponse(generate(queryset), content_type=content_type)
+        filename = f"persons-{timezone.now():%Y%m%d-%H%M%S}.{extension}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    bulk_max_items = 10_000
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        POST /api/persons/bulk/ — пакетное создание / обновление.
+
+        Тело: список объектов в формате PersonSerializer;
+        элемент с "id" — частичное обновление, без "id" — создание.
+
+        Сначала валидируются все элементы, затем валидные пишутся
+        батчами в одной транзакции (см. bulk_save_persons).
+        Невалидные элементы пропускаются и возвращаются с ошибками.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise serializers.ValidationError({"non_field_errors": ["Expected a list of items."]})
+        if len(items) > self.bulk_max_items:
+            raise serializers.ValidationError(
+                {"non_field_errors": [f"Ensure this list has no more than {self.bulk_max_items} items."]}
+            )
+
+        existing = self.get_queryset().in_bulk(
+            [item["id"] for item in items if isinstance(item, dict) and type(item.get("id")) is int]
+        )
+
+        results = [None] * len(items)
+        valid = []
+        seen_ids = set()
+
+        # один сериализатор на весь батч (как child у ListSerializer):
+        # дерево полей строится один раз, а не на каждый элемент
+        validator = PersonSerializer(context=self.get_serializer_context())
+
+        for index, item in enumerate(items):
+            errors = None
+            instance = None
+
+            if not isinstance(item, dict):
+                errors = {"non_field_errors": ["Expected an object."]}
+            # type(), а не isinstance: True/False — тоже int и дали бы pk 1/0
+            elif item.get("id") is not None and type(item["id"]) is not int:
+                errors = {"id": ["A valid integer is required."]}
+            elif item.get("id") is not None:
+                instance = existing.get(item["id"])
+                if instance is None:
+                    errors = {"id": ["Not found."]}
+                elif instance.pk in seen_ids:
+                    errors = {"id": ["Duplicate id in this batch."]}
+                else:
+                    seen_ids.add(instance.pk)
+
+            if errors is None:
+                validator.instance = instance
+                validator.partial = instance is not None
+                try:
+                    valid.append((index, instance, validator.run_validation(item)))
+                    continue
+                except serializers.ValidationError as exc:
+                    errors = serializers.as_serializer_error(exc)
+
+            results[index] = {"index": index, "status": "error", "errors": errors}
+
+        persons = bulk_save_persons([(instance, data) for _, instance, data in valid])
+
+        for (index, instance, _), person in zip(valid, persons):
+            status = "created" if instance is None else "updated"
+            results[index] = {"index": index, "status": status, "id": person.pk}
+
+        statuses = [result["status"] for result in results]
+        return Response(
+            {
+                "created": statuses.count("created"),
+                "updated": statuses.count("updated"),
+                "failed": statuses.count("error"),
+                "results": results,
+            }
+        )
+
+    @action(detail=False, methods=["post"], url_path="bulk-delete")
+    def bulk_delete(self, request):
+        """
+        POST /api/persons/bulk-delete/ — {"ids": [...]} или {"filter": {...}}
+
+        Удаляет персоны и их адреса несколькими set-based запросами
+        в одной транзакции (см. bulk_delete_persons). Семантика —
+        как у DELETE /api/persons/{id}/.
+        """
+        params = PersonBulkDeleteSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+
+        queryset = Person.objects.all()
+        if "ids" in params.validated_data:
+            queryset = queryset.filter(pk__in=params.validated_data["ids"])
+        else:
+            queryset = filter_persons(queryset, params.validated_data["filter"])
+
+        persons, addresses = bulk_delete_persons(queryset)
+        return Response({"deleted": persons, "addresses_deleted": addresses})
 
     def perform_destroy(self, instance: Person) -> None:
         """
@@ -43,7 +259,7 @@ class PersonViewSet(ModelViewSet):
             actual_address.delete()
 
 
-class AddressViewSet(ModelViewSet):
+class AddressViewSet(AuditActorMixin, ReplicaReadMixin, VersionedResponseMixin, ProjectedReadMixin, SparseFieldsetMixin, ModelViewSet):
     """
     CRUD для адресов Person.
 
@@ -55,3 +271,7 @@ class AddressViewSet(ModelViewSet):
     queryset = Address.objects.all()
     serializer_class = AddressSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    ordering = "-created_at"
+    ordering_fields = ("created_at",)
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 
+from core.paginators import EstimatedCountPaginator
+
 from .models import User
 
 
@@ -27,12 +29,17 @@ class UserAdmin(DjangoUserAdmin):
         "is_superuser",
     )
 
+    # icontains → GIN pg_trgm на UPPER(col) (миграция 0004)
     search_fields = (
         "email",
         "first_name",
         "last_name",
     )
 
+    # без точного COUNT(*) на каждую страницу
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     # форма редактирования
     fieldsets = (
         (None, {"fields": ("email", "password")}),
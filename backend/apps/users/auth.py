@@ -1,28 +1,147 @@
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework import serializers
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework import exceptions, serializers
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.signals import user_login_failed
+from django.utils import timezone
+
+from core.concurrency import run_cpu
 
 User = get_user_model()
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Логин за один проход: один SELECT пользователя и ровно один хэш пароля.
+
+    authenticate() (и super().validate()) не вызываем: он повторил бы
+    и поиск пользователя, и PBKDF2. Поведение то же, что у связки
+    ModelBackend + TokenObtainPairSerializer:
+    - неизвестный email → всё равно хэшируем пароль (время ответа
+      не выдаёт, существует ли пользователь)
+    - неактивный пользователь → 401 no_active_account
+    - неудача → сигнал user_login_failed
+
+    avalidate() — то же для async-views: хэш и подпись токенов в пуле
+    (core.concurrency), пользователь — через async ORM.
+    """
+
     email_field = "email"
 
     def validate(self, attrs):
+        email, password = self._credentials(attrs)
+
+        user = authenticate_once(email, password, request=self.context.get("request"))
+        self._check_active(user)
+
+        self.user = user
+        return self.token_pair(user)
+
+    async def avalidate(self, data) -> dict:
+        """
+        Проверка полей + логин; ошибки — те же ValidationError / AuthenticationFailed.
+        """
+        attrs = self.to_internal_value(data)
+        email, password = self._credentials(attrs)
+
+        user = await aauthenticate_once(email, password, request=self.context.get("request"))
+        self._check_active(user)
+
+        if api_settings.UPDATE_LAST_LOGIN:
+            await User.objects.filter(pk=user.pk).aupdate(last_login=timezone.now())
+
+        self.user = user
+        return await run_cpu(self.sign_tokens, user)
+
+    @classmethod
+    def token_pair(cls, user) -> dict:
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+
+        return cls.sign_tokens(user)
+
+    @classmethod
+    def sign_tokens(cls, user) -> dict:
+        refresh = cls.get_token(user)
+        return {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+    # =========================
+    # INTERNAL
+    # =========================
+
+    @staticmethod
+    def _credentials(attrs) -> tuple[str, str]:
         email = attrs.get("email")
         password = attrs.get("password")
 
         if not email or not password:
             raise serializers.ValidationError("Email and password are required")
 
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid email or password")
+        return email, password
+
+    def _check_active(self, user) -> None:
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise exceptions.AuthenticationFailed(
+                self.error_messages["no_active_account"],
+                "no_active_account",
+            )
+
+
+# =========================
+# PASSWORD CHECK
+# =========================
+
+def verify_password(user, password: str) -> tuple[bool, bool]:
+    """
+    Ровно один хэш: (пароль верный, нужен перехэш новым хэшером).
+    user=None → хэшируем впустую, ответ всегда False.
+    """
+    if user is None:
+        make_password(password)
+        return False, False
+
+    upgrade = []
+    is_correct = check_password(password, user.password, setter=lambda raw: upgrade.append(raw))
+    return is_correct, bool(upgrade)
+
+
+def _login_failed(email: str, request):
+    user_login_failed.send(sender=__name__, credentials={"email": email}, request=request)
+    return serializers.ValidationError("Invalid email or password")
+
+
+def authenticate_once(email: str, password: str, request=None):
+    """
+    Пользователь с таким email и паролем; иначе ValidationError.
+    """
+    user = User.objects.filter(email=email).first()
+
+    is_correct, upgrade = verify_password(user, password)
+    if not is_correct:
+        raise _login_failed(email, request)
+
+    if upgrade:
+        user.set_password(password)
+        user.save(update_fields=["password"])
+
+    return user
+
+
+async def aauthenticate_once(email: str, password: str, request=None):
+    """
+    authenticate_once() для async-views: хэш в пуле потоков,
+    запросы — через async ORM (в пуле ORM не трогаем).
+    """
+    user = await User.objects.filter(email=email).afirst()
+
+    is_correct, upgrade = await run_cpu(verify_password, user, password)
+    if not is_correct:
+        raise _login_failed(email, request)
 
-        if not user.check_password(password):
-            raise serializers.ValidationError("Invalid email or password")
+    if upgrade:
+        await run_cpu(user.set_password, password)
+        await user.asave(update_fields=["password"])
 
-        # SimpleJWT требует username_field для генерации токена
-        attrs["username"] = user.email
-        return super().validate(attrs)
+    return user
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+# Состояние миграций догоняет модель User, таблицу не трогаем:
+# - first_name/last_name в БД остаются varchar(255) — сужение до 150
+#   обрезало бы или не приняло существующие значения, а длину
+#   и так ограничивает модель (max_length=150) на валидации;
+# - db_table = "users_user" совпадает с именем, под которым таблица
+#   уже создана, AlterModelTable на БД ничего не делает.
+# role и username остаются как есть (см. модель).
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_options_alter_user_managers_and_more'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='user',
+                    name='first_name',
+                    field=models.CharField(blank=True, max_length=150),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='last_name',
+                    field=models.CharField(blank=True, max_length=150),
+                ),
+            ],
+            database_operations=[],
+        ),
+        migrations.AlterModelTable(
+            name='user',
+            table='users_user',
+        ),
+    ]
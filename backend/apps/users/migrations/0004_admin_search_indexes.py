@@ -0,0 +1,43 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Поиск в UserAdmin — icontains, на PostgreSQL это
+# UPPER("col"::text) LIKE UPPER('%q%'): GIN pg_trgm на том же выражении.
+# Только для PostgreSQL (тесты на SQLite не понимают USING gin).
+ADMIN_SEARCH_INDEXES = [
+    ("users_user_email_upper_trgm_idx", "email"),
+    ("users_user_first_name_upper_trgm_idx", "first_name"),
+    ("users_user_last_name_upper_trgm_idx", "last_name"),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, column in ADMIN_SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" '
+            f'ON "users_user" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, _ in ADMIN_SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_sync_user_model_state"),
+    ]
+
+    operations = [
+        # CREATE EXTENSION выполняется только на PostgreSQL
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
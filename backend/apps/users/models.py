@@ -13,6 +13,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     first_name = models.CharField(max_length=150, blank=True)
     last_name = models.CharField(max_length=150, blank=True)
 
+    # столбцы таблицы, которые приложение не использует для входа,
+    # но которые есть в БД (NOT NULL): role читает IsAdmin (api.py),
+    # username — наследие AbstractUser. Без них INSERT через ORM падает
+    role = models.CharField(max_length=50, default="user")
+    username = models.CharField(max_length=255, blank=True)
+
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
 
@@ -0,0 +1,186 @@
+"""
+Массовое заведение пользователей (POST /api/users/bulk/, manage.py import_users).
+
+Узкое место — make_password (PBKDF2, ~100 мс на пароль): хэши
+считаются параллельно в общем пуле потоков core.concurrency
+(PBKDF2 отпускает GIL), пользователи вставляются батчами
+bulk_create. Ошибки строк (невалидные поля, дубли email) не
+прерывают батч, а возвращаются построчно.
+"""
+
+from collections import deque
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+from core.concurrency import cpu_workers, get_cpu_executor
+
+from .serializers import UserSerializer
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+# меньше паролей — дешевле посчитать на месте
+PARALLEL_MIN_PASSWORDS = 32
+
+# паролей на одну задачу в пуле: ~1 с PBKDF2
+HASH_CHUNK_SIZE = 8
+
+
+# =========================
+# HASHING
+# =========================
+
+def _hash(password: str | None) -> str:
+    # None → непригодный пароль, как set_unusable_password()
+    return make_password(password or None)
+
+
+def _hash_chunk(passwords: list[str | None]) -> list[str]:
+    return [_hash(password) for password in passwords]
+
+
+def hash_passwords(
+    passwords: list[str | None],
+    executor=None,
+    workers: int | None = None,
+    min_parallel: int = PARALLEL_MIN_PASSWORDS,
+) -> list[str]:
+    """
+    make_password для списка паролей с сохранением порядка.
+
+    executor — пул потоков, по умолчанию общий пул core.concurrency
+    (CPU_POOL_WORKERS) на workers потоков. В пуле одновременно не
+    больше workers задач по HASH_CHUNK_SIZE паролей: логин, пришедший
+    во время массового заведения, ждёт не дольше одной задачи.
+    Процессы не создаются: fork многопоточного воркера опасен.
+    """
+    if executor is None:
+        executor, workers = get_cpu_executor(), cpu_workers()
+    workers = workers or 1
+
+    if workers <= 1 or len(passwords) < min_parallel:
+        return [_hash(password) for password in passwords]
+
+    hashes = []
+    pending = deque()
+    for start in range(0, len(passwords), HASH_CHUNK_SIZE):
+        if len(pending) >= workers:
+            hashes += pending.popleft().result()
+        pending.append(executor.submit(_hash_chunk, passwords[start:start + HASH_CHUNK_SIZE]))
+
+    while pending:
+        hashes += pending.popleft().result()
+    return hashes
+
+
+# =========================
+# PROVISIONING
+# =========================
+
+def provision_users(items: list, executor=None, workers: int | None = None) -> list[dict]:
+    """
+    items — объекты в формате UserSerializer (пароль в открытом виде).
+
+    Возвращает по результату на элемент, в порядке items:
+    {"index", "status": "created", "id"}, {"index", "status": "error", "errors"}
+    или {"index", "status": "conflict", "errors"} — строка не вставлена из-за
+    параллельной вставки (см. _insert), её можно прислать повторно.
+    """
+    results: list[dict | None] = [None] * len(items)
+    valid: list[tuple[int, dict]] = []
+
+    # один сериализатор на весь батч: дерево полей строится один раз;
+    # уникальность email — одним запросом в _drop_duplicates, а не по запросу на строку
+    validator = UserSerializer()
+    email_field = validator.fields["email"]
+    email_field.validators = [v for v in email_field.validators if not isinstance(v, UniqueValidator)]
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = _error(index, {"non_field_errors": ["Expected an object."]})
+            continue
+
+        try:
+            data = validator.run_validation(item)
+        except serializers.ValidationError as exc:
+            results[index] = _error(index, serializers.as_serializer_error(exc))
+            continue
+
+        data["email"] = User.objects.normalize_email(data["email"])
+        valid.append((index, data))
+
+    valid = _drop_duplicates(valid, results)
+
+    passwords = hash_passwords(
+        [data.pop("password", None) for _, data in valid], executor=executor, workers=workers
+    )
+    users = [User(password=password, **data) for (_, data), password in zip(valid, passwords)]
+
+    for (index, _), user in _insert(list(zip(valid, users)), results):
+        results[index] = {"index": index, "status": "created", "id": user.pk}
+
+    return results
+
+
+def _error(index: int, errors, status: str = "error") -> dict:
+    return {"index": index, "status": status, "errors": errors}
+
+
+def _drop_duplicates(valid: list, results: list) -> list:
+    """
+    Дубли email внутри батча и уже существующие — ошибки строк.
+    Один запрос на весь батч.
+    """
+    emails = [data["email"] for _, data in valid]
+    existing = set(User.objects.filter(email__in=emails).values_list("email", flat=True))
+
+    seen = set()
+    kept = []
+    for index, data in valid:
+        email = data["email"]
+        if email in existing:
+            results[index] = _error(index, {"email": ["user with this email already exists."]})
+        elif email in seen:
+            results[index] = _error(index, {"email": ["Duplicate email in this batch."]})
+        else:
+            seen.add(email)
+            kept.append((index, data))
+
+    return kept
+
+
+def _insert(rows: list, results: list) -> list:
+    """
+    bulk_create батчами. Если параллельный запрос успел вставить тот же
+    email (IntegrityError), такие строки помечаются ошибкой, остальные
+    вставляются повторно. Если и повтор упал, батч не вставлен:
+    оставшиеся строки возвращаются со статусом "conflict".
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user for _, user in rows], batch_size=BATCH_SIZE)
+            return rows
+        except IntegrityError:
+            taken = set(
+                User.objects.filter(email__in=[user.email for _, user in rows]).values_list("email", flat=True)
+            )
+            retry = []
+            for (index, data), user in rows:
+                if user.email in taken:
+                    results[index] = _error(index, {"email": ["user with this email already exists."]})
+                else:
+                    user.pk = None  # pk мог проставиться в откатившемся батче
+                    retry.append(((index, data), user))
+            rows = retry
+
+    for (index, _), user in rows:
+        results[index] = _error(
+            index, {"non_field_errors": ["Conflicts with a concurrent insert, please retry."]}, status="conflict"
+        )
+    return []
@@ -1,8 +1,11 @@
 from rest_framework import serializers
+
+from core.metrics import TimedSerializerMixin
+
 from .models import User
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(
         write_only=True,
         required=False,
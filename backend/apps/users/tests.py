@@ -1,3 +1,421 @@
-from django.test import TestCase
+import asyncio
+import io
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.authentication import CookieJWTAuthentication, TokenUserCache, token_cache
+from core.concurrency import get_cpu_executor
+
+from .provisioning import hash_passwords
+
+User = get_user_model()
+
+
+# =========================
+# SCHEMA
+# =========================
+
+class UserSchemaTests(APITestCase):
+    """
+    Модель пишет в users_user как есть: role и username в таблице
+    остаются (NOT NULL), миграции их не трогают.
+    """
+
+    def test_legacy_columns_are_kept_and_filled(self):
+        columns = {column.name for column in connection.introspection.get_table_description(connection.cursor(), "users_user")}
+        self.assertTrue({"role", "username", "first_name", "last_name"} <= columns)
+
+        user = User.objects.create_user(email="operator@example.com", password="x")
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT role, username FROM users_user WHERE id = %s", [user.pk])
+            self.assertEqual(cursor.fetchone(), ("user", ""))
+
+    def test_migrations_match_the_model(self):
+        out = io.StringIO()
+        try:
+            call_command("makemigrations", "users", check=True, dry_run=True, stdout=out)
+        except SystemExit:
+            self.fail(f"users: модель расходится с миграциями\n{out.getvalue()}")
+
+
+# =========================
+# AUTH CACHE
+# =========================
+
+class _User:
+    def __init__(self, pk):
+        self.pk = pk
+
+
+class TokenUserCacheTests(SimpleTestCase):
+    def test_hit_miss_and_stats(self):
+        cache = TokenUserCache(max_size=10, ttl=60)
+
+        self.assertIsNone(cache.get("t"))
+        cache.set("t", _User(1), "validated")
+
+        self.assertEqual(cache.get("t")[1], "validated")
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_bounded_lru(self):
+        cache = TokenUserCache(max_size=2, ttl=60)
+        for token in ("a", "b"):
+            cache.set(token, _User(token), token)
+        cache.get("a")
+        cache.set("c", _User("c"), "c")
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_entry_never_outlives_token(self):
+        cache = TokenUserCache(max_size=10, ttl=60)
+
+        cache.set("expired", _User(1), "v", expires_at=time.time() - 1)
+
+        self.assertIsNone(cache.get("expired"))
+
+    def test_invalidate_user(self):
+        cache = TokenUserCache(max_size=10, ttl=60)
+        cache.set("a1", _User(1), "v")
+        cache.set("a2", _User(1), "v")
+        cache.set("b", _User(2), "v")
+
+        cache.invalidate_user(1)
+
+        self.assertEqual(cache.stats()["size"], 1)
+        self.assertIsNotNone(cache.get("b"))
+
+    def test_disabled_with_zero_ttl(self):
+        cache = TokenUserCache(max_size=10, ttl=0)
+        cache.set("t", _User(1), "v")
+
+        self.assertIsNone(cache.get("t"))
+
+
+class CookieJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(email="operator@example.com", password="x")
+        self.client.cookies[settings.JWT_ACCESS_COOKIE] = str(AccessToken.for_user(self.user))
+
+    def me(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/auth/me/")
+        return response, len(ctx.captured_queries)
+
+    def test_repeated_requests_skip_user_lookup(self):
+        response, queries = self.me()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, 1)
+
+        response, queries = self.me()
+        self.assertEqual(response.json()["email"], "operator@example.com")
+        self.assertEqual(queries, 0)
+
+    def test_bearer_header_is_cached_too(self):
+        token = str(AccessToken.for_user(self.user))
+        self.client.cookies.clear()
+
+        for expected in (1, 0):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get("/api/auth/me/", HTTP_AUTHORIZATION=f"Bearer {token}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(ctx.captured_queries), expected)
+
+    def test_requests_get_their_own_user(self):
+        request = RequestFactory().get("/api/auth/me/")
+        request.COOKIES[settings.JWT_ACCESS_COOKIE] = self.client.cookies[settings.JWT_ACCESS_COOKIE].value
+        auth = CookieJWTAuthentication()
+
+        first, _ = auth.authenticate(request)
+        first.first_name = "Changed"
+        first._state.fields_cache["marker"] = object()
+
+        for _ in range(2):
+            user, _ = auth.authenticate(request)
+            self.assertIsNot(user, first)
+            self.assertEqual(user.first_name, "")
+            self.assertNotIn("marker", user._state.fields_cache)
+            user.first_name = "Again"
+
+    def test_save_invalidates(self):
+        self.me()
+
+        self.user.first_name = "Anna"
+        self.user.save()
+        response, queries = self.me()
+        self.assertEqual(response.json()["first_name"], "Anna")
+        self.assertEqual(queries, 1)
+
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.me()
+        self.assertEqual(response.status_code, 401)
+
+    def test_delete_invalidates(self):
+        self.me()
+
+        self.user.delete()
+
+        self.assertEqual(self.me()[0].status_code, 401)
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.me()
+        self.assertEqual(self.client.get("/api/auth/cache-stats/").status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get("/api/auth/cache-stats/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {"size", "max_size", "ttl", "hits", "misses", "evictions"})
+
+
+# =========================
+# LOGIN
+# =========================
+
+class LoginTests(APITestCase):
+    url = "/api/auth/login/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="operator@example.com", password="secret-pass")
+
+    def login(self, email="operator@example.com", password="secret-pass"):
+        check = mock.patch("apps.users.auth.check_password", wraps=hashers.check_password)
+        make = mock.patch("apps.users.auth.make_password", wraps=hashers.make_password)
+
+        with check as checked, make as made, CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, {"email": email, "password": password}, format="json")
+
+        return response, checked.call_count + made.call_count, len(ctx.captured_queries)
+
+    def test_success_hashes_once_with_one_query(self):
+        response, hashes, queries = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(settings.JWT_ACCESS_COOKIE, response.cookies)
+        self.assertIn(settings.JWT_REFRESH_COOKIE, response.cookies)
+        self.assertEqual(hashes, 1)
+        self.assertEqual(queries, 1)
+
+    def test_wrong_password(self):
+        response, hashes, _ = self.login(password="wrong")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(hashes, 1)
+
+    def test_unknown_email_still_hashes(self):
+        response, hashes, _ = self.login(email="nobody@example.com")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(hashes, 1)
+
+    def test_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+
+        response, _, _ = self.login()
+
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn(settings.JWT_ACCESS_COOKIE, response.cookies)
+
+    def test_issued_token_authenticates(self):
+        response, _, _ = self.login()
+
+        self.client.cookies[settings.JWT_ACCESS_COOKIE] = response.cookies[settings.JWT_ACCESS_COOKIE].value
+        me = self.client.get("/api/auth/me/")
+
+        self.assertEqual(me.json()["email"], "operator@example.com")
+
+    def test_refresh(self):
+        response, _, _ = self.login()
+        self.client.cookies[settings.JWT_REFRESH_COOKIE] = response.cookies[settings.JWT_REFRESH_COOKIE].value
+
+        refreshed = self.client.post("/api/auth/refresh/")
+
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertIn(settings.JWT_ACCESS_COOKIE, refreshed.cookies)
+
+        self.client.cookies[settings.JWT_REFRESH_COOKIE] = "garbage"
+        self.assertEqual(self.client.post("/api/auth/refresh/").status_code, 401)
+
+    def test_refresh_requires_valid_access_token(self):
+        response, _, _ = self.login()
+        refresh = response.cookies[settings.JWT_REFRESH_COOKIE].value
+
+        # как прежний APIView с IsAuthenticated: refresh-cookie одного мало
+        self.client.cookies.clear()
+        self.client.cookies[settings.JWT_REFRESH_COOKIE] = refresh
+        response = self.client.post("/api/auth/refresh/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"detail": "Authentication credentials were not provided."})
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+        self.assertNotIn(settings.JWT_ACCESS_COOKIE, response.cookies)
+
+        self.client.cookies[settings.JWT_ACCESS_COOKIE] = "expired-or-garbage"
+        response = self.client.post("/api/auth/refresh/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "token_not_valid")
+
+    def test_error_format(self):
+        response = self.client.post(self.url, {"email": "operator@example.com"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password", response.json())
+
+        response = self.client.get("/api/auth/me/")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("detail", response.json())
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+
+    async def test_hashing_runs_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        hash_threads = []
+
+        def slow_verify(user, password):
+            hash_threads.append(threading.get_ident())
+            time.sleep(0.2)
+            return False, False
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        with mock.patch("apps.users.auth.verify_password", slow_verify):
+            response = await self.async_client.post(
+                self.url, {"email": "nobody@example.com", "password": "x"}, content_type="application/json"
+            )
+        ticking.cancel()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(loop_thread, hash_threads)
+        # пока хэш «считался» 200 мс, event loop продолжал работать
+        self.assertGreater(ticks, 5)
+
+
+# =========================
+# BULK PROVISIONING
+# =========================
+
+class UserProvisioningTests(APITestCase):
+    url = "/api/users/bulk/"
+
+    def setUp(self):
+        self.admin = User.objects.create_user(email="admin@example.com", password="x", is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    def test_creates_users_and_reports_row_errors(self):
+        payload = [
+            {"email": "a@example.com", "password": "pass-a", "first_name": "Anna"},
+            {"email": "b@example.com"},
+            {"email": "a@example.com", "password": "other"},
+            {"email": "admin@example.com", "password": "x"},
+            {"email": "not-an-email"},
+            "garbage",
+        ]
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 4))
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["created", "created", "error", "error", "error", "error"],
+        )
+        self.assertIn("email", response.data["results"][2]["errors"])
+
+        anna = User.objects.get(email="a@example.com")
+        self.assertTrue(anna.check_password("pass-a"))
+        self.assertEqual(anna.first_name, "Anna")
+        self.assertFalse(User.objects.get(email="b@example.com").has_usable_password())
+
+    def test_repeated_integrity_error_is_a_conflict(self):
+        payload = [{"email": "a@example.com", "password": "p"}, {"email": "b@example.com"}]
+
+        with mock.patch.object(type(User.objects), "bulk_create", side_effect=IntegrityError("duplicate key")):
+            response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual((response.data["created"], response.data["failed"]), (0, 2))
+        self.assertEqual([result["status"] for result in response.data["results"]], ["conflict", "conflict"])
+        self.assertIn("non_field_errors", response.data["results"][0]["errors"])
+        self.assertFalse(User.objects.filter(email__in=["a@example.com", "b@example.com"]).exists())
+
+    def test_query_count_does_not_grow(self):
+        def run(prefix, count):
+            payload = [{"email": f"{prefix}{i}@example.com", "password": "p"} for i in range(count)]
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.post(self.url, payload, format="json")
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run("small", 2), run("large", 20))
+
+    def test_admin_only(self):
+        self.client.force_authenticate(User.objects.create_user(email="op@example.com", password="x"))
+
+        self.assertEqual(self.client.post(self.url, [], format="json").status_code, 403)
+
+    def test_parallel_hashing_on_shared_pool(self):
+        passwords = [f"pw{i}" for i in range(20)] + [None]
+        with mock.patch("apps.users.provisioning.cpu_workers", return_value=2), \
+                mock.patch("apps.users.provisioning.get_cpu_executor", wraps=get_cpu_executor) as shared:
+            hashes = hash_passwords(passwords, min_parallel=0)
+
+        self.assertEqual(shared.call_count, 1)
+        self.assertTrue(hashers.check_password("pw0", hashes[0]))
+        self.assertTrue(hashers.check_password("pw19", hashes[19]))
+        self.assertFalse(hashers.is_password_usable(hashes[20]))
+
+    def test_bounded_tasks_in_flight(self):
+        in_flight = peak = 0
+        lock = threading.Lock()
+
+        def chunk(passwords):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight -= 1
+            return passwords
+
+        with ThreadPoolExecutor(max_workers=8) as executor, \
+                mock.patch("apps.users.provisioning._hash_chunk", side_effect=chunk):
+            hashes = hash_passwords(list(range(100)), executor=executor, workers=2, min_parallel=0)
+
+        self.assertEqual(hashes, list(range(100)))
+        self.assertLessEqual(peak, 2)
+
+    def test_management_command(self):
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w", encoding="utf-8") as stream:
+            stream.write("email,first_name,password,is_staff\nc@example.com,Carl,pw,true\nc@example.com,Dup,pw,\n")
+        self.addCleanup(os.remove, path)
+
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_users", path, stdout=out, stderr=err)
+
+        self.assertIn("Created 1 users, 1 failed", out.getvalue())
+        self.assertIn("record 2:", err.getvalue())
+        self.assertTrue(User.objects.get(email="c@example.com").is_staff)
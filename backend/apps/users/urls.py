@@ -2,7 +2,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import LoginView, MeView, RefreshView, UserViewSet
+from .views import AuthCacheStatsView, LoginView, MeView, RefreshView, UserViewSet
 
 router = DefaultRouter()
 router.register("users", UserViewSet, basename="users")
@@ -12,6 +12,7 @@ urlpatterns = [
     path("auth/login/", LoginView.as_view(), name="login"),
     path("auth/me/", MeView.as_view(), name="me"),
     path("auth/refresh/", RefreshView.as_view(), name="token_refresh"),
+    path("auth/cache-stats/", AuthCacheStatsView.as_view(), name="auth_cache_stats"),
 
     # USERS CRUD: /api/users/, /api/users/{id}/
     path("", include(router.urls)),
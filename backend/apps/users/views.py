@@ -1,54 +1,107 @@
+import json
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
+from rest_framework import exceptions
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.views import TokenObtainPairView
+
+from core.authentication import CookieJWTAuthentication, token_cache
+from core.concurrency import run_cpu
+from core.db.replicas import ReplicaReadMixin
 
 from .serializers import UserSerializer
 from .auth import CustomTokenObtainPairSerializer
+from .provisioning import provision_users
 
 User = get_user_model()
 
 
 # ===========================================================================================
-# LOGIN
+# ASYNC PLUMBING
 # ===========================================================================================
+#
+# Login / Refresh / Me — async-views без DRF (DRF не умеет async-handlers).
+# Ответы и коды ошибок — как у прежних APIView: {"detail": ...} /
+# ошибки полей, 401 с WWW-Authenticate.
 
-class LoginView(TokenObtainPairView):
-    serializer_class = CustomTokenObtainPairSerializer
+WWW_AUTHENTICATE = 'Bearer realm="api"'
 
-    def post(self, request, *args, **kwargs):
-        jwt_response = super().post(request, *args, **kwargs)
 
-        access = jwt_response.data.get("access")
-        refresh = jwt_response.data.get("refresh")
+def _parse_body(request) -> dict:
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError as exc:
+            raise exceptions.ParseError(f"JSON parse error - {exc}")
+        if not isinstance(data, dict):
+            raise exceptions.ParseError("Expected a JSON object.")
+        return data
+
+    return request.POST.dict()
+
+
+def _error_response(exc: exceptions.APIException) -> JsonResponse:
+    if isinstance(exc, exceptions.ValidationError):
+        detail = exceptions.ValidationError(
+            exc.detail if isinstance(exc.detail, dict) else {"non_field_errors": exc.detail}
+        ).detail
+    elif isinstance(exc.detail, dict):
+        detail = exc.detail
+    else:
+        detail = {"detail": exc.detail}
+
+    response = JsonResponse(detail, status=exc.status_code)
+    if exc.status_code == 401:
+        response["WWW-Authenticate"] = WWW_AUTHENTICATE
+    return response
+
+
+def _set_cookie(response, name: str, value: str, max_age: int) -> None:
+    response.set_cookie(
+        name,
+        value,
+        max_age=max_age,
+        httponly=True,
+        secure=settings.JWT_COOKIE_SECURE,
+        samesite=settings.JWT_COOKIE_SAMESITE,
+        path="/",
+    )
 
-        response = Response({"success": True})
 
-        response.set_cookie(
-            settings.JWT_ACCESS_COOKIE,
-            access,
-            max_age=300,
-            httponly=True,
-            secure=settings.JWT_COOKIE_SECURE,
-            samesite=settings.JWT_COOKIE_SAMESITE,
-            path="/",
-        )
+# ===========================================================================================
+# LOGIN
+# ===========================================================================================
 
-        response.set_cookie(
-            settings.JWT_REFRESH_COOKIE,
-            refresh,
-            max_age=2592000,
-            httponly=True,
-            secure=settings.JWT_COOKIE_SECURE,
-            samesite=settings.JWT_COOKIE_SAMESITE,
-            path="/",
-        )
+@method_decorator(csrf_exempt, name="dispatch")
+class LoginView(View):
+    """
+    POST {"email", "password"} → access / refresh cookies.
+
+    PBKDF2 и подпись JWT — в пуле потоков (core.concurrency),
+    пользователь — через async ORM: event loop не блокируется.
+    """
 
+    async def post(self, request):
+        try:
+            serializer = CustomTokenObtainPairSerializer(context={"request": request})
+            tokens = await serializer.avalidate(_parse_body(request))
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+
+        response = JsonResponse({"success": True})
+        _set_cookie(response, settings.JWT_ACCESS_COOKIE, tokens["access"], max_age=300)
+        _set_cookie(response, settings.JWT_REFRESH_COOKIE, tokens["refresh"], max_age=2592000)
         return response
 
 
@@ -56,31 +109,38 @@ class LoginView(TokenObtainPairView):
 # REFRESH
 # ===========================================================================================
 
-class RefreshView(APIView):
-    def post(self, request):
+def _refresh_access(refresh_token: str) -> str:
+    return str(RefreshToken(refresh_token).access_token)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class RefreshView(View):
+    """
+    POST с refresh-cookie → новый access-cookie.
+
+    Как у прежнего APIView (IsAuthenticated по умолчанию): нужен и
+    действующий access token, без него — 401 до проверки refresh.
+    """
+
+    async def post(self, request):
+        try:
+            if await CookieJWTAuthentication().aauthenticate(request) is None:
+                raise exceptions.NotAuthenticated()
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+
         refresh_token = request.COOKIES.get(settings.JWT_REFRESH_COOKIE)
 
         if not refresh_token:
-            return Response({"detail": "No refresh token"}, status=401)
+            return JsonResponse({"detail": "No refresh token"}, status=401)
 
         try:
-            refresh = RefreshToken(refresh_token)
-            new_access = str(refresh.access_token)
-        except Exception:
-            return Response({"detail": "Invalid refresh token"}, status=401)
-
-        response = Response({"success": True})
-
-        response.set_cookie(
-            settings.JWT_ACCESS_COOKIE,
-            new_access,
-            max_age=300,
-            httponly=True,
-            secure=settings.JWT_COOKIE_SECURE,
-            samesite=settings.JWT_COOKIE_SAMESITE,
-            path="/",
-        )
+            new_access = await run_cpu(_refresh_access, refresh_token)
+        except (TokenError, ValueError, TypeError):
+            return JsonResponse({"detail": "Invalid refresh token"}, status=401)
 
+        response = JsonResponse({"success": True})
+        _set_cookie(response, settings.JWT_ACCESS_COOKIE, new_access, max_age=300)
         return response
 
 
@@ -88,18 +148,72 @@ class RefreshView(APIView):
 # ME
 # ===========================================================================================
 
-class MeView(APIView):
-    permission_classes = [IsAuthenticated]
+class MeView(View):
+    async def get(self, request):
+        try:
+            result = await CookieJWTAuthentication().aauthenticate(request)
+            if result is None:
+                raise exceptions.NotAuthenticated()
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+
+        return JsonResponse(UserSerializer(result[0]).data)
+
+
+# ===========================================================================================
+# AUTH CACHE STATS
+# ===========================================================================================
+
+class AuthCacheStatsView(APIView):
+    """
+    Счётчики кэша токенов текущего процесса (hits / misses / evictions / size).
+    """
+
+    permission_classes = [IsAdminUser]
 
     def get(self, request):
-        return Response(UserSerializer(request.user).data)
+        return Response(token_cache.stats())
 
 
 # ===========================================================================================
 # USERS CRUD
 # ===========================================================================================
 
-class UserViewSet(ModelViewSet):
+class UserViewSet(ReplicaReadMixin, ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+
+    bulk_max_items = 10_000
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
+    def bulk(self, request):
+        """
+        POST /api/users/bulk/ — массовое заведение пользователей.
+
+        Тело: список объектов UserSerializer (пароль в открытом виде).
+        Хэши паролей считаются параллельно, вставка — батчами
+        (см. apps/users/provisioning.py). Невалидные строки и дубли
+        email пропускаются и возвращаются с ошибками. Если вставку
+        сорвали параллельные запросы — 409 с теми же результатами:
+        строки со статусом "conflict" можно прислать повторно.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise exceptions.ValidationError({"non_field_errors": ["Expected a list of items."]})
+        if len(items) > self.bulk_max_items:
+            raise exceptions.ValidationError(
+                {"non_field_errors": [f"Ensure this list has no more than {self.bulk_max_items} items."]}
+            )
+
+        results = provision_users(items)
+
+        statuses = [result["status"] for result in results]
+        return Response(
+            {
+                "created": statuses.count("created"),
+                "failed": len(statuses) - statuses.count("created"),
+                "results": results,
+            },
+            status=409 if "conflict" in statuses else 200,
+        )
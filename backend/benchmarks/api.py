@@ -0,0 +1,319 @@
+"""
+Сквозной бенчмарк API на детерминированном наборе (benchmarks/datasets.py).
+
+    python -m benchmarks.api --size 1k --iterations 50 --output baseline.json
+    python -m benchmarks.api --size 1k --compare baseline.json --threshold 0.2
+
+Каждый сценарий — запрос через весь стек (middleware, JWT в куке, DRF)
+после --warmup прогревочных. По сценарию:
+- latency p50 / p95 / p99 / max, мс
+- SQL-запросов на запрос
+- пик памяти Python на запрос (tracemalloc)
+
+Запросы и память считаются во втором, коротком проходе: трассировка
+памяти и запись SQL замедляют запрос и исказили бы время.
+
+Кэш ответов списков и карточек выключен (иначе замерялся бы кэш),
+кроме сценария persons.list.cached. Пишущие сценарии идут последними,
+чтобы чтения шли по исходному набору.
+
+--compare: регрессия — p50 / p95 или пик памяти выросли больше чем
+на --threshold (и больше --min-delta-ms для времени), либо SQL-запросов
+стало больше. Есть регрессии — код выхода 1.
+
+--keepdb: тестовая БД не удаляется, набор генерируется один раз
+(1m на PostgreSQL — десятки минут).
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from . import datasets
+from .harness import benchmark_database, percentile, timer
+
+PROFILE_ITERATIONS = 10
+
+BULK_ITEMS = 100
+
+# email персон из пишущих сценариев: удаляются перед прогоном с --keepdb
+CREATED_PREFIX = "bench-new-"
+
+# время сравнивается по этим перцентилям
+LATENCY_KEYS = ("p50_ms", "p95_ms")
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: object  # (client, iteration) -> response
+    status: int
+    cached: bool = False
+
+
+def build_scenarios(dataset: datasets.Dataset) -> list[Scenario]:
+    ids = dataset.person_ids
+    terms = dataset.search_terms
+    rng = random.Random(dataset.seed)
+
+    def person_payload(index: int) -> dict:
+        return {
+            "first_name": rng.choice(datasets.FIRST_NAMES),
+            "last_name": rng.choice(datasets.LAST_NAMES),
+            "email": f"{CREATED_PREFIX}{index}@example.com",
+            "registration_address": {
+                "country": "Russia",
+                "city": rng.choice(datasets.CITIES),
+                "address_line": f"{rng.choice(datasets.STREETS)} {rng.randint(1, 200)}",
+            },
+        }
+
+    def login(client, index):
+        return client.post(
+            "/api/auth/login/",
+            {"email": datasets.OPERATOR_EMAIL, "password": datasets.OPERATOR_PASSWORD},
+            format="json",
+        )
+
+    return [
+        Scenario("persons.list", lambda client, i: client.get("/api/persons/?page_size=50"), 200),
+        Scenario(
+            "persons.list.expand",
+            lambda client, i: client.get("/api/persons/?page_size=50&expand=registration_address,actual_address"),
+            200,
+        ),
+        Scenario("persons.list.cached", lambda client, i: client.get("/api/persons/?page_size=50"), 200, cached=True),
+        Scenario("persons.detail", lambda client, i: client.get(f"/api/persons/{ids[i % len(ids)]}/"), 200),
+        Scenario(
+            "persons.search",
+            lambda client, i: client.get(f"/api/persons/search/?q={terms[i % len(terms)]}&limit=20"),
+            200,
+        ),
+        Scenario("addresses.list", lambda client, i: client.get("/api/addresses/?page_size=50"), 200),
+        Scenario("auth.login", login, 200),
+        Scenario("auth.refresh", lambda client, i: client.post("/api/auth/refresh/"), 200),
+        Scenario("auth.me", lambda client, i: client.get("/api/auth/me/"), 200),
+        Scenario("persons.create", lambda client, i: client.post("/api/persons/", person_payload(i), format="json"), 201),
+        Scenario(
+            "persons.bulk",
+            lambda client, i: client.post(
+                "/api/persons/bulk/",
+                [person_payload(i * BULK_ITEMS + n) for n in range(BULK_ITEMS)],
+                format="json",
+            ),
+            200,
+        ),
+    ]
+
+
+# =========================
+# MEASURE
+# =========================
+
+def logged_in_client():
+    """
+    APIClient с куками access / refresh оператора — как у фронтенда.
+    """
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    response = client.post(
+        "/api/auth/login/",
+        {"email": datasets.OPERATOR_EMAIL, "password": datasets.OPERATOR_PASSWORD},
+        format="json",
+    )
+    assert response.status_code == 200, response.content
+    return client
+
+
+def call(scenario: Scenario, client, iteration: int):
+    response = scenario.request(client, iteration)
+    if response.status_code != scenario.status:
+        raise AssertionError(
+            f"{scenario.name}: expected {scenario.status}, got {response.status_code}: {response.content[:500]!r}"
+        )
+    # StreamingHttpResponse / ленивый рендер — тело входит в замер
+    if getattr(response, "streaming", False):
+        b"".join(response.streaming_content)
+    return response
+
+
+def measure(scenario: Scenario, iterations: int, warmup: int) -> dict:
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext, override_settings
+
+    ttl = settings.PERSONS_RESPONSE_CACHE_TTL if scenario.cached else 0
+    with override_settings(PERSONS_RESPONSE_CACHE_TTL=ttl):
+        client = logged_in_client()
+
+        for iteration in range(warmup):
+            call(scenario, client, iteration)
+
+        latencies = []
+        for iteration in range(warmup, warmup + iterations):
+            started = time.perf_counter()
+            call(scenario, client, iteration)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        profiled = min(iterations, PROFILE_ITERATIONS)
+        offset = warmup + iterations
+        peak = 0
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                for iteration in range(offset, offset + profiled):
+                    before = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.reset_peak()
+                    call(scenario, client, iteration)
+                    peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "queries": round(len(queries.captured_queries) / profiled, 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def prepare_dataset(size: int, seed: int) -> datasets.Dataset:
+    from apps.persons.bulk import bulk_delete_persons
+    from apps.persons.models import Person
+
+    bulk_delete_persons(Person.objects.filter(email__startswith=CREATED_PREFIX))
+
+    existing = datasets.persons_count()
+    if existing == size:
+        print(f"dataset: {size} persons already loaded")
+        return datasets.load(size, seed)
+    if existing:
+        sys.exit(f"Benchmark database has {existing} persons, expected 0 or {size}; drop it or run without --keepdb")
+
+    with timer() as elapsed:
+        dataset = datasets.generate(size, seed)
+    print(f"dataset: {size} persons generated in {elapsed():.1f} s")
+    return dataset
+
+
+def run(size: int, seed: int, iterations: int, warmup: int, only: list[str] | None) -> dict:
+    import django
+    from django.db import connection
+
+    dataset = prepare_dataset(size, seed)
+
+    results = {}
+    print(f"{'scenario':<24} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'queries':>8} {'peak':>10}")
+    for scenario in build_scenarios(dataset):
+        if only and scenario.name not in only:
+            continue
+        result = results[scenario.name] = measure(scenario, iterations, warmup)
+        print(
+            f"{scenario.name:<24} {result['p50_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms "
+            f"{result['p99_ms']:>7.2f}ms {result['max_ms']:>7.2f}ms {result['queries']:>8.1f} "
+            f"{result['peak_kb']:>7.1f} kB"
+        )
+
+    return {
+        "meta": {
+            "size": size,
+            "seed": seed,
+            "iterations": iterations,
+            "warmup": warmup,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        },
+        "scenarios": results,
+    }
+
+
+# =========================
+# COMPARE
+# =========================
+
+def compare(baseline: dict, current: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    """
+    Сравнить прогон с базовым; вернуть список регрессий.
+    """
+    for key in ("size", "database"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"warning: baseline {key}={baseline['meta'].get(key)!r}, current {key}={current['meta'].get(key)!r}")
+
+    regressions = []
+    print(f"\n{'scenario':<24} {'metric':<8} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            print(f"{name:<24} (not in baseline)")
+            continue
+
+        for key in (*LATENCY_KEYS, "queries", "peak_kb"):
+            before, after = old[key], result[key]
+            change = (after - before) / before if before else 0.0
+
+            if key == "queries":
+                regressed = after > before
+            elif key == "peak_kb":
+                regressed = change > threshold
+            else:
+                regressed = change > threshold and after - before > min_delta_ms
+
+            mark = "  REGRESSION" if regressed else ""
+            print(f"{name:<24} {key:<8} {before:>10} {after:>10} {change:>+7.0%}{mark}")
+            if regressed:
+                regressions.append(f"{name}: {key} {before} -> {after}")
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=datasets.SIZES, default="1k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--scenario", action="append", help="only these scenarios (repeatable)")
+    parser.add_argument("--output", help="write results as JSON (new baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative regression threshold")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore smaller latency increases")
+    parser.add_argument("--keepdb", action="store_true", help="keep the benchmark database between runs")
+    args = parser.parse_args()
+
+    with benchmark_database(keepdb=args.keepdb):
+        current = run(datasets.SIZES[args.size], args.seed, args.iterations, args.warmup, args.scenario)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent=2)
+            file.write("\n")
+        print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(baseline, current, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
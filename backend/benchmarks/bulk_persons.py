@@ -0,0 +1,61 @@
+"""
+Пропускная способность записи персон: поштучный POST против /bulk/.
+
+    python -m benchmarks.bulk_persons --rows 5000 --batch 1000
+"""
+
+import argparse
+
+from .harness import authenticated_client, benchmark_database, report, timer
+
+
+def make_payload(start: int, count: int) -> list[dict]:
+    return [
+        {
+            "first_name": f"Name{i}",
+            "last_name": "Bench",
+            "email": f"person{i}@example.com",
+            "registration_address": {"address_line": f"Line {i}", "city": "Moscow"},
+            "actual_address": {"address_line": f"Line {i}", "city": "Kazan"},
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def run(rows: int, batch: int) -> None:
+    client = authenticated_client()
+
+    single_rows = min(rows, batch)
+    payload = make_payload(0, single_rows)
+    with timer() as elapsed:
+        for item in payload:
+            client.post("/api/persons/", item, format="json")
+    single = elapsed()
+    report("POST /api/persons/ (per item)", single_rows, single)
+
+    with timer() as elapsed:
+        for start in range(0, rows, batch):
+            response = client.post(
+                "/api/persons/bulk/",
+                make_payload(start, min(batch, rows - start)),
+                format="json",
+            )
+            assert response.data["failed"] == 0, response.data
+    bulk = elapsed()
+    report(f"POST /api/persons/bulk/ ({batch}/req)", rows, bulk)
+
+    print(f"speedup: {(rows / bulk) / (single_rows / single):.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        run(args.rows, args.batch)
+
+
+if __name__ == "__main__":
+    main()
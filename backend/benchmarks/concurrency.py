@@ -0,0 +1,229 @@
+"""
+Параллельные медленные клиенты: синхронный стек (WSGI, пул потоков)
+против async-чтения (ASGI, PERSONS_ASYNC_READS, apps/persons/async_views.py).
+
+    python -m benchmarks.concurrency --persons 1000 --concurrency 10,100,1000
+
+Сервер — в процессе, без сети:
+- WSGI: core.wsgi.application в пуле из --threads потоков (как gunicorn
+  gthread); поток занят запросом, пока клиент не дочитал тело
+- ASGI: core.asgi.application в одном event loop (как uvicorn, один
+  воркер); тело отдаётся кусками, пока клиент читает — loop свободен
+
+Клиент читает со скоростью --client-kbps КБ/с: отдача каждого куска
+тела ждёт len(кусок) / скорость. Каждый из --concurrency клиентов
+делает --requests запросов подряд по смеси URL (список с адресами,
+карточка, поиск). Кэш ответов выключен.
+
+Результат — пропускная способность (запросов/с) и задержки
+p50 / p95 / p99 (от отправки запроса до последнего байта).
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from unittest import mock
+
+from . import datasets
+from .harness import benchmark_database, percentile
+
+
+def build_urls(dataset: datasets.Dataset, page_size: int) -> list[str]:
+    urls = []
+    for index, person_id in enumerate(dataset.person_ids[:20]):
+        urls.append(f"/api/persons/?page_size={page_size}&expand=registration_address,actual_address")
+        urls.append(f"/api/persons/{person_id}/")
+        urls.append(f"/api/persons/search/?q={dataset.search_terms[index % len(dataset.search_terms)]}")
+    return urls
+
+
+def login_cookie() -> str:
+    from django.conf import settings
+    from django.test import Client
+
+    response = Client().post(
+        "/api/auth/login/",
+        {"email": datasets.OPERATOR_EMAIL, "password": datasets.OPERATOR_PASSWORD},
+        content_type="application/json",
+    )
+    assert response.status_code == 200, response.content
+    cookie = SimpleCookie()
+    cookie[settings.JWT_ACCESS_COOKIE] = response.cookies[settings.JWT_ACCESS_COOKIE].value
+    return cookie.output(header="", sep=";").strip()
+
+
+# =========================
+# SERVERS
+# =========================
+
+class WSGIServer:
+    """
+    Пул потоков; медленный клиент держит поток (блокирующая запись в сокет).
+    """
+
+    def __init__(self, threads: int, cookie: str, bytes_per_second: float):
+        from django.core.wsgi import get_wsgi_application
+        from django.test.client import RequestFactory
+
+        self.application = get_wsgi_application()
+        self.factory = RequestFactory()
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+        self.cookie = cookie
+        self.bytes_per_second = bytes_per_second
+
+    def call(self, url: str) -> int:
+        path, _, query = url.partition("?")
+        environ = self.factory._base_environ(
+            PATH_INFO=path, QUERY_STRING=query, REQUEST_METHOD="GET", HTTP_COOKIE=self.cookie
+        )
+        status = []
+        body = self.application(environ, lambda code, headers, exc_info=None: status.append(code))
+        try:
+            for chunk in body:
+                time.sleep(len(chunk) / self.bytes_per_second)
+        finally:
+            body.close()
+        return int(status[0].split()[0])
+
+    async def request(self, url: str) -> int:
+        return await asyncio.get_running_loop().run_in_executor(self.pool, self.call, url)
+
+    def close(self) -> None:
+        self.pool.shutdown()
+
+
+class ASGIServer:
+    """
+    Один event loop; медленный клиент ждёт в send(), не занимая loop.
+    """
+
+    def __init__(self, cookie: str, bytes_per_second: float):
+        from django.core.asgi import get_asgi_application
+
+        self.application = get_asgi_application()
+        self.cookie = cookie.encode()
+        self.bytes_per_second = bytes_per_second
+
+    async def request(self, url: str) -> int:
+        path, _, query = url.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"testserver"), (b"cookie", self.cookie)],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        finished = asyncio.Event()
+        status = []
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            elif message["type"] == "http.response.body":
+                await asyncio.sleep(len(message.get("body", b"")) / self.bytes_per_second)
+
+        try:
+            await self.application(scope, receive, send)
+        finally:
+            finished.set()
+        return status[0]
+
+    def close(self) -> None:
+        pass
+
+
+# =========================
+# LOAD
+# =========================
+
+async def load(server, urls: list[str], concurrency: int, requests: int) -> tuple[float, list[float]]:
+    """
+    concurrency клиентов по requests запросов подряд → (секунды, задержки).
+    """
+    source = itertools.cycle(urls)
+    latencies = []
+
+    async def client():
+        for _ in range(requests):
+            started = time.perf_counter()
+            status = await server.request(next(source))
+            assert status == 200, status
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - started, sorted(latencies)
+
+
+def report(name: str, concurrency: int, seconds: float, latencies: list[float]) -> None:
+    ms = [value * 1000 for value in latencies]
+    print(
+        f"{name:<6} {concurrency:>6} {len(ms):>8} {seconds:>8.2f} s {len(ms) / seconds:>9.0f} req/s"
+        f" {percentile(ms, 50):>9.1f} {percentile(ms, 95):>9.1f} {percentile(ms, 99):>9.1f}"
+    )
+
+
+def run(args) -> None:
+    from django.test.utils import override_settings
+    from django.urls import clear_url_caches
+
+    from apps.persons import urls as persons_urls
+
+    dataset = datasets.generate(args.persons, args.seed)
+    urls = build_urls(dataset, args.page_size)
+    cookie = login_cookie()
+    bytes_per_second = args.client_kbps * 1024
+
+    print(f"{'server':<6} {'conc':>6} {'requests':>8} {'time':>10} {'throughput':>15} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+
+    with override_settings(PERSONS_RESPONSE_CACHE_TTL=0):
+        for concurrency in args.concurrency:
+            server = WSGIServer(args.threads, cookie, bytes_per_second)
+            try:
+                report("wsgi", concurrency, *asyncio.run(load(server, urls, concurrency, args.requests)))
+            finally:
+                server.close()
+
+            clear_url_caches()
+            with mock.patch.object(persons_urls, "urlpatterns", persons_urls.async_urlpatterns):
+                server = ASGIServer(cookie, bytes_per_second)
+                report("asgi", concurrency, *asyncio.run(load(server, urls, concurrency, args.requests)))
+            clear_url_caches()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persons", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=lambda value: [int(n) for n in value.split(",")], default=[10, 100, 1000])
+    parser.add_argument("--requests", type=int, default=3, help="requests per client")
+    parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads")
+    parser.add_argument("--client-kbps", type=float, default=256, help="client read speed, KB/s")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Детерминированные наборы данных для бенчмарков.
+
+Один и тот же seed и размер дают те же персоны, адреса, ответы DaData
+и пользователей (кроме id и created_at), поэтому замеры разных ревизий
+сравнимы.
+
+    1k   — 1 000 персон (2 000 адресов, 400 ответов DaData, 100 пользователей)
+    100k — 100 000 персон
+    1m   — 1 000 000 персон
+
+Вставка — bulk_create батчами; пароль хэшируется один раз на весь набор.
+"""
+
+import random
+import uuid
+from dataclasses import dataclass, field
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+BATCH_SIZE = 5_000
+
+# каждый N-й адрес — с ответом DaData
+DADATA_EVERY = 5
+
+USERS_PER_PERSONS = 10
+MAX_USERS = 10_000
+
+OPERATOR_EMAIL = "bench-operator@example.com"
+OPERATOR_PASSWORD = "bench-operator-password"
+
+FIRST_NAMES = (
+    "Ivan", "Petr", "Anna", "Maria", "Olga", "Sergey", "Dmitry", "Elena",
+    "Natalia", "Alexey", "Tatiana", "Mikhail", "Irina", "Andrey", "Svetlana",
+)
+LAST_NAMES = (
+    "Ivanov", "Petrov", "Sidorov", "Smirnov", "Kuznetsov", "Popov", "Sokolov",
+    "Lebedev", "Kozlov", "Novikov", "Morozov", "Volkov", "Alekseev", "Pavlov",
+)
+CITIES = (
+    "Moscow", "Saint Petersburg", "Kazan", "Novosibirsk", "Omsk", "Tomsk",
+    "Samara", "Ufa", "Perm", "Voronezh", "Krasnodar", "Yekaterinburg",
+)
+STREETS = ("Lenina", "Mira", "Gagarina", "Sovetskaya", "Pushkina", "Tsentralnaya", "Sadovaya")
+
+
+@dataclass
+class Dataset:
+    size: int
+    seed: int
+    # выборка id для карточек (не больше SAMPLE_IDS)
+    person_ids: list[int] = field(default_factory=list)
+    search_terms: tuple[str, ...] = LAST_NAMES[:5]
+
+    SAMPLE_IDS = 1_000
+
+
+def persons_count() -> int:
+    from apps.persons.models import Person
+
+    return Person.objects.count()
+
+
+def generate(size: int, seed: int = 42) -> Dataset:
+    """
+    Заполнить пустую БД набором размера size.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+
+    from apps.persons.models import Address, AddressDadata, CollectionVersion, Person
+
+    rng = random.Random(seed)
+    dataset = Dataset(size=size, seed=seed)
+    sample_every = max(1, size // Dataset.SAMPLE_IDS)
+
+    for start in range(0, size, BATCH_SIZE):
+        count = min(BATCH_SIZE, size - start)
+
+        addresses = []
+        payloads = []
+        for index in range(start * 2, (start + count) * 2):
+            address = make_address(rng, index)
+            payload = make_dadata(rng, address) if index % DADATA_EVERY == 0 else None
+            address.apply_dadata(payload)
+            addresses.append(address)
+            payloads.append(payload)
+
+        with transaction.atomic():
+            Address.objects.bulk_create(addresses, batch_size=1000)
+            AddressDadata.objects.bulk_create(
+                [
+                    AddressDadata(address=address, payload=payload)
+                    for address, payload in zip(addresses, payloads)
+                    if payload
+                ],
+                batch_size=1000,
+            )
+
+            persons = [
+                make_person(rng, start + offset, addresses[offset * 2], addresses[offset * 2 + 1])
+                for offset in range(count)
+            ]
+            Person.objects.bulk_create(persons, batch_size=1000)
+
+        dataset.person_ids.extend(
+            person.pk for offset, person in enumerate(persons) if (start + offset) % sample_every == 0
+        )
+
+    password = make_password(OPERATOR_PASSWORD)
+    User = get_user_model()
+    users = [
+        User(email=f"user{index}@example.com", first_name=rng.choice(FIRST_NAMES),
+             last_name=rng.choice(LAST_NAMES), password=password)
+        for index in range(min(MAX_USERS, max(10, size // USERS_PER_PERSONS)))
+    ]
+    users.append(User(email=OPERATOR_EMAIL, password=password, is_staff=True))
+    User.objects.bulk_create(users, batch_size=1000)
+
+    CollectionVersion.bump()
+    return dataset
+
+
+def load(size: int, seed: int = 42) -> Dataset:
+    """
+    Набор уже в БД (--keepdb): только выборка id.
+    """
+    from apps.persons.models import Person
+
+    dataset = Dataset(size=size, seed=seed)
+    step = max(1, size // Dataset.SAMPLE_IDS)
+    ids = Person.objects.order_by("id").values_list("id", flat=True).iterator(chunk_size=10_000)
+    dataset.person_ids = [pk for index, pk in enumerate(ids) if index % step == 0]
+    return dataset
+
+
+# =========================
+# ROWS
+# =========================
+
+def make_address(rng: random.Random, index: int):
+    from apps.persons.models import Address
+
+    return Address(
+        country="Russia",
+        city=rng.choice(CITIES),
+        address_line=f"{rng.choice(STREETS)} {rng.randint(1, 200)}, apt {rng.randint(1, 300)}",
+        zipcode=f"{rng.randint(100000, 999999)}",
+    )
+
+
+def make_dadata(rng: random.Random, address) -> dict:
+    lat = 43 + rng.random() * 20
+    lon = 30 + rng.random() * 100
+    return {
+        "value": f"{address.city}, {address.address_line}",
+        "unrestricted_value": f"{address.zipcode}, Russia, {address.city}, {address.address_line}",
+        "data": {
+            "postal_code": address.zipcode,
+            "city": address.city,
+            "street": address.address_line.split(" ")[0],
+            "fias_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "kladr_id": "".join(str(rng.randint(0, 9)) for _ in range(17)),
+            "geo_lat": f"{lat:.6f}",
+            "geo_lon": f"{lon:.6f}",
+            "qc_geo": str(rng.randint(0, 5)),
+        },
+    }
+
+
+def make_person(rng: random.Random, index: int, registration, actual):
+    from apps.persons.models import Person
+
+    person = Person(
+        first_name=rng.choice(FIRST_NAMES),
+        last_name=rng.choice(LAST_NAMES),
+        middle_name=rng.choice(FIRST_NAMES) + "ovich",
+        email=f"person{index}@example.com",
+        sex=rng.randint(0, 1),
+        birthday=_birthday(rng),
+        registration_address=registration,
+        actual_address=actual,
+    )
+    person.full_name = person.compose_full_name()
+    return person
+
+
+def _birthday(rng: random.Random):
+    import datetime
+
+    return datetime.date(1950, 1, 1) + datetime.timedelta(days=rng.randint(0, 365 * 55))
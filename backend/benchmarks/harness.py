@@ -0,0 +1,100 @@
+"""
+Общая обвязка бенчмарков.
+
+Бенчмарк поднимает Django с текущими настройками (DJANGO_SETTINGS_MODULE,
+по умолчанию core.settings) и работает в отдельной тестовой БД
+(test_<NAME>), которая удаляется после прогона. Рабочие данные не трогаются.
+
+Запуск из backend/:
+    python -m benchmarks.<имя> --help
+"""
+
+import contextlib
+import math
+import os
+import time
+
+
+def setup_django() -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+    import django
+
+    django.setup()
+
+
+@contextlib.contextmanager
+def benchmark_database(keepdb: bool = False):
+    """
+    Тестовая БД на время прогона (как у manage.py test).
+    keepdb=True — БД не удаляется и переиспользуется следующим прогоном.
+    """
+    setup_django()
+
+    from django.db import connection
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from core.audit import buffers
+
+    runner = DiscoverRunner(verbosity=0, interactive=False, keepdb=keepdb)
+    setup_test_environment()
+    old_config = runner.setup_databases()
+
+    if connection.vendor == "sqlite":
+        # тестовая SQLite — shared cache в памяти: запись журнала из
+        # второго потока падает с "table is locked", пишем в потоке запроса
+        for buffer in buffers.values():
+            buffer.background = False
+    try:
+        yield
+    finally:
+        # журнал — до удаления БД
+        for buffer in buffers.values():
+            buffer.close()
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def authenticated_client():
+    """
+    APIClient с force_authenticate: в замер не попадает проверка JWT.
+    """
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+
+    user = get_user_model().objects.create_user(email="bench@example.com", password="bench")
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@contextlib.contextmanager
+def timer():
+    """
+    with timer() as elapsed: ...; elapsed() → секунды
+    """
+    started = time.perf_counter()
+    finished = None
+
+    def elapsed() -> float:
+        return (finished or time.perf_counter()) - started
+
+    try:
+        yield elapsed
+    finally:
+        finished = time.perf_counter()
+
+
+def report(name: str, rows: int, seconds: float) -> None:
+    print(f"{name:<32} {rows:>8} rows {seconds:>9.3f} s {rows / seconds:>11.0f} rows/s")
+
+
+def percentile(values: list[float], p: float) -> float:
+    """
+    Перцентиль по ближайшему рангу; values отсортированы.
+    """
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
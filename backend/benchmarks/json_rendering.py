@@ -0,0 +1,93 @@
+"""
+JSON-рендерер и парсер API (core.renderers / core.parsers, orjson)
+против стандартных DRF на реальных данных: страница персон с
+развёрнутыми адресами и payload DaData и тело POST /api/persons/bulk/.
+
+    python -m benchmarks.json_rendering --persons 500 --rounds 200
+
+Данные — из benchmarks.datasets, ответ берётся через API (как его
+видит рендерер в запросе). Заодно проверяется, что байты совпадают.
+"""
+
+import argparse
+import json
+
+from . import datasets
+from .harness import benchmark_database, report, timer
+
+PERSONS_URL = "/api/persons/?page_size={size}&expand=registration_address.dadata,actual_address.dadata"
+
+
+def person_page(size: int):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.post(
+        "/api/auth/login/",
+        {"email": datasets.OPERATOR_EMAIL, "password": datasets.OPERATOR_PASSWORD},
+        format="json",
+    )
+    response = client.get(PERSONS_URL.format(size=size))
+    assert response.status_code == 200, response.content
+    return response.data
+
+
+def bulk_body(data) -> bytes:
+    items = [
+        {key: value for key, value in person.items() if key not in ("id", "created_at", "updated_at")}
+        for person in data["results"]
+    ]
+    return json.dumps(items, ensure_ascii=False).encode()
+
+
+def measure(name: str, rounds: int, rows: int, func) -> float:
+    with timer() as elapsed:
+        for _ in range(rounds):
+            func()
+    seconds = elapsed()
+    report(name, rows * rounds, seconds)
+    return seconds
+
+
+def run(persons: int, rounds: int) -> None:
+    import io
+
+    from rest_framework import parsers, renderers
+
+    from core.parsers import JSONParser
+    from core.renderers import ORJSONRenderer
+
+    datasets.generate(persons)
+    data = person_page(persons)
+    rows = len(data["results"])
+
+    stock_bytes = renderers.JSONRenderer().render(data)
+    fast_bytes = ORJSONRenderer().render(data)
+    print(f"page: {rows} persons, {len(stock_bytes) / 1024:.0f} kB, identical: {stock_bytes == fast_bytes}")
+
+    stock = measure("render (DRF json)", rounds, rows, lambda: renderers.JSONRenderer().render(data))
+    fast = measure("render (orjson)", rounds, rows, lambda: ORJSONRenderer().render(data))
+    print(f"render speedup: {stock / fast:.1f}x")
+
+    body = bulk_body(data)
+    context = {"encoding": "utf-8"}
+    stock_parsed = parsers.JSONParser().parse(io.BytesIO(body), None, context)
+    print(f"bulk body: {len(body) / 1024:.0f} kB, identical: {stock_parsed == JSONParser().parse(io.BytesIO(body), None, context)}")
+
+    stock = measure("parse (DRF json)", rounds, rows, lambda: parsers.JSONParser().parse(io.BytesIO(body), None, context))
+    fast = measure("parse (orjson)", rounds, rows, lambda: JSONParser().parse(io.BytesIO(body), None, context))
+    print(f"parse speedup: {stock / fast:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--persons", type=int, default=500, help="page size, max 500")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        run(min(args.persons, 500), args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Пропускная способность логина: прежний двухпроходный validate()
+(check_password + authenticate()) против текущего однопроходного,
+и async-вариант (avalidate) с --concurrency одновременными логинами
+в одном event loop — хэш в пуле core.concurrency.
+
+    python -m benchmarks.login --logins 50 --concurrency 8
+
+Хэшер — из настроек (PBKDF2 по умолчанию), т.е. цена как в проде.
+"""
+
+import argparse
+import asyncio
+
+from .harness import benchmark_database, report, timer
+
+EMAIL = "login-bench@example.com"
+PASSWORD = "login-bench-password"
+
+
+def legacy_serializer_class():
+    """
+    validate() до однопроходного логина — для сравнения.
+    """
+    from django.contrib.auth import get_user_model
+    from rest_framework import serializers
+    from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+    User = get_user_model()
+
+    class LegacyTokenObtainPairSerializer(TokenObtainPairSerializer):
+        def validate(self, attrs):
+            try:
+                user = User.objects.get(email=attrs["email"])
+            except User.DoesNotExist:
+                raise serializers.ValidationError("Invalid email or password")
+            if not user.check_password(attrs["password"]):
+                raise serializers.ValidationError("Invalid email or password")
+            attrs["username"] = user.email
+            return super().validate(attrs)
+
+    return LegacyTokenObtainPairSerializer
+
+
+def measure(name: str, serializer_class, logins: int) -> float:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries, timer() as elapsed:
+        for _ in range(logins):
+            serializer = serializer_class(data={"email": EMAIL, "password": PASSWORD})
+            assert serializer.is_valid(), serializer.errors
+    seconds = elapsed()
+
+    report(name, logins, seconds)
+    print(f"{'':<32} {len(queries.captured_queries) / logins:.1f} queries/login")
+    return logins / seconds
+
+
+def measure_async(logins: int, concurrency: int) -> float:
+    from apps.users.auth import CustomTokenObtainPairSerializer
+
+    async def login(semaphore):
+        async with semaphore:
+            await CustomTokenObtainPairSerializer().avalidate({"email": EMAIL, "password": PASSWORD})
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(login(semaphore) for _ in range(logins)))
+
+    with timer() as elapsed:
+        asyncio.run(main())
+    seconds = elapsed()
+
+    report(f"login (async, {concurrency} concurrent)", logins, seconds)
+    return logins / seconds
+
+
+def run(logins: int, concurrency: int) -> None:
+    from django.contrib.auth import get_user_model
+
+    from apps.users.auth import CustomTokenObtainPairSerializer
+
+    get_user_model().objects.create_user(email=EMAIL, password=PASSWORD)
+
+    legacy = measure("login (check + authenticate)", legacy_serializer_class(), logins)
+    single = measure("login (single pass)", CustomTokenObtainPairSerializer, logins)
+
+    print(f"speedup: {single / legacy:.1f}x")
+
+    concurrent = measure_async(logins, concurrency)
+    print(f"async vs legacy: {concurrent / legacy:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        run(args.logins, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
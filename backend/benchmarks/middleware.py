@@ -0,0 +1,125 @@
+"""
+Накладные расходы middleware на запрос к API: прежний MIDDLEWARE
+(session / CSRF / auth / messages на каждом запросе) против текущего,
+где /api/ этот стек пропускает (core/middleware.py), и цена
+MetricsMiddleware с выключенным и включённым сэмплированием.
+
+    python -m benchmarks.middleware --requests 20000
+
+Замеряется только цепочка middleware вокруг пустой view: запрос
+GET /api/persons/ с access-cookie и cookie сессии админки
+(сотрудник, который держит открытой и админку, и фронт).
+"""
+
+import argparse
+
+from .harness import benchmark_database, report, timer
+
+FULL_MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "corsheaders.middleware.CorsMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+
+def build_chain(middleware: list[str]):
+    """
+    Цепочка middleware вокруг пустой view — как в BaseHandler.load_middleware,
+    без URL-резолвинга и DRF, чтобы замерялись только middleware.
+    """
+    from django.http import HttpResponse
+    from django.utils.module_loading import import_string
+
+    def view(request):
+        return HttpResponse(b"{}", content_type="application/json")
+
+    view_hooks = []
+
+    def resolve(request):
+        # process_view вызывает обработчик, а не сама цепочка — повторяем это
+        for hook in view_hooks:
+            response = hook(request, view, (), {})
+            if response is not None:
+                return response
+        return view(request)
+
+    handler = resolve
+    for path in reversed(middleware):
+        instance = import_string(path)(handler)
+        if hasattr(instance, "process_view"):
+            view_hooks.insert(0, instance.process_view)
+        handler = instance
+
+    return handler
+
+
+def make_requests(user, count: int) -> list:
+    from django.conf import settings
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.test import RequestFactory
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    session = SessionStore()
+    session["_auth_user_id"] = str(user.pk)
+    session.create()  # sessionid, как у сотрудника, открывшего админку
+
+    factory = RequestFactory()
+    factory.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+    factory.cookies[settings.JWT_ACCESS_COOKIE] = str(AccessToken.for_user(user))
+    return [factory.get("/api/persons/") for _ in range(count)]
+
+
+def measure(name: str, middleware: list[str], user, requests: int) -> float:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    chain = build_chain(middleware)
+    batch = make_requests(user, requests)
+
+    with CaptureQueriesContext(connection) as queries, timer() as elapsed:
+        for request in batch:
+            chain(request)
+    seconds = elapsed()
+
+    report(name, requests, seconds)
+    print(f"{'':<32} {seconds / requests * 1e6:.1f} us/request, "
+          f"{len(queries.captured_queries) / requests:.1f} queries/request")
+    return seconds / requests
+
+
+def run(requests: int) -> None:
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test.utils import override_settings
+
+    user = get_user_model().objects.create_user(email="mw-bench@example.com", password="x", is_staff=True)
+
+    lean = list(settings.MIDDLEWARE)
+    no_metrics = [path for path in lean if path != "core.metrics.MetricsMiddleware"]
+
+    full = measure("api request (full stack)", FULL_MIDDLEWARE, user, requests)
+    bare = measure("api request (lean, no metrics)", no_metrics, user, requests)
+    off = measure("api request (lean, metrics off)", lean, user, requests)
+    with override_settings(METRICS_SAMPLE_RATE=1):
+        sampled = measure("api request (lean, sampled)", lean, user, requests)
+
+    print(f"lean vs full: saved {(full - bare) * 1e6:.0f} us/request ({full / bare:.2f}x)")
+    print(f"metrics off: +{(off - bare) * 1e6:.1f} us/request, sampled: +{(sampled - bare) * 1e6:.1f} us/request")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        run(args.requests)
+
+
+if __name__ == "__main__":
+    main()
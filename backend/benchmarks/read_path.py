@@ -0,0 +1,103 @@
+"""
+Быстрый путь чтения (apps/persons/readpath.py) против PersonSerializer:
+- «serialize» — только построение ответа из уже прочитанных строк
+  (экземпляры моделей → serializer.data против values() → план)
+- «request» — GET /api/persons/ целиком, с запросом к БД и рендером
+
+    python -m benchmarks.read_path --persons 500 --rounds 50
+
+Данные — benchmarks.datasets; кэш ответов выключен.
+"""
+
+import argparse
+
+from . import datasets
+from .harness import benchmark_database, report, timer
+
+VARIANTS = {
+    "compact": "",
+    "addresses": "registration_address,actual_address",
+    "dadata": "registration_address.dadata,actual_address.dadata",
+}
+
+
+def serialize(name: str, expand: str, persons: int, rounds: int) -> None:
+    from apps.persons.fieldsets import parse_field_list, projection
+    from apps.persons.models import Person
+    from apps.persons.readpath import compile_read_plan
+    from apps.persons.serializers import PersonSerializer
+
+    kwargs = {"expand": parse_field_list(expand), "compact": True}
+    serializer = PersonSerializer(**kwargs)
+    only, related = projection(serializer)
+    plan = compile_read_plan(serializer)
+
+    instances = list(Person.objects.select_related(*related).only(*only)[:persons])
+    rows = list(Person.objects.values(*plan.columns)[:persons])
+    assert [dict(item) for item in PersonSerializer(instances, many=True, **kwargs).data] == plan.render(rows)
+
+    with timer() as elapsed:
+        for _ in range(rounds):
+            PersonSerializer(instances, many=True, **kwargs).data
+    stock = elapsed()
+    report(f"serialize {name} (serializer)", persons * rounds, stock)
+
+    with timer() as elapsed:
+        for _ in range(rounds):
+            plan.render(rows)
+    fast = elapsed()
+    report(f"serialize {name} (values plan)", persons * rounds, fast)
+    print(f"{'':<32} speedup {stock / fast:.1f}x")
+
+
+def request(name: str, expand: str, persons: int, rounds: int) -> None:
+    from unittest import mock
+
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+
+    from apps.persons.readpath import ProjectedReadMixin
+
+    client = APIClient()
+    client.post(
+        "/api/auth/login/",
+        {"email": datasets.OPERATOR_EMAIL, "password": datasets.OPERATOR_PASSWORD},
+        format="json",
+    )
+    url = f"/api/persons/?page_size={persons}&expand={expand}"
+
+    results = {}
+    with override_settings(PERSONS_RESPONSE_CACHE_TTL=0):
+        for projected in (False, True):
+            with mock.patch.object(ProjectedReadMixin, "projected_reads", projected), timer() as elapsed:
+                for _ in range(rounds):
+                    response = client.get(url)
+                    assert response.status_code == 200
+            results[projected] = (elapsed(), response.content)
+            label = "values plan" if projected else "serializer"
+            report(f"request {name} ({label})", persons * rounds, results[projected][0])
+
+    assert results[False][1] == results[True][1], "responses differ"
+    print(f"{'':<32} speedup {results[False][0] / results[True][0]:.1f}x")
+
+
+def run(persons: int, rounds: int) -> None:
+    datasets.generate(persons)
+    for name, expand in VARIANTS.items():
+        serialize(name, expand, persons, rounds)
+    for name, expand in VARIANTS.items():
+        request(name, expand, persons, rounds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--persons", type=int, default=500, help="page size, max 500")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        run(min(args.persons, 500), args.rounds)
+
+
+if __name__ == "__main__":
+    main()
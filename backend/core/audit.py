@@ -0,0 +1,265 @@
+"""
+Журнал изменений: кто действует и отложенная (write-behind) запись.
+
+- acting_as(user) / AuditActorMixin — пользователь, от имени которого
+  идёт запрос; записи журнала берут его из contextvar, модели и
+  bulk-функции не знают про request
+- WriteBehindBuffer — ограниченная очередь в процессе и фоновый поток,
+  который пишет её пачками. Запрос только кладёт записи в очередь
+  (после COMMIT, см. transaction.on_commit у вызывающего), INSERT'ы
+  журнала не добавляются ко времени ответа
+
+Backpressure: очередь ограничена AUDIT_QUEUE_SIZE. Если писатель не
+успевает и очередь полна дольше AUDIT_ENQUEUE_TIMEOUT, вызывающий поток
+пишет свои записи сам, синхронно: запросы замедляются до скорости БД,
+записи не теряются.
+
+Не теряются и при штатной остановке процесса (atexit дописывает
+очередь). При падении процесса записи, ещё не дошедшие до БД, теряются:
+журнал — не источник истины для данных.
+"""
+
+import atexit
+import contextlib
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+_actor: contextvars.ContextVar = contextvars.ContextVar("audit_actor", default=None)
+
+# name → буфер, для /api/_metrics и остановки процесса
+buffers: dict[str, "WriteBehindBuffer"] = {}
+
+
+# =========================
+# ACTOR
+# =========================
+
+def current_actor():
+    """
+    Пользователь текущего запроса или None (команды, фоновые задачи).
+    """
+    return _actor.get()
+
+
+@contextlib.contextmanager
+def acting_as(user):
+    token = _actor.set(user if user is not None and user.is_authenticated else None)
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+class AuditActorMixin:
+    """
+    Viewset: request.user — автор изменений, сделанных в этом запросе.
+    Ставится в initial() (после аутентификации) и действует до
+    finalize_response(), как реплика у ReplicaReadMixin.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        user = request.user
+        self._actor_token = _actor.set(user if user.is_authenticated else None)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = self.__dict__.pop("_actor_token", None)
+        if token is not None:
+            _actor.reset(token)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+# =========================
+# WRITE-BEHIND
+# =========================
+
+class WriteBehindBuffer:
+    """
+    write(items) — запись пачки (bulk_create); вызывается из фонового
+    потока пачками до batch_size, не реже раза в flush_interval секунд.
+
+    background=False — без потока: записи копятся до flush()
+    (тесты, management-команды).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        write,
+        max_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        put_timeout: float = 0.5,
+        background: bool = True,
+    ):
+        self.name = name
+        self.write = write
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.background = background
+
+        self.written = 0
+        self.batches = 0
+        self.overflows = 0
+        self.failed = 0
+
+        self._lock = threading.Lock()
+        self._reset()
+        buffers[name] = self
+
+    def _reset(self) -> None:
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_size)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid = os.getpid()
+
+    # =========================
+    # PRODUCER
+    # =========================
+
+    def put_many(self, items: list) -> None:
+        """
+        В очередь; что не влезло за put_timeout — записать здесь же.
+        """
+        if not items:
+            return
+        self._ensure_started()
+
+        overflow = []
+        for index, item in enumerate(items):
+            try:
+                self._queue.put(item, timeout=self.put_timeout)
+            except queue.Full:
+                overflow = items[index:]
+                break
+
+        if overflow:
+            with self._lock:
+                self.overflows += len(overflow)
+            logger.warning("%s queue full: writing %d items synchronously", self.name, len(overflow))
+            self._write(overflow)
+
+    def _ensure_started(self) -> None:
+        if not self.background:
+            return
+
+        with self._lock:
+            # после fork (gunicorn --preload) потока в дочернем процессе нет,
+            # а очередь могла быть скопирована с захваченной блокировкой
+            if self._pid != os.getpid():
+                self._reset()
+
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+
+    # =========================
+    # WRITER
+    # =========================
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # как request_started / request_finished: до пачки соединение потока
+            # живое и не старше CONN_MAX_AGE, после — закрыто (с пулом и
+            # CONN_MAX_AGE=0 — возвращено в пул), а не занято до следующей пачки
+            close_old_connections()
+            try:
+                self._write(batch)
+            finally:
+                close_old_connections()
+                for _ in batch:
+                    self._queue.task_done()
+
+        connections.close_all()
+
+    def _write(self, items: list) -> None:
+        try:
+            self.write(items)
+        except Exception:
+            with self._lock:
+                self.failed += len(items)
+            logger.exception("%s: failed to write %d items", self.name, len(items))
+            return
+
+        with self._lock:
+            self.written += len(items)
+            self.batches += 1
+
+    # =========================
+    # CONTROL
+    # =========================
+
+    def flush(self) -> None:
+        """
+        Записать всё, что в очереди, в текущем потоке.
+        """
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def join(self) -> None:
+        """
+        Дождаться, пока фоновый поток запишет всё, что уже в очереди.
+        """
+        self._queue.join()
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "max_size": self.max_size,
+            "written": self.written,
+            "batches": self.batches,
+            "overflows": self.overflows,
+            "failed": self.failed,
+        }
+
+
+@atexit.register
+def _close_buffers() -> None:
+    for buffer in list(buffers.values()):
+        if buffer._pid == os.getpid():
+            buffer.close()
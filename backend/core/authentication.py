@@ -1,16 +1,257 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException, AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+# =========================
+# TOKEN CACHE
+# =========================
+
+class TokenUserCache:
+    """
+    Ограниченный LRU-кэш с TTL: access token → (user, validated_token).
+
+    - Попадание = ни проверки подписи, ни SELECT из users_user
+    - Запись живёт min(TTL, до exp токена)
+    - invalidate_user() сбрасывает все токены пользователя
+      (вызывается на post_save / post_delete модели User)
+
+    Кэш локален для процесса: сигналы видят только изменения,
+    сделанные в этом же процессе, в остальных воркерах запись
+    устаревает не дольше чем через TTL.
+
+    Запросы получают свою копию пользователя (copy.copy модели —
+    отдельные __dict__ и _state): запись атрибутов, refresh_from_db()
+    и закэшированные связи в одном запросе не видны другим.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries: OrderedDict[str, tuple[float, object, object]] = OrderedDict()
+        self._tokens_by_user: dict[object, set[str]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, token: str):
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._discard(token)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return copy.copy(entry[1]), entry[2]
+
+    def set(self, token: str, user, validated_token, expires_at: float | None = None) -> None:
+        """
+        expires_at — unix time окончания токена (claim exp).
+        """
+        if not self.enabled:
+            return
+
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._discard(token)
+            self._entries[token] = (time.monotonic() + ttl, copy.copy(user), validated_token)
+            self._tokens_by_user.setdefault(user.pk, set()).add(token)
+
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_user(self, user_id) -> None:
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._discard(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _discard(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+
+        user_id = entry[1].pk
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+_cache_settings = getattr(settings, "JWT_AUTH_CACHE", {})
+
+token_cache = TokenUserCache(
+    max_size=_cache_settings.get("MAX_SIZE", 10_000),
+    ttl=_cache_settings.get("TTL", 60),
+)
+
 
+def _invalidate_user(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+    # и после COMMIT: параллельный запрос мог успеть закэшировать
+    # ещё не закоммиченную (старую) версию
+    transaction.on_commit(lambda: token_cache.invalidate_user(instance.pk))
+
+
+post_save.connect(_invalidate_user, sender=settings.AUTH_USER_MODEL, weak=False)
+post_delete.connect(_invalidate_user, sender=settings.AUTH_USER_MODEL, weak=False)
+
+
+# =========================
+# AUTHENTICATION
+# =========================
 
 class CookieJWTAuthentication(JWTAuthentication):
-    def authenticate(self, request):
+    """
+    JWT из заголовка Authorization или из access-cookie.
+
+    Проверенные токены и их пользователи кэшируются (см. TokenUserCache):
+    повторный запрос с тем же токеном обходится без запросов к БД.
+    """
+
+    def get_request_token(self, request) -> str | None:
         header = self.get_header(request)
         if header is not None:
-            return super().authenticate(request)
+            raw_token = self.get_raw_token(header)
+        else:
+            raw_token = request.COOKIES.get(settings.JWT_ACCESS_COOKIE)
 
-        raw_token = request.COOKIES.get(settings.JWT_ACCESS_COOKIE)
         if not raw_token:
             return None
 
-        request.META["HTTP_AUTHORIZATION"] = f"Bearer {raw_token}"
-        return super().authenticate(request)
+        return raw_token.decode() if isinstance(raw_token, bytes) else raw_token
+
+    def authenticate(self, request):
+        raw_token = self.get_request_token(request)
+        if raw_token is None:
+            return None
+
+        cached = token_cache.get(raw_token)
+        if cached is not None:
+            return cached
+
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_user(validated_token)
+
+        token_cache.set(raw_token, user, validated_token, expires_at=validated_token.get("exp"))
+        return user, validated_token
+
+    # =========================
+    # ASYNC
+    # =========================
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() для async-views: пользователь — через async ORM.
+        Проверка подписи (HMAC) — микросекунды, выполняется на месте.
+        """
+        raw_token = self.get_request_token(request)
+        if raw_token is None:
+            return None
+
+        cached = token_cache.get(raw_token)
+        if cached is not None:
+            return cached
+
+        validated_token = self.get_validated_token(raw_token)
+        user = await self.aget_user(validated_token)
+
+        token_cache.set(raw_token, user, validated_token, expires_at=validated_token.get("exp"))
+        return user, validated_token
+
+    async def aget_user(self, validated_token):
+        """
+        get_user() (simplejwt) с aget() вместо get(); проверки те же.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+async def aauthenticate_request(request) -> None:
+    """
+    rest_framework.request.Request._authenticate() для async-views:
+    те же authenticators по порядку, тот же результат в request.user /
+    request.auth / successful_authenticator. aauthenticate() —
+    если он есть у authenticator'а, иначе authenticate() в потоке.
+    """
+    for authenticator in request.authenticators:
+        try:
+            if hasattr(authenticator, "aauthenticate"):
+                user_auth_tuple = await authenticator.aauthenticate(request)
+            else:
+                user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+        except APIException:
+            request._not_authenticated()
+            raise
+
+        if user_auth_tuple is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth_tuple
+            return
+
+    request._not_authenticated()
@@ -0,0 +1,42 @@
+"""
+Ограниченный пул потоков для CPU-работы: async-views (хэширование
+паролей, подпись JWT) и массовое заведение пользователей.
+
+PBKDF2 (hashlib) и HMAC отпускают GIL, поэтому потоки дают настоящий
+параллелизм, а event loop не блокируется на ~100 мс на каждый логин.
+Размер пула ограничивает одновременные хэширования на процесс:
+остальные ждут в очереди, не отнимая CPU у других запросов.
+
+В пуле — только чистые вычисления, без ORM: соединения с БД
+привязаны к потоку.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def cpu_workers() -> int:
+    return getattr(settings, "CPU_POOL_WORKERS", None) or min(4, os.cpu_count() or 1)
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=cpu_workers(), thread_name_prefix="cpu")
+
+    return _executor
+
+
+async def run_cpu(func, *args, **kwargs):
+    """
+    await run_cpu(check_password, raw, encoded) — func(*args) в пуле.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), functools.partial(func, *args, **kwargs))
@@ -0,0 +1,134 @@
+"""
+PostgreSQL (psycopg2) с пулом соединений (core.db.pool).
+
+    DATABASES["default"] = {
+        "ENGINE": "core.db.backends.postgresql_pool",
+        ...,
+        "CONN_MAX_AGE": 0,   # вернуть соединение в пул в конце запроса
+        "POOL": {"MAX_SIZE": 20, "TIMEOUT": 5, ...},
+    }
+
+Django по-прежнему «открывает» и «закрывает» соединение на каждый
+запрос, но get_new_connection() берёт его из пула, а _close()
+возвращает, сбросив состояние сессии (_reset). Настройка сессии
+(time zone, role, autocommit) делается Django заново при каждой выдаче.
+"""
+
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import DatabaseCreation as BaseDatabaseCreation
+from psycopg2 import extensions, extras
+
+from core.db.pool import ConnectionPool, PoolTimeout, close_pools, get_pool, pool_key
+
+POOL_DEFAULTS = {
+    "MAX_SIZE": 10,
+    "TIMEOUT": 5,
+    "MAX_LIFETIME": 1800,
+    "MAX_IDLE": 600,
+    "CHECK_AFTER": 10,
+}
+
+
+def _check(connection) -> bool:
+    if connection.closed:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    return True
+
+
+def _reset(connection) -> None:
+    """
+    Незавершённая транзакция (ошибка посреди запроса) откатывается,
+    затем DISCARD ALL: SET-параметры, временные таблицы, advisory
+    locks, prepared statements, LISTEN запроса не достаются следующему.
+    Сломанное соединение — исключение, пул его закроет.
+
+    DISCARD ALL нельзя внутри транзакции — выполняется в autocommit;
+    атрибуты psycopg2 (autocommit, isolation_level) не меняются, в
+    отличие от connection.reset().
+    """
+    if connection.closed:
+        raise base.Database.InterfaceError("connection already closed")
+    if connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+    autocommit = connection.autocommit
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("DISCARD ALL")
+    finally:
+        connection.autocommit = autocommit
+
+
+class DatabaseCreation(BaseDatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # свободные соединения пула держат тестовую БД — DROP не пройдёт
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params: dict) -> ConnectionPool:
+        options = {**POOL_DEFAULTS, **self.settings_dict.get("POOL", {})}
+
+        def factory():
+            return ConnectionPool(
+                lambda: self._connect(conn_params),
+                max_size=options["MAX_SIZE"],
+                timeout=options["TIMEOUT"],
+                max_lifetime=options["MAX_LIFETIME"],
+                max_idle=options["MAX_IDLE"],
+                check_after=options["CHECK_AFTER"],
+                check=_check,
+                reset=_reset,
+            )
+
+        return get_pool(pool_key(self.alias, self.settings_dict), factory)
+
+    def get_new_connection(self, conn_params):
+        if self.alias == NO_DB_ALIAS:
+            # служебные соединения к БД postgres (создание тестовой БД) — мимо пула
+            return super().get_new_connection(conn_params)
+
+        pool = self.get_pool(conn_params)
+        try:
+            connection = pool.acquire()
+        except PoolTimeout as exc:
+            raise base.Database.OperationalError(str(exc)) from exc
+
+        self.isolation_level = self._isolation_level()
+        self._pool = pool
+        return connection
+
+    def _close(self):
+        pool = self.__dict__.pop("_pool", None)
+        if pool is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            pool.release(self.connection)
+
+    # =========================
+    # INTERNAL
+    # =========================
+
+    def _isolation_level(self):
+        # то же, что выставляет base.get_new_connection()
+        level = self.settings_dict["OPTIONS"].get("isolation_level")
+        return base.IsolationLevel.READ_COMMITTED if level is None else base.IsolationLevel(level)
+
+    def _connect(self, conn_params):
+        """
+        Новое физическое соединение — как base.get_new_connection(),
+        но без записи в self: фабрику пула вызывают из разных потоков.
+        """
+        connection = self.Database.connect(**conn_params)
+        if self.settings_dict["OPTIONS"].get("isolation_level") is not None:
+            connection.isolation_level = self._isolation_level()
+        extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
@@ -0,0 +1,329 @@
+"""
+Пул соединений с БД на процесс.
+
+Django 4.2 умеет только «одно соединение на поток» (CONN_MAX_AGE):
+под ASGI каждый запрос идёт в своём потоке, и такие соединения
+копятся. Пул отдаёт соединение на время запроса и забирает его
+обратно на request_finished (CONN_MAX_AGE=0), так что физических
+соединений не больше MAX_SIZE ни под WSGI, ни под ASGI.
+
+psycopg2.pool не подходит: при исчерпании сразу бросает PoolError
+(ожидания с таймаутом нет), не проверяет соединения и не ведёт статистику.
+
+Пул ничего не знает о драйвере: connect / check / reset / close —
+функции бэкенда (core/db/backends/postgresql_pool).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """
+    Свободное соединение не появилось за timeout секунд.
+    """
+
+
+class _Entry:
+    __slots__ = ("connection", "created_at", "last_used")
+
+    def __init__(self, connection, now: float):
+        self.connection = connection
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул с ограничением размера.
+
+    - max_size — максимум открытых соединений (занятых + свободных)
+    - timeout — сколько acquire() ждёт свободное соединение
+    - max_lifetime — соединение старше этого закрывается при возврате
+    - max_idle — простаивающее дольше этого закрывается
+    - check_after — соединение, простоявшее дольше этого, перед выдачей
+      проверяется check(); сломанное закрывается и заменяется
+
+    Свободные соединения выдаются LIFO: в работе остаются «тёплые»,
+    лишние простаивают и закрываются по max_idle.
+
+    После fork (gunicorn --preload) унаследованные соединения
+    забываются без закрытия: сокет общий с родителем.
+    """
+
+    def __init__(
+        self,
+        connect,
+        *,
+        max_size: int = 10,
+        timeout: float = 5.0,
+        max_lifetime: float = 1800,
+        max_idle: float = 600,
+        check_after: float = 10,
+        check=None,
+        reset=None,
+        close=None,
+    ):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self.check = check
+        self.reset = reset
+        self._close_connection = close or (lambda connection: connection.close())
+
+        self._idle: deque[_Entry] = deque()
+        self._in_use: dict[int, _Entry] = {}
+        self._size = 0
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+
+        self.requests = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.created = 0
+        self.closed = 0
+        self.check_failures = 0
+        self.wait_seconds = 0.0
+
+    # =========================
+    # ACQUIRE / RELEASE
+    # =========================
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        with self._cond:
+            self._after_fork()
+            self.requests += 1
+
+        waited = False
+        while True:
+            entry, create = self._take(deadline, waited)
+            waited = True
+
+            if create:
+                return self._create(started)
+
+            if self._usable(entry):
+                with self._cond:
+                    self._in_use[id(entry.connection)] = entry
+                    self.wait_seconds += time.monotonic() - started
+                return entry.connection
+
+            self._discard(entry)
+            with self._cond:
+                self.check_failures += 1
+
+    def release(self, connection, discard: bool = False) -> None:
+        """
+        Вернуть соединение. discard=True или ошибка reset() — закрыть.
+        """
+        with self._cond:
+            self._after_fork()
+            entry = self._in_use.pop(id(connection), None)
+
+        if entry is None:
+            # соединение не из пула (или выдано до fork) — просто закрываем
+            self._close(connection)
+            return
+
+        now = time.monotonic()
+        if not discard and now - entry.created_at < self.max_lifetime:
+            try:
+                if self.reset is not None:
+                    self.reset(connection)
+            except Exception:
+                discard = True
+        else:
+            discard = True
+
+        if discard:
+            self._discard(entry)
+            return
+
+        entry.last_used = now
+        with self._cond:
+            self._idle.append(entry)
+            stale = self._pop_stale(now)
+            self._cond.notify()
+
+        for entry in stale:
+            self._discard(entry)
+
+    def close_all(self) -> None:
+        """
+        Закрыть свободные соединения; занятые закроются при возврате.
+        """
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            for entry in self._in_use.values():
+                entry.created_at = float("-inf")  # не вернётся в пул
+
+        for entry in idle:
+            self._discard(entry)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "requests": self.requests,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "closed": self.closed,
+                "check_failures": self.check_failures,
+                "wait_seconds": round(self.wait_seconds, 6),
+            }
+
+    # =========================
+    # INTERNAL
+    # =========================
+
+    def _take(self, deadline: float, waited: bool) -> tuple[_Entry | None, bool]:
+        """
+        (свободное соединение, None) или (None, True) — можно открыть новое.
+        Ждёт до deadline, иначе PoolTimeout.
+        """
+        with self._cond:
+            while True:
+                stale = self._pop_stale(time.monotonic())
+                if stale:
+                    self._size -= len(stale)
+                    self.closed += len(stale)
+
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    entry = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available within {self.timeout}s "
+                        f"({self._size}/{self.max_size} in use)"
+                    )
+
+                if not waited:
+                    self.waits += 1
+                    waited = True
+                self._cond.wait(remaining)
+
+        for old in stale:
+            self._close(old.connection)
+
+        return entry, entry is None
+
+    def _create(self, started: float):
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        now = time.monotonic()
+        with self._cond:
+            self._in_use[id(connection)] = _Entry(connection, now)
+            self.created += 1
+            self.wait_seconds += now - started
+        return connection
+
+    def _usable(self, entry: _Entry) -> bool:
+        if self.check is None or time.monotonic() - entry.last_used < self.check_after:
+            return True
+        try:
+            return bool(self.check(entry.connection))
+        except Exception:
+            return False
+
+    def _pop_stale(self, now: float) -> list[_Entry]:
+        """
+        Под замком: снять с начала очереди (самые давние) простоявшие
+        дольше max_idle. Закрывает и уменьшает размер вызывающий.
+        """
+        stale = []
+        while self._idle and now - self._idle[0].last_used > self.max_idle:
+            stale.append(self._idle.popleft())
+        return stale
+
+    def _discard(self, entry: _Entry) -> None:
+        self._close(entry.connection)
+        with self._cond:
+            self._size -= 1
+            self.closed += 1
+            self._cond.notify()
+
+    def _close(self, connection) -> None:
+        try:
+            self._close_connection(connection)
+        except Exception:
+            pass
+
+    def _after_fork(self) -> None:
+        # под замком
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._idle.clear()
+        self._in_use.clear()
+        self._size = 0
+
+
+# =========================
+# REGISTRY
+# =========================
+
+_pools: dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def pool_key(alias: str, settings_dict: dict) -> tuple:
+    # тестовый раннер меняет NAME у того же alias — это другой пул
+    return (alias, settings_dict.get("HOST"), settings_dict.get("PORT"),
+            settings_dict.get("NAME"), settings_dict.get("USER"))
+
+
+def get_pool(key: tuple, factory) -> ConnectionPool:
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = factory()
+    return pool
+
+
+def close_pools(name: str | None = None) -> None:
+    """
+    Закрыть пулы (все или к базе name) — перед DROP тестовой БД.
+    """
+    with _pools_lock:
+        keys = [key for key in _pools if name is None or key[3] == name]
+        pools = [_pools.pop(key) for key in keys]
+    for pool in pools:
+        pool.close_all()
+
+
+def pool_stats() -> dict:
+    """
+    {alias: stats()} пулов этого процесса.
+    """
+    with _pools_lock:
+        items = list(_pools.items())
+    return {key[0]: pool.stats() for key, pool in items}
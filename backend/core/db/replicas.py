@@ -0,0 +1,165 @@
+"""
+Чтение с реплик.
+
+- ReplicaReadMixin (viewset) на безопасных запросах выбирает реплику
+  и направляет на неё все чтения запроса (через ReplicaRouter
+  и queryset.using())
+- клиент, недавно что-то записавший, читает с primary: cookie
+  ставит ReplicaStickinessMiddleware, окно — REPLICA_STICKY_SECONDS
+- реплика с отставанием больше REPLICA_MAX_LAG (или недоступная)
+  пропускается; отставание проверяется не чаще раза в
+  REPLICA_LAG_CHECK_INTERVAL секунд на процесс
+
+Если реплик нет (REPLICA_DATABASES пуст) или все отстают — всё идёт в default.
+"""
+
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+_read_db: contextvars.ContextVar[str | None] = contextvars.ContextVar("read_db", default=None)
+
+# alias → (время проверки, отставание в секундах или None, если недоступна)
+_lag_cache: dict[str, tuple[float, float | None]] = {}
+_lag_lock = threading.Lock()
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def replica_aliases() -> list[str]:
+    return list(getattr(settings, "REPLICA_DATABASES", []))
+
+
+def current_read_db() -> str | None:
+    return _read_db.get()
+
+
+# =========================
+# LAG
+# =========================
+
+def measure_lag(alias: str) -> float | None:
+    """
+    Отставание реплики в секундах; None — реплика недоступна.
+    Не PostgreSQL (локальная проверка на SQLite) — 0.
+    """
+    try:
+        connection = connections[alias]
+        if connection.vendor != "postgresql":
+            return 0.0
+        with connection.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except (DatabaseError, KeyError) as exc:
+        logger.warning("Replica %s unavailable: %s", alias, exc)
+        return None
+
+
+def replica_lag(alias: str) -> float | None:
+    """
+    measure_lag() с кэшем на REPLICA_LAG_CHECK_INTERVAL секунд.
+    """
+    interval = getattr(settings, "REPLICA_LAG_CHECK_INTERVAL", 2)
+    now = time.monotonic()
+
+    cached = _lag_cache.get(alias)
+    if cached is not None and now - cached[0] < interval:
+        return cached[1]
+
+    lag = measure_lag(alias)
+    with _lag_lock:
+        _lag_cache[alias] = (now, lag)
+    return lag
+
+
+def choose_replica() -> str | None:
+    """
+    Случайная реплика из достаточно свежих; None — читать с default.
+    """
+    max_lag = getattr(settings, "REPLICA_MAX_LAG", 5)
+
+    fresh = []
+    for alias in replica_aliases():
+        lag = replica_lag(alias)
+        if lag is not None and lag <= max_lag:
+            fresh.append(alias)
+
+    return random.choice(fresh) if fresh else None
+
+
+# =========================
+# STICKINESS
+# =========================
+
+def is_pinned(request) -> bool:
+    """
+    Клиент записывал в последние REPLICA_STICKY_SECONDS секунд.
+    """
+    value = request.COOKIES.get(settings.REPLICA_STICKY_COOKIE)
+    try:
+        return value is not None and float(value) > time.time()
+    except ValueError:
+        return False
+
+
+# =========================
+# VIEWSET
+# =========================
+
+class ReplicaReadMixin:
+    """
+    GET / HEAD / OPTIONS — с реплики (если клиент не «прилип» к primary).
+
+    Реплика выбирается в initial() (после аутентификации: пользователь
+    из JWT читается с primary) и действует до finalize_response().
+    get_queryset() дополнительно делает .using(): ленивые querysets
+    потоковых ответов читаются уже после выхода из view.
+    """
+
+    read_db = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.use_read_db(self.choose_read_db(request))
+
+    def choose_read_db(self, request) -> str | None:
+        """
+        Реплика для запроса; может читать отставание с реплики (запрос к БД).
+        """
+        if request.method in SAFE_METHODS and not is_pinned(request):
+            return choose_replica()
+        return None
+
+    def use_read_db(self, alias: str | None) -> None:
+        self.read_db = alias
+        if alias is not None:
+            self._read_db_token = _read_db.set(alias)
+
+    def release_read_db(self) -> None:
+        token = self.__dict__.pop("_read_db_token", None)
+        if token is not None:
+            _read_db.reset(token)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        self.release_read_db()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.read_db is not None:
+            queryset = queryset.using(self.read_db)
+        return queryset
@@ -0,0 +1,29 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from core.db.replicas import current_read_db, replica_aliases
+
+
+class ReplicaRouter:
+    """
+    Чтения — на реплику, выбранную для текущего запроса
+    (ReplicaReadMixin), иначе — как без роутера. Запись — всегда default,
+    в том числе объектов, прочитанных с реплики.
+    """
+
+    def db_for_read(self, model, **hints):
+        return current_read_db()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики — копии default
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
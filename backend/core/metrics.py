@@ -0,0 +1,366 @@
+"""
+Замеры запросов: где уходит время в стеке DRF.
+
+MetricsMiddleware на выбранных запросах (доля METRICS_SAMPLE_RATE)
+собирает:
+- число SQL-запросов и время в БД (execute_wrapper на соединениях)
+- время сериализации (TimedSerializerMixin.to_representation)
+- время рендеринга (core.renderers)
+- общее время запроса
+
+и отдаёт их в заголовке Server-Timing и в гистограммы по endpoint'у
+(имя URL), которые читает GET /api/_metrics (формат Prometheus).
+
+METRICS_SLOW_REQUEST_MS > 0 — замеряются все запросы, а те, что дольше
+порога, пишутся в лог core.metrics вместе с SQL.
+
+Без замера (сэмплирование выключено, медленный лог выключен) запрос
+проходит middleware за одно сравнение, а execute_wrapper и миксины
+сериализатора / рендерера — за одно чтение contextvar.
+
+Метрики — в памяти процесса: каждый воркер отдаёт свои.
+"""
+
+import contextlib
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# секунды; у количества запросов — свои корзины
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+SLOW_LOG_MAX_QUERIES = 100
+
+
+# =========================
+# PER-REQUEST TIMINGS
+# =========================
+
+class RequestTimings:
+    __slots__ = ("started", "queries", "db", "serializer", "render", "sql", "capture_sql", "_depth")
+
+    def __init__(self, capture_sql: bool = False):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.render = 0.0
+        self.sql: list[tuple[float, str]] = []
+        self.capture_sql = capture_sql
+        self._depth = 0
+
+    def add_query(self, sql: str, seconds: float) -> None:
+        self.queries += 1
+        self.db += seconds
+        if self.capture_sql and len(self.sql) < SLOW_LOG_MAX_QUERIES:
+            self.sql.append((seconds, sql))
+
+
+_current: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar("request_timings", default=None)
+
+
+def current_timings() -> RequestTimings | None:
+    return _current.get()
+
+
+@contextlib.contextmanager
+def measure(attr: str):
+    """
+    with measure("serializer"): ... — добавить время блока к замеру запроса.
+    Вложенные блоки (сериализатор адреса внутри персоны) не считаются дважды.
+    """
+    timings = _current.get()
+    if timings is None or timings._depth:
+        yield
+        return
+
+    timings._depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._depth -= 1
+        setattr(timings, attr, getattr(timings, attr) + time.perf_counter() - started)
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(sql, time.perf_counter() - started)
+
+
+def _install_wrapper(connection) -> None:
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install_wrapper(connection)
+
+
+connection_created.connect(_on_connection_created, weak=False)
+
+
+# =========================
+# SERIALIZER
+# =========================
+
+class TimedSerializerMixin:
+    """
+    Время to_representation() — в «serializer» замера запроса.
+    """
+
+    def to_representation(self, instance):
+        if _current.get() is None:
+            return super().to_representation(instance)
+        with measure("serializer"):
+            return super().to_representation(instance)
+
+
+# =========================
+# REGISTRY
+# =========================
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Гистограммы по (method, endpoint) и счётчик запросов по статусу.
+    """
+
+    HISTOGRAMS = {
+        "erp_http_request_duration_seconds": ("total", DURATION_BUCKETS, "Request latency"),
+        "erp_http_db_duration_seconds": ("db", DURATION_BUCKETS, "Time in SQL per request"),
+        "erp_http_db_queries": ("queries", QUERY_BUCKETS, "SQL queries per request"),
+        "erp_http_serializer_duration_seconds": ("serializer", DURATION_BUCKETS, "Serializer time per request"),
+        "erp_http_render_duration_seconds": ("render", DURATION_BUCKETS, "Renderer time per request"),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, str], dict[str, Histogram]] = {}
+        self._requests: dict[tuple[str, str, int], int] = {}
+
+    def observe(self, method: str, endpoint: str, status: int, values: dict) -> None:
+        key = (method, endpoint)
+        with self._lock:
+            histograms = self._histograms.get(key)
+            if histograms is None:
+                histograms = self._histograms[key] = {
+                    name: Histogram(buckets) for name, (_, buckets, _) in self.HISTOGRAMS.items()
+                }
+            for name, (field, _, _) in self.HISTOGRAMS.items():
+                histograms[name].observe(values[field])
+
+            status_key = (method, endpoint, status)
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._requests.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP erp_http_requests_total Sampled requests",
+                "# TYPE erp_http_requests_total counter",
+            ]
+            for (method, endpoint, status), count in sorted(self._requests.items()):
+                lines.append(
+                    f'erp_http_requests_total{{method="{method}",endpoint="{_escape(endpoint)}",status="{status}"}} {count}'
+                )
+
+            for name, (_, _, help_text) in self.HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, endpoint), histograms in sorted(self._histograms.items()):
+                    labels = f'method="{method}",endpoint="{_escape(endpoint)}"'
+                    lines.extend(histograms[name].lines(name, labels))
+
+        lines.extend(_component_lines())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _component_lines() -> list[str]:
+    """
+    Счётчики кэша токенов, пулов соединений и очередей журнала — как gauge.
+    """
+    from core.audit import buffers
+    from core.authentication import token_cache
+    from core.db.pool import pool_stats
+
+    lines = ["# TYPE erp_auth_cache gauge"]
+    for stat, value in token_cache.stats().items():
+        lines.append(f'erp_auth_cache{{stat="{stat}"}} {value}')
+
+    lines.append("# TYPE erp_db_pool gauge")
+    for alias, stats in sorted(pool_stats().items()):
+        for stat, value in stats.items():
+            lines.append(f'erp_db_pool{{alias="{alias}",stat="{stat}"}} {value}')
+
+    lines.append("# TYPE erp_write_behind gauge")
+    for name, buffer in sorted(buffers.items()):
+        for stat, value in buffer.stats().items():
+            lines.append(f'erp_write_behind{{buffer="{name}",stat="{stat}"}} {value}')
+    return lines
+
+
+metrics = MetricsRegistry()
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+
+class MetricsMiddleware:
+    """
+    Первая в MIDDLEWARE: замер охватывает весь стек. Работает и в sync,
+    и в async цепочке (contextvar доходит до sync_to_async-потоков ORM).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        timings = self.start(request)
+        if timings is None:
+            return self.get_response(request)
+
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = self.start(request)
+        if timings is None:
+            return await self.get_response(request)
+
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    @staticmethod
+    def start(request) -> RequestTimings | None:
+        slow_ms = settings.METRICS_SLOW_REQUEST_MS
+        rate = settings.METRICS_SAMPLE_RATE
+
+        if not slow_ms and not (rate and (rate >= 1 or random.random() < rate)):
+            return None
+        if request.path_info == "/api/_metrics":
+            return None
+
+        # соединения, открытые до импорта модуля (в тестах), — тоже с замером
+        for connection in connections.all(initialized_only=True):
+            _install_wrapper(connection)
+
+        return RequestTimings(capture_sql=bool(slow_ms))
+
+    @staticmethod
+    def finish(request, response, timings: RequestTimings):
+        total = time.perf_counter() - timings.started
+        values = {
+            "total": total,
+            "db": timings.db,
+            "queries": timings.queries,
+            "serializer": timings.serializer,
+            "render": timings.render,
+        }
+
+        match = getattr(request, "resolver_match", None)
+        endpoint = match.view_name if match is not None else "unmatched"
+        metrics.observe(request.method, endpoint, response.status_code, values)
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+            f"serializer;dur={timings.serializer * 1000:.1f}",
+            f"render;dur={timings.render * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ])
+
+        slow_ms = settings.METRICS_SLOW_REQUEST_MS
+        if slow_ms and total * 1000 >= slow_ms:
+            _log_slow(request, response, values, timings)
+
+        return response
+
+
+def _log_slow(request, response, values: dict, timings: RequestTimings) -> None:
+    statements = "\n".join(
+        f"  {seconds * 1000:8.1f} ms  {sql}"
+        for seconds, sql in sorted(timings.sql, key=lambda item: item[0], reverse=True)
+    )
+    logger.warning(
+        "Slow request %s %s -> %s: %.0f ms, %d queries (db %.0f ms, serializer %.0f ms, render %.0f ms)\n%s",
+        request.method,
+        request.get_full_path(),
+        response.status_code,
+        values["total"] * 1000,
+        values["queries"],
+        values["db"] * 1000,
+        values["serializer"] * 1000,
+        values["render"] * 1000,
+        statements,
+    )
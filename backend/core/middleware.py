@@ -0,0 +1,104 @@
+"""
+Middleware проекта.
+
+Лёгкий профиль API
+------------------
+/api/ аутентифицируется только JWT (core.authentication), поэтому
+сессии, messages, CSRF-проверка и django.contrib.auth для него —
+лишняя работа на каждый запрос (а SessionMiddleware ещё и ходит
+в таблицу сессий, если в запросе есть cookie sessionid).
+
+Классы ниже — наследники стандартных middleware: для путей из
+LEAN_MIDDLEWARE_PREFIXES они сразу передают запрос дальше, для
+остальных (/admin/) работают как обычно. Наследование нужно и для
+проверок админки (admin.E408–E410 ищут подклассы стандартных классов).
+
+Реплики
+-------
+ReplicaStickinessMiddleware — см. core/db/replicas.py.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware as DjangoAuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware as DjangoMessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware as DjangoSessionMiddleware
+from django.middleware.csrf import CsrfViewMiddleware as DjangoCsrfViewMiddleware
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+
+# =========================
+# LEAN API PROFILE
+# =========================
+
+def is_lean_path(request) -> bool:
+    return request.path_info.startswith(tuple(getattr(settings, "LEAN_MIDDLEWARE_PREFIXES", ("/api/",))))
+
+
+class LeanPathMixin:
+    """
+    Для «лёгких» путей middleware не выполняется вовсе
+    (ни process_request, ни process_response).
+    """
+
+    def __call__(self, request):
+        if is_lean_path(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(LeanPathMixin, DjangoSessionMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(LeanPathMixin, DjangoAuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(LeanPathMixin, DjangoMessageMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(LeanPathMixin, DjangoCsrfViewMiddleware):
+    """
+    process_view вызывается обработчиком отдельно от __call__,
+    поэтому пропускается явно. API-views и так csrf_exempt.
+    """
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_lean_path(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+# =========================
+# REPLICAS
+# =========================
+
+class ReplicaStickinessMiddleware(MiddlewareMixin):
+    """
+    После успешного изменяющего запроса клиент REPLICA_STICKY_SECONDS
+    секунд читает с primary: cookie со временем окончания окна
+    (проверяет core.db.replicas.is_pinned). Так клиент видит свою
+    запись, даже если реплика отстаёт.
+    """
+
+    def process_response(self, request, response):
+        if (
+            settings.REPLICA_DATABASES
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            window = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                str(int(time.time() + window) + 1),
+                max_age=int(window) + 1,
+                httponly=True,
+                secure=settings.JWT_COOKIE_SECURE,
+                samesite=settings.JWT_COOKIE_SAMESITE,
+                path="/",
+            )
+        return response
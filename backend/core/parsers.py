@@ -0,0 +1,54 @@
+"""
+Парсеры API.
+
+JSONParser — на orjson, результат тот же, что у
+rest_framework.parsers.JSONParser. Стандартный парсер (и его текст
+ошибки) используется, когда orjson разобрал бы иначе:
+- кодировка запроса не UTF-8
+- целые вне диапазона i64 / u64 (orjson превращает их во float)
+- тело не разобралось — ParseError с тем же текстом, что у DRF
+"""
+
+import io
+import re
+
+import orjson
+from django.conf import settings
+from rest_framework import parsers
+
+# orjson читает как int только [-2**63, 2**64 - 1]. Короче 19 цифр —
+# всегда в диапазоне; 19 цифр подряд ищутся по телу, где все цифры
+# заменены на 0: translate + поиск подстроки в разы быстрее регулярки
+_DIGITS_TO_ZERO = bytes.maketrans(b"123456789", b"000000000")
+_LONG_DIGITS = b"0" * 19
+
+# целый литерал из 19+ цифр: не дробная часть и не показатель степени
+# (цифры внутри строк тоже совпадут — тогда просто стандартный парсер)
+_LONG_INTEGER = re.compile(rb"(?<![\d.eE+-])-?\d{19,}(?![\d.eE])")
+_INT_MIN, _INT_MAX = -(2**63), 2**64 - 1
+
+_UTF8 = {"utf-8", "utf8"}
+
+
+class JSONParser(parsers.JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        if not self.strict or encoding.lower() not in _UTF8:
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if _fits_orjson(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+
+        return super().parse(io.BytesIO(body), media_type, parser_context)
+
+
+def _fits_orjson(body: bytes) -> bool:
+    if _LONG_DIGITS not in body.translate(_DIGITS_TO_ZERO):
+        return True
+    return all(_INT_MIN <= int(number) <= _INT_MAX for number in _LONG_INTEGER.findall(body))
@@ -70,6 +70,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # pg_trgm lookups для поиска персон
 
     # Third-party
     "corsheaders",
@@ -84,18 +85,26 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # =============================================================================
 
+# session / CSRF / auth / messages — только для /admin/ и прочего не-API:
+# наследники стандартных классов, пропускающие LEAN_MIDDLEWARE_PREFIXES
+# (см. core/middleware.py)
+LEAN_MIDDLEWARE_PREFIXES = ("/api/",)
+
 MIDDLEWARE = [
+    # первой: замер охватывает весь стек (core/metrics.py)
+    "core.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "core.middleware.SessionMiddleware",
 
     # CORS must be before CommonMiddleware
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
 
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "core.middleware.CsrfViewMiddleware",
+    "core.middleware.AuthenticationMiddleware",
+    "core.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.ReplicaStickinessMiddleware",
 ]
 
 # =============================================================================
@@ -140,6 +149,85 @@ DATABASES = {
     }
 }
 
+# Режим соединений (DB_CONN_MODE):
+# - pool — пул на процесс (core.db.pool): соединение берётся на запрос
+#   и возвращается в конце; WSGI и ASGI; по умолчанию в prod
+# - persistent — соединение на поток живёт CONN_MAX_AGE секунд,
+#   с проверкой перед переиспользованием; только WSGI (под ASGI
+#   каждый запрос — свой поток, соединения копятся); по умолчанию в dev
+# - off — новое соединение на каждый запрос
+DB_CONN_MODE = os.getenv("DB_CONN_MODE", "pool" if IS_PROD else "persistent")
+
+if DB_CONN_MODE == "pool":
+    DATABASES["default"].update({
+        "ENGINE": "core.db.backends.postgresql_pool",
+        "CONN_MAX_AGE": 0,
+        "POOL": {
+            "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "5")),                 # ожидание свободного
+            "MAX_LIFETIME": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+            "MAX_IDLE": float(os.getenv("DB_POOL_MAX_IDLE", "600")),
+            "CHECK_AFTER": float(os.getenv("DB_POOL_CHECK_AFTER", "10")),        # SELECT 1 после простоя
+        },
+    })
+elif DB_CONN_MODE == "persistent":
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+    })
+
+# Реплики для чтения: DB_REPLICAS=host1:5432,host2 → алиасы replica_1, replica_2
+# (те же имя БД / пользователь / режим соединений, что у default).
+# GET-запросы viewset'ов с ReplicaReadMixin читают с реплики (core/db/replicas.py)
+REPLICA_DATABASES = []
+
+for _number, _replica in enumerate(filter(None, os.getenv("DB_REPLICAS", "").split(",")), start=1):
+    _host, _, _port = _replica.strip().partition(":")
+    DATABASES[f"replica_{_number}"] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(f"replica_{_number}")
+
+DATABASE_ROUTERS = ["core.db.routers.ReplicaRouter"]
+
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "5"))                    # секунд
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "2"))
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))     # primary после записи
+REPLICA_STICKY_COOKIE = "db_primary_until"
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+# default — как раньше (throttling DRF); responses — готовые ответы
+# GET /api/persons/ и /api/addresses/ (apps/persons/caching.py), на процесс
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))},
+    },
+}
+
+PERSONS_RESPONSE_CACHE_TTL = int(os.getenv("PERSONS_RESPONSE_CACHE_TTL", "300"))  # 0 = выключен
+
+# GET-чтение персон и адресов корутинами (apps/persons/async_views.py);
+# только под ASGI (core.asgi), под WSGI медленнее синхронных view
+PERSONS_ASYNC_READS = os.getenv("PERSONS_ASYNC_READS", "0") == "1"
+
+# Журнал изменений персон и адресов (core/audit.py): очередь в процессе,
+# фоновый поток пишет пачками; полная очередь → запись в потоке запроса
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1"))      # секунд
+AUDIT_ENQUEUE_TIMEOUT = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", "0.5"))  # секунд
+
 # =============================================================================
 # AUTH
 # =============================================================================
@@ -164,6 +252,16 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # JSON через orjson (вывод как у DRF) + замер времени (core.metrics)
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.JSONRenderer",
+        "core.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SIMPLE_JWT = {
@@ -172,6 +270,30 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# кэш проверенных access-токенов в памяти процесса (core.authentication);
+# TTL — сколько максимум другие воркеры могут видеть устаревшего пользователя
+JWT_AUTH_CACHE = {
+    "MAX_SIZE": int(os.getenv("JWT_AUTH_CACHE_SIZE", "10000")),
+    "TTL": float(os.getenv("JWT_AUTH_CACHE_TTL", "30")),  # 0 = выключен
+}
+
+# потоки для хэширования паролей / подписи JWT в async-views и при массовом
+# заведении пользователей (core.concurrency); по умолчанию min(4, CPU)
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", "0")) or None
+
+# =============================================================================
+# METRICS (core/metrics.py)
+# =============================================================================
+
+# доля запросов с замером (Server-Timing + /api/_metrics); 0 = выключено
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "0"))
+
+# > 0: замеряются все запросы, дольше порога (мс) — в лог core.metrics с SQL
+METRICS_SLOW_REQUEST_MS = float(os.getenv("METRICS_SLOW_REQUEST_MS", "0"))
+
+# Bearer-токен scraper'а для /api/_metrics (без него — только staff)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 # =============================================================================
 # STATIC / I18N
 # =============================================================================
@@ -0,0 +1,563 @@
+import datetime
+import decimal
+import io
+import threading
+import time
+import uuid
+import zoneinfo
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from psycopg2 import extensions
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.test import APITestCase
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .audit import WriteBehindBuffer, acting_as, current_actor
+from .db import replicas
+from .db.backends.postgresql_pool.base import _reset as reset_pg_connection
+from .db.pool import ConnectionPool, PoolTimeout
+from .db.routers import ReplicaRouter
+from .metrics import metrics
+from .middleware import AuthenticationMiddleware, CsrfViewMiddleware, MessageMiddleware, SessionMiddleware
+from .parsers import JSONParser
+from .renderers import JSONRenderer
+
+User = get_user_model()
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+
+class LeanMiddlewareTests(TestCase):
+    def setUp(self):
+        self.seen = None
+
+        def view(request):
+            self.seen = request
+            return HttpResponse()
+
+        self.chain = SessionMiddleware(AuthenticationMiddleware(MessageMiddleware(view)))
+
+    def test_api_skips_session_auth_and_messages(self):
+        response = self.chain(RequestFactory().get("/api/persons/"))
+
+        self.assertEqual(response.status_code, 200)
+        for attr in ("session", "user", "_messages"):
+            self.assertFalse(hasattr(self.seen, attr), attr)
+
+    def test_admin_keeps_full_stack(self):
+        self.chain(RequestFactory().get("/admin/"))
+
+        self.assertTrue(self.seen.user.is_anonymous)
+        self.assertTrue(hasattr(self.seen, "session"))
+        self.assertTrue(hasattr(self.seen, "_messages"))
+
+    def test_csrf_checked_outside_api_only(self):
+        middleware = CsrfViewMiddleware(lambda request: HttpResponse())
+
+        def view(request):
+            return HttpResponse()
+
+        api = RequestFactory().post("/api/persons/")
+        admin = RequestFactory().post("/admin/login/")
+
+        self.assertIsNone(middleware.process_view(api, view, (), {}))
+        self.assertEqual(middleware.process_view(admin, view, (), {}).status_code, 403)
+
+    def test_admin_login_still_works(self):
+        User.objects.create_superuser(email="admin@example.com", password="x")
+
+        response = self.client.post("/admin/login/", {"username": "admin@example.com", "password": "x"})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.client.get("/admin/").status_code, 200)
+
+
+# =========================
+# CONNECTION POOL
+# =========================
+
+class _Connection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.broken = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def make_pool(self, **kwargs):
+        counter = iter(range(1, 1000))
+        kwargs.setdefault("check", lambda connection: not connection.broken)
+        return ConnectionPool(lambda: _Connection(next(counter)), **kwargs)
+
+    def test_reuses_released_connection(self):
+        pool = self.make_pool()
+
+        first = pool.acquire()
+        pool.release(first)
+
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(pool.stats()["created"], 1)
+        self.assertEqual(pool.stats()["requests"], 2)
+
+    def test_size_limit_and_timeout(self):
+        pool = self.make_pool(max_size=2, timeout=0.05)
+        pool.acquire()
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+        stats = pool.stats()
+        self.assertEqual((stats["size"], stats["in_use"], stats["timeouts"], stats["waits"]), (2, 2, 1, 1))
+
+    def test_waiter_gets_released_connection(self):
+        pool = self.make_pool(max_size=1, timeout=2)
+        held = pool.acquire()
+        threading.Timer(0.05, pool.release, [held]).start()
+
+        self.assertIs(pool.acquire(), held)
+        self.assertGreater(pool.stats()["wait_seconds"], 0)
+
+    def test_broken_idle_connection_is_replaced(self):
+        pool = self.make_pool(check_after=0)
+        first = pool.acquire()
+        pool.release(first)
+        first.broken = True
+
+        second = pool.acquire()
+
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()["check_failures"], 1)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_failed_reset_discards(self):
+        def reset(connection):
+            raise RuntimeError("server closed the connection")
+
+        pool = self.make_pool(reset=reset)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_postgres_reset_discards_session_state(self):
+        executed = []
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                executed.append((sql, connection.autocommit))
+
+        connection = mock.Mock(closed=False, autocommit=False)
+        connection.info.transaction_status = extensions.TRANSACTION_STATUS_INERROR
+        connection.cursor.return_value = Cursor()
+
+        reset_pg_connection(connection)
+
+        connection.rollback.assert_called_once_with()
+        # DISCARD ALL вне транзакции, затем autocommit как был
+        self.assertEqual(executed, [("DISCARD ALL", True)])
+        self.assertFalse(connection.autocommit)
+
+    def test_lifetime_and_idle_limits(self):
+        pool = self.make_pool(max_lifetime=0)
+        old = pool.acquire()
+        pool.release(old)
+        self.assertTrue(old.closed)
+
+        pool = self.make_pool(max_idle=0.01)
+        idle = pool.acquire()
+        pool.release(idle)
+        time.sleep(0.02)
+
+        self.assertIsNot(pool.acquire(), idle)
+        self.assertTrue(idle.closed)
+
+    def test_failed_connect_frees_slot(self):
+        pool = ConnectionPool(lambda: 1 / 0, max_size=1, timeout=0.01)
+
+        for _ in range(2):
+            with self.assertRaises(ZeroDivisionError):
+                pool.acquire()
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_forked_process_forgets_inherited_connections(self):
+        pool = self.make_pool(max_size=1)
+        inherited = pool.acquire()
+        pool._pid = -1  # как будто пул создан в родителе
+
+        fresh = pool.acquire()
+
+        self.assertIsNot(fresh, inherited)
+        self.assertFalse(inherited.closed)
+
+    def test_threads_never_exceed_max_size(self):
+        pool = self.make_pool(max_size=3, timeout=5)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            for _ in range(20):
+                connection = pool.acquire()
+                with lock:
+                    active.append(connection)
+                    peak.append(len(active))
+                time.sleep(0.001)
+                with lock:
+                    active.remove(connection)
+                pool.release(connection)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(max(peak), 3)
+        self.assertEqual(pool.stats()["in_use"], 0)
+        self.assertLessEqual(pool.stats()["created"], 3)
+
+
+class DatabasePoolStatsViewTests(APITestCase):
+    def test_admin_only(self):
+        user = User.objects.create_user(email="op@example.com", password="x")
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get("/api/db/pool-stats/").status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get("/api/db/pool-stats/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {})  # тесты идут на SQLite, пула нет
+
+
+# =========================
+# REPLICAS
+# =========================
+
+@override_settings(REPLICA_DATABASES=["replica_a", "replica_b"], REPLICA_MAX_LAG=5)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        replicas._lag_cache.clear()
+        self.lags = {"replica_a": 0.0, "replica_b": 0.0}
+        patcher = mock.patch.object(replicas, "measure_lag", side_effect=lambda alias: self.lags[alias])
+        self.measure_lag = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_follow_the_request_replica_writes_go_to_primary(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(User))
+
+        token = replicas._read_db.set("replica_a")
+        try:
+            self.assertEqual(router.db_for_read(User), "replica_a")
+            self.assertEqual(router.db_for_write(User), "default")
+        finally:
+            replicas._read_db.reset(token)
+
+        self.assertFalse(router.allow_migrate("replica_a", "users"))
+        self.assertIsNone(router.allow_migrate("default", "users"))
+
+    def test_lagging_or_unavailable_replicas_are_skipped(self):
+        self.lags.update(replica_a=30.0, replica_b=None)
+        self.assertIsNone(replicas.choose_replica())
+
+        replicas._lag_cache.clear()
+        self.lags["replica_b"] = 1.0
+        self.assertEqual({replicas.choose_replica() for _ in range(10)}, {"replica_b"})
+
+    @override_settings(REPLICA_LAG_CHECK_INTERVAL=60)
+    def test_lag_is_checked_once_per_interval(self):
+        for _ in range(5):
+            replicas.choose_replica()
+
+        self.assertEqual(self.measure_lag.call_count, 2)
+
+
+# реплика — тот же default: в тестах одна БД, проверяется только маршрут
+@override_settings(REPLICA_DATABASES=["default"])
+class ReplicaStickinessTests(APITestCase):
+    def setUp(self):
+        replicas._lag_cache.clear()
+        self.client.force_authenticate(User.objects.create_user(email="op@example.com", password="x"))
+
+    def read_db(self, url="/api/persons/"):
+        with mock.patch.object(replicas, "choose_replica", wraps=replicas.choose_replica) as choose:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return choose.call_count
+
+    def test_safe_reads_use_replica(self):
+        self.assertEqual(self.read_db(), 1)
+        self.assertEqual(self.read_db("/api/addresses/"), 1)
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, self.client.cookies)
+
+    def test_client_sticks_to_primary_after_write(self):
+        response = self.client.post("/api/persons/", {"first_name": "Anna", "last_name": "Petrova"}, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+        self.assertEqual(self.read_db(), 0)
+
+        self.client.cookies[settings.REPLICA_STICKY_COOKIE] = str(int(time.time()) - 1)
+        self.assertEqual(self.read_db(), 1)
+
+    def test_failed_write_does_not_pin(self):
+        response = self.client.post("/api/persons/", {}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas_no_cookie(self):
+        response = self.client.post("/api/persons/", {"first_name": "Anna", "last_name": "Petrova"}, format="json")
+
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+
+# =========================
+# METRICS
+# =========================
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        metrics.reset()
+        self.user = User.objects.create_user(email="op@example.com", password="x", is_staff=True)
+        self.client.cookies[settings.JWT_ACCESS_COOKIE] = str(AccessToken.for_user(self.user))
+
+    def scrape(self, **headers):
+        response = self.client.get("/api/_metrics", **headers)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_off_by_default(self):
+        response = self.client.get("/api/persons/")
+
+        self.assertNotIn("Server-Timing", response)
+        self.assertNotIn("erp_http_requests_total{", self.scrape())
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_sampled_request_reports_breakdown(self):
+        response = self.client.get("/api/persons/")
+
+        timing = response["Server-Timing"]
+        for part in ("db;dur=", "queries", "serializer;dur=", "render;dur=", "total;dur="):
+            self.assertIn(part, timing)
+
+        text = self.scrape()
+        self.assertIn('erp_http_requests_total{method="GET",endpoint="persons-list",status="200"} 1', text)
+        self.assertIn('erp_http_db_queries_bucket{method="GET",endpoint="persons-list",le="+Inf"} 1', text)
+        self.assertIn("erp_http_render_duration_seconds_count", text)
+        self.assertIn('erp_auth_cache{stat="hits"}', text)
+        self.assertIn('erp_write_behind{buffer="audit",stat="queued"}', text)
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    async def test_async_views_are_measured(self):
+        response = await self.async_client.get(
+            "/api/auth/me/", headers={"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=0.001)
+    def test_slow_request_log_has_sql(self):
+        with self.assertLogs("core.metrics", "WARNING") as logs:
+            self.client.get("/api/persons/")
+
+        self.assertIn("Slow request GET /api/persons/", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_access(self):
+        self.client.cookies.clear()
+
+        self.assertEqual(self.client.get("/api/_metrics").status_code, 403)
+        self.assertEqual(self.client.get("/api/_metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+        self.assertIn("erp_auth_cache", self.scrape(HTTP_AUTHORIZATION="Bearer scrape-secret"))
+
+        self.user.is_staff = False
+        self.user.save()
+        self.client.cookies[settings.JWT_ACCESS_COOKIE] = str(AccessToken.for_user(self.user))
+        self.assertEqual(self.client.get("/api/_metrics").status_code, 403)
+
+
+# =========================
+# JSON
+# =========================
+
+class JSONRendererTests(APITestCase):
+    """
+    Вывод orjson-рендерера побайтно совпадает с DRF.
+    """
+
+    def assertSameAsDRF(self, data, accepted_media_type=None, renderer_context=None):
+        expected = renderers.JSONRenderer().render(data, accepted_media_type, renderer_context)
+        self.assertEqual(JSONRenderer().render(data, accepted_media_type, renderer_context), expected)
+
+    def test_matches_drf(self):
+        moscow = zoneinfo.ZoneInfo("Europe/Moscow")
+        cases = [
+            None,
+            [],
+            {"id": 1, "name": "Анна", "flag": True, "empty": None, "ratio": 0.1, "geo": 55.755826},
+            {"created_at": datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc)},
+            {"at": datetime.datetime(2024, 5, 1, 12, 30, 1, 123456, tzinfo=moscow)},
+            {"at": datetime.datetime(2024, 5, 1, 12, 30), "day": datetime.date(2024, 5, 1),
+             "time": datetime.time(8, 15, 0, 500)},
+            {"amount": decimal.Decimal("12.50"), "uid": uuid.UUID(int=7)},
+            {"lazy": gettext_lazy("This field is required."), "detail": ErrorDetail("bad", code="invalid")},
+            {"separators": "\u2028 \u2029", "quote": '"\\/\n\t'},
+            ReturnDict([("results", ReturnList([{"a": [1, (2, 3)]}], serializer=None))], serializer=None),
+            {"big": 2 ** 70, 1: "non-string key"},
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                self.assertSameAsDRF(data)
+
+    def test_uses_orjson(self):
+        with mock.patch("rest_framework.renderers.json.dumps", side_effect=AssertionError):
+            self.assertEqual(JSONRenderer().render({"a": decimal.Decimal("1.5")}), b'{"a":1.5}')
+
+    def test_indent_falls_back_to_drf(self):
+        data = {"a": [1, 2]}
+        self.assertSameAsDRF(data, "application/json; indent=4")
+        self.assertSameAsDRF(data, None, {"indent": 2})
+
+    def test_person_list_response(self):
+        from apps.persons.models import Address, AddressDadata, Person
+
+        address = Address.objects.create(country="Russia", city="Москва", address_line="Тверская 1")
+        AddressDadata.store({address.pk: {"value": "г Москва", "data": {"geo_lat": "55.75", "fias_id": None}}})
+        Person.objects.create(first_name="Анна", last_name="Петрова", registration_address=address)
+        self.client.force_authenticate(User.objects.create_user(email="json@example.com", password="x"))
+
+        response = self.client.get("/api/persons/?expand=registration_address.dadata,actual_address.dadata")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, renderers.JSONRenderer().render(response.data))
+
+
+class JSONParserTests(SimpleTestCase):
+    def parse(self, parser, body: bytes, encoding="utf-8"):
+        return parser.parse(io.BytesIO(body), "application/json", {"encoding": encoding})
+
+    def test_matches_drf(self):
+        for body in [
+            b'{"first_name": "\xd0\x90\xd0\xbd\xd0\xbd\xd0\xb0", "n": 1.5, "ok": true, "none": null}',
+            b'[{"id": 1}, {"id": 2, "id": 3}]',
+            b'{"big": 123456789012345678901234567890}',
+            b"[-9223372036854775808, -9223372036854775809, -9999999999999999999]",
+            b"[18446744073709551615, 18446744073709551616, 9999999999999999999.5, 1e19]",
+            b'{"phone": "12345678901234567890", "n": 1.12345678901234567890e-12345678901234567890}',
+            b'{"surrogate": "\\ud800"}',
+        ]:
+            with self.subTest(body=body):
+                self.assertEqual(self.parse(JSONParser(), body), self.parse(parsers.JSONParser(), body))
+
+        for body in [b"[123456789012345678901234567890]", b"[-9223372036854775809]", b"[-9999999999999999999]"]:
+            self.assertIsInstance(self.parse(JSONParser(), body)[0], int)
+
+    def test_errors_match_drf(self):
+        for body in [b"", b"{", b"[NaN]", b'{"a": Infinity}']:
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError) as expected:
+                    self.parse(parsers.JSONParser(), body)
+                with self.assertRaises(ParseError) as actual:
+                    self.parse(JSONParser(), body)
+                self.assertEqual(str(actual.exception), str(expected.exception))
+
+    def test_other_encodings(self):
+        body = '{"name": "Анна"}'.encode("utf-16")
+        self.assertEqual(self.parse(JSONParser(), body, "utf-16"), {"name": "Анна"})
+
+
+# =========================
+# WRITE-BEHIND
+# =========================
+
+class WriteBehindBufferTests(SimpleTestCase):
+    def setUp(self):
+        self.batches = []
+
+    def buffer(self, **options) -> WriteBehindBuffer:
+        buffer = WriteBehindBuffer("test", write=self.batches.append, **options)
+        self.addCleanup(buffer.close)
+        return buffer
+
+    def test_background_writer_batches(self):
+        buffer = self.buffer(batch_size=3, flush_interval=0.05)
+
+        buffer.put_many(list(range(7)))
+        buffer.join()
+
+        self.assertEqual(sorted(item for batch in self.batches for item in batch), list(range(7)))
+        self.assertTrue(all(len(batch) <= 3 for batch in self.batches))
+        self.assertEqual(buffer.stats()["written"], 7)
+
+    def test_writer_releases_connection_after_each_batch(self):
+        events = []
+        buffer = WriteBehindBuffer(
+            "test", write=lambda batch: events.append("write"), batch_size=2, flush_interval=0.05
+        )
+        self.addCleanup(buffer.close)
+
+        with mock.patch("core.audit.close_old_connections", side_effect=lambda: events.append("close")):
+            buffer.put_many([1, 2, 3])
+            buffer.join()
+
+        self.assertIn("write", events)
+        self.assertEqual(events[-1], "close")
+        for index, event in enumerate(events):
+            if event == "write":
+                self.assertEqual(events[index + 1], "close")
+
+    def test_full_queue_writes_in_caller(self):
+        buffer = self.buffer(max_size=2, put_timeout=0.01, background=False)
+
+        buffer.put_many([1, 2, 3, 4])
+        self.assertEqual(self.batches, [[3, 4]])
+
+        buffer.flush()
+        self.assertEqual(self.batches, [[3, 4], [1, 2]])
+        self.assertEqual(buffer.stats()["overflows"], 2)
+
+    def test_failed_batch_is_counted(self):
+        buffer = WriteBehindBuffer("failing", write=mock.Mock(side_effect=RuntimeError), background=False)
+
+        buffer.put_many([1, 2])
+        with self.assertLogs("core.audit", "ERROR"):
+            buffer.flush()
+
+        self.assertEqual(buffer.stats()["failed"], 2)
+
+    def test_acting_as(self):
+        user = User(pk=1)
+
+        with acting_as(user):
+            self.assertIs(current_actor(), user)
+            with acting_as(AnonymousUser()):
+                self.assertIsNone(current_actor())
+        self.assertIsNone(current_actor())
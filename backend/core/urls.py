@@ -2,10 +2,14 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import DatabasePoolStatsView, MetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
 
     # ВСЕ API идут через /api/
     path("api/", include("apps.users.urls")),
     path("api/", include("apps.persons.urls")),
+    path("api/db/pool-stats/", DatabasePoolStatsView.as_view(), name="db_pool_stats"),
+    path("api/_metrics", MetricsView.as_view(), name="metrics"),
 ]
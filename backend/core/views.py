@@ -0,0 +1,54 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from core.authentication import CookieJWTAuthentication
+from core.db.pool import pool_stats
+from core.metrics import metrics
+
+
+class DatabasePoolStatsView(APIView):
+    """
+    Статистика пулов соединений текущего процесса ({alias: {...}}).
+    Пусто, если DB_CONN_MODE не pool.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(pool_stats())
+
+
+class MetricsView(View):
+    """
+    GET /api/_metrics — метрики процесса в текстовом формате Prometheus
+    (см. core/metrics.py).
+
+    Доступ: заголовок Authorization: Bearer <METRICS_TOKEN> (для scraper'а)
+    или JWT сотрудника (is_staff).
+    """
+
+    def get(self, request):
+        if not self.allowed(request):
+            return JsonResponse({"detail": "You do not have permission to perform this action."}, status=403)
+
+        return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @staticmethod
+    def allowed(request) -> bool:
+        token = settings.METRICS_TOKEN
+        if token and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return True
+
+        try:
+            result = CookieJWTAuthentication().authenticate(request)
+        except (AuthenticationFailed, InvalidToken):
+            return False
+        return result is not None and result[0].is_staff
@@ -24,6 +24,12 @@ type Person = {
     sex: number | null;      // 1 | 2
 };
 
+type PersonPage = {
+    next: string | null;
+    previous: string | null;
+    results: Person[];
+};
+
 type PersonRow = {
     id: number;
     full_name: string;
@@ -53,7 +59,9 @@ function sexLabel(v: number | null): string {
 
 export default function PersonsPage() {
     const [data, setData] = useState<Person[]>([]);
+    const [nextPage, setNextPage] = useState<string | null>(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState<string | null>(null);
 
     /* FILTER STATE (CONTROLLED) */
@@ -64,12 +72,36 @@ export default function PersonsPage() {
        LOAD
     ======================= */
 
+    // API отдаёт keyset-страницы: { next, previous, results }
+    async function fetchPage(endpoint: string): Promise<PersonPage> {
+        const res = await fetchWithAuth(endpoint);
+        if (!res.ok) throw new Error(`API ${res.status}`);
+        return res.json();
+    }
+
+    // next — абсолютный URL, fetchWithAuth ждёт путь относительно API
+    function nextEndpoint(next: string | null): string | null {
+        if (!next) return null;
+        const url = new URL(next);
+        return `/persons/${url.search}`;
+    }
+
+    // фильтры применяются на сервере (PersonFilterBackend)
+    function listEndpoint(): string {
+        const params = new URLSearchParams();
+        if (sexFilter) params.set("sex", sexFilter);
+        if (birthdayFilter) params.set("birthday", birthdayFilter);
+
+        const query = params.toString();
+        return query ? `/persons/?${query}` : "/persons/";
+    }
+
     useEffect(() => {
         async function load() {
             try {
-                const res = await fetchWithAuth("/persons/");
-                if (!res.ok) throw new Error(`API ${res.status}`);
-                setData(await res.json());
+                const page = await fetchPage(listEndpoint());
+                setData(page.results);
+                setNextPage(nextEndpoint(page.next));
             } catch (e) {
                 console.error(e);
                 setError("Не удалось загрузить список персон");
@@ -79,27 +111,38 @@ export default function PersonsPage() {
         }
 
         void load();
-    }, []);
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [sexFilter, birthdayFilter]);
+
+    async function loadMore() {
+        if (!nextPage) return;
+
+        setLoadingMore(true);
+        try {
+            const page = await fetchPage(nextPage);
+            setData((prev) => [...prev, ...page.results]);
+            setNextPage(nextEndpoint(page.next));
+        } catch (e) {
+            console.error(e);
+            setError("Не удалось загрузить список персон");
+        } finally {
+            setLoadingMore(false);
+        }
+    }
 
     /* =======================
-       FILTER + MAP
+       MAP
     ======================= */
 
     const rows: PersonRow[] = useMemo(() => {
-        return data
-            .filter((p) => {
-                if (sexFilter && String(p.sex) !== sexFilter) return false;
-                if (birthdayFilter && p.birthday !== birthdayFilter) return false;
-                return true;
-            })
-            .map((p) => ({
-                id: p.id,
-                full_name: p.full_name ?? "",
-                email: p.email ?? "",
-                birthday: p.birthday ?? "",
-                sex: sexLabel(p.sex),
-            }));
-    }, [data, sexFilter, birthdayFilter]);
+        return data.map((p) => ({
+            id: p.id,
+            full_name: p.full_name ?? "",
+            email: p.email ?? "",
+            birthday: p.birthday ?? "",
+            sex: sexLabel(p.sex),
+        }));
+    }, [data]);
 
     /* =======================
        DELETE
@@ -204,6 +247,18 @@ export default function PersonsPage() {
                         </div>
                     )}
                 />
+
+                {nextPage && (
+                    <div className="mt-4 flex justify-center">
+                        <Button
+                            variant="outline"
+                            onClick={() => void loadMore()}
+                            disabled={loadingMore}
+                        >
+                            {loadingMore ? "Loading..." : "Load more"}
+                        </Button>
+                    </div>
+                )}
             </ComponentCard>
         </div>
     );